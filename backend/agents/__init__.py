@@ -1,4 +1,18 @@
 """SpoonOS agents for SettleIt dispute resolution."""
-from .dispute_agent import get_dispute_agent, analyze_dispute, create_dispute_agent
+from .dispute_agent import (
+    LLMBudgetExceeded,
+    analyze_dispute,
+    create_dispute_agent,
+    get_cascade_report,
+    get_dispute_agent,
+    warm_up,
+)
 
-__all__ = ["get_dispute_agent", "analyze_dispute", "create_dispute_agent"]
+__all__ = [
+    "LLMBudgetExceeded",
+    "analyze_dispute",
+    "create_dispute_agent",
+    "get_cascade_report",
+    "get_dispute_agent",
+    "warm_up",
+]
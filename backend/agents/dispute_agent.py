@@ -5,12 +5,26 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from typing import Any
-
-# SpoonOS imports
-from spoon_ai.chat import ChatBot
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
+import database as db
 from config import settings
+from observability.metrics import (
+    LLM_BUDGET, LLM_CASCADE, LLM_COST, LLM_ERRORS, LLM_REQUEST_DURATION, LLM_TOKENS,
+)
+
+logger = logging.getLogger(__name__)
+
+# The SpoonOS SDK pulls in every LLM provider client (seconds of import time),
+# so it is only imported on first AI use or by warm_up() after startup.
+if TYPE_CHECKING:
+    from spoon_ai.chat import ChatBot
+    from spoon_ai.schema import Message
 
 # System prompt for dispute analysis
 SYSTEM_PROMPT = """You are an impartial AI arbitrator for the SettleIt dispute resolution platform.
@@ -29,29 +43,61 @@ SYSTEM_PROMPT = """You are an impartial AI arbitrator for the SettleIt dispute r
 4. **Verdict**: Final decision (creator or opponent) with brief reasoning
 
 Be impartial, concise, and base your verdict on facts and analysis, not assumptions.
+
+End with exactly one final line, outside markdown, in this form:
+VERDICT: {"winner": "creator" | "opponent" | null, "confidence": <0.0-1.0>}
 """
 
+_VERDICT_RE = re.compile(r"\n?\s*VERDICT:\s*(\{.*?\})\s*$", re.DOTALL)
+
+
+
+class LLMBudgetExceeded(Exception):
+    """The per-dispute or per-day LLM budget is used up."""
+
+    def __init__(self, budget: str) -> None:
+        super().__init__(f"The per-{budget} LLM budget is used up")
+        self.budget = budget
+
+
+# Per-tier cascade totals for this process (see get_cascade_report)
+_cascade_stats: Dict[str, Dict[str, float]] = {}
+
+
+def warm_up() -> None:
+    """Import the SpoonOS/LLM SDK stack so the first AI request does not pay for it."""
+    import spoon_ai.chat  # noqa: F401
+    import spoon_ai.schema  # noqa: F401
+
 
-def create_dispute_agent() -> ChatBot:
+def create_dispute_agent() -> "ChatBot":
     """Create and return a ChatBot for dispute analysis."""
+    from spoon_ai.chat import ChatBot
+
     # Initialize ChatBot - it will use env variables for configuration
     chatbot = ChatBot()
     return chatbot
 
 
 async def analyze_dispute(
-    agent: ChatBot,
+    agent: "ChatBot",
     dispute_id: str,
     title: str,
     description: str,
     creator_evidence: list[dict],
     opponent_evidence: list[dict],
     stake_amount: float = 0,
+    dispute_type: Optional[str] = None,
 ) -> dict[str, Any]:
     """
     Analyze a dispute and provide a resolution recommendation.
     Uses SpoonOS ChatBot directly for LLM calls.
+
+    Every call is recorded in `llm_calls`; raises LLMBudgetExceeded when a
+    budget is used up and LLM_BUDGET_ACTION is "reject".
     """
+    from spoon_ai.schema import Message
+
     has_evidence = len(creator_evidence) > 0 or len(opponent_evidence) > 0
     
     evidence_section = ""
@@ -86,25 +132,265 @@ You must conduct your own research to determine the facts and reach a verdict.
 Format your response in markdown with clear sections for each side's analysis and the final verdict.
 """
 
-    # Use ChatBot.ask() to get response from LLM
-    # This is the Agent → SpoonOS → LLM flow
-    # ask() expects messages as a list of dicts with 'role' and 'content'
+    # Agent → SpoonOS → LLM flow. We go through the LLM manager (what
+    # ChatBot.ask() wraps) so the response keeps its provider and token usage.
     messages = [
-        {"role": "user", "content": prompt}
+        Message(role="system", content=SYSTEM_PROMPT),
+        Message(role="user", content=prompt),
     ]
 
-    response = await agent.ask(
-        messages=messages,
-        system_msg=SYSTEM_PROMPT,
-    )
+    answer = await _run_cascade(agent, messages, stake_amount, {"dispute_id": dispute_id, "dispute_type": dispute_type})
 
     return {
         "dispute_id": dispute_id,
-        "agent_response": response,
+        "agent_response": answer["text"],
+        "verdict": answer["winner"],
+        "confidence": answer["confidence"],
+        "tier": answer["tier"],
+        "model": answer["model"],
         "status": "completed",
     }
 
 
+def cascade_tiers(agent: "ChatBot") -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """(tier, provider, model) in the order they are tried.
+
+    The last tier is the agent's own provider and model (None: its defaults).
+    """
+    default = ("default", None, None)
+    if not settings.CASCADE_ENABLED or not settings.CASCADE_FAST_MODEL:
+        return [default]
+    return [("fast", settings.CASCADE_FAST_PROVIDER or None, settings.CASCADE_FAST_MODEL), default]
+
+
+async def _run_cascade(
+    agent: "ChatBot",
+    messages: list["Message"],
+    stake_amount: float,
+    context: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Ask the cheapest tier first and escalate while the answer is not confident enough.
+
+    Disputes staking at least `CASCADE_ESCALATE_STAKE` go straight to the
+    last tier. A fast-tier error also escalates instead of failing. Once a
+    budget is used up the analysis is downgraded to the first tier (its
+    answer is final) or rejected, per LLM_BUDGET_ACTION.
+    """
+    tiers = cascade_tiers(agent)
+    exceeded = await _exceeded_budget(context["dispute_id"])
+    if exceeded:
+        if settings.LLM_BUDGET_ACTION == "downgrade" and len(tiers) > 1:
+            LLM_BUDGET.labels(exceeded, "downgraded").inc()
+            tiers = tiers[:1]
+        else:
+            LLM_BUDGET.labels(exceeded, "rejected").inc()
+            await _record_call({**context, "tier": tiers[0][0], "outcome": "rejected",
+                                "error": f"{exceeded} LLM budget exceeded"})
+            raise LLMBudgetExceeded(exceeded)
+    elif len(tiers) > 1 and stake_amount >= settings.CASCADE_ESCALATE_STAKE:
+        LLM_CASCADE.labels(tiers[0][0], "skipped_stake").inc()
+        _record_tier(tiers[0][0], "skipped_stake")
+        tiers = tiers[-1:]
+
+    for position, (tier, provider, model) in enumerate(tiers):
+        last = position == len(tiers) - 1
+        start = time.perf_counter()
+        try:
+            response = await _chat_with_metrics(
+                agent, messages, provider=provider, model=model, context={**context, "tier": tier}
+            )
+        except Exception as e:
+            if last:
+                raise
+            logger.warning("Cascade tier %s failed, escalating: %s", tier, e)
+            LLM_CASCADE.labels(tier, "error").inc()
+            _record_tier(tier, "error", time.perf_counter() - start)
+            continue
+        elapsed = time.perf_counter() - start
+        usage = response.usage or {}
+        cost = _cost(response.model or model, usage)
+        text, winner, confidence = parse_verdict(response.content)
+
+        if last or confidence >= settings.CASCADE_MIN_CONFIDENCE:
+            outcome = "accepted"
+            saved = None
+            if not last:
+                # What the last tier would have cost for the same tokens
+                saved = _cost(agent.model_name or settings.DEFAULT_MODEL, usage) - cost
+            _record_tier(tier, outcome, elapsed, cost, saved)
+            LLM_CASCADE.labels(tier, outcome).inc()
+            return {
+                "text": text, "winner": winner, "confidence": confidence,
+                "tier": tier, "model": response.model or model or agent.model_name or settings.DEFAULT_MODEL,
+            }
+
+        LLM_CASCADE.labels(tier, "escalated").inc()
+        _record_tier(tier, "escalated", elapsed, cost)
+    raise RuntimeError("No cascade tier produced an answer")
+
+
+def parse_verdict(content: str) -> Tuple[str, Optional[str], float]:
+    """Split the trailing VERDICT line off a response: (text, winner, confidence).
+
+    A missing or malformed line counts as confidence 0 so the cascade escalates.
+    """
+    match = _VERDICT_RE.search(content or "")
+    if not match:
+        return content or "", None, 0.0
+    text = content[:match.start()].rstrip()
+    try:
+        verdict = json.loads(match.group(1))
+        winner = verdict.get("winner")
+        confidence = min(max(float(verdict.get("confidence", 0)), 0.0), 1.0)
+    except (ValueError, TypeError, AttributeError):
+        return text, None, 0.0
+    if winner not in ("creator", "opponent"):
+        winner = None
+    return text, winner, confidence
+
+
+def _prices() -> Dict[str, Tuple[float, float]]:
+    """USD per million (prompt, completion) tokens by model, from LLM_PRICES."""
+    prices = {}
+    for entry in settings.LLM_PRICES.split(","):
+        model, _, price = entry.strip().partition("=")
+        if price:
+            prompt, _, completion = price.partition("/")
+            prices[model.strip()] = (float(prompt), float(completion or prompt))
+    return prices
+
+
+def _cost(model: str, usage: Dict[str, Any]) -> float:
+    prompt, completion = _prices().get(model, (0.0, 0.0))
+    return (usage.get("prompt_tokens", 0) * prompt + usage.get("completion_tokens", 0) * completion) / 1_000_000
+
+
+def _record_tier(
+    tier: str,
+    outcome: str,
+    elapsed: float = 0.0,
+    cost: float = 0.0,
+    saved: Optional[float] = None,
+) -> None:
+    stats = _cascade_stats.setdefault(tier, {
+        "calls": 0, "accepted": 0, "escalated": 0, "error": 0, "skipped_stake": 0,
+        "total_seconds": 0.0, "cost_usd": 0.0, "cost_saved_usd": 0.0, "escalated_cost_usd": 0.0,
+    })
+    stats[outcome] += 1
+    if outcome != "skipped_stake":
+        stats["calls"] += 1
+        stats["total_seconds"] += elapsed
+        stats["cost_usd"] += cost
+    if outcome == "escalated":
+        stats["escalated_cost_usd"] += cost
+    if saved is not None:
+        stats["cost_saved_usd"] += saved
+
+
+def get_cascade_report() -> Dict[str, Any]:
+    """Per-tier calls, outcomes, latency and cost for this process.
+
+    `cost_saved_usd` prices an accepted early answer's tokens at the last
+    tier's rates; `latency_saved_seconds` is its accepted answers times the
+    difference between the last tier's and its own average latency (None
+    until the last tier has been observed).
+    """
+    tiers = {}
+    last = _cascade_stats.get("default")
+    last_latency = last["total_seconds"] / last["calls"] if last and last["calls"] else None
+    for tier, stats in _cascade_stats.items():
+        average = stats["total_seconds"] / stats["calls"] if stats["calls"] else None
+        latency_saved = None
+        if tier != "default" and last_latency is not None and average is not None:
+            latency_saved = round(stats["accepted"] * (last_latency - average), 3)
+        tiers[tier] = {
+            **{key: int(stats[key]) for key in ("calls", "accepted", "escalated", "error", "skipped_stake")},
+            "avg_latency_seconds": round(average, 3) if average is not None else None,
+            "cost_usd": round(stats["cost_usd"], 6),
+            "cost_saved_usd": round(stats["cost_saved_usd"], 6),
+            "escalated_cost_usd": round(stats["escalated_cost_usd"], 6),
+            "latency_saved_seconds": latency_saved,
+        }
+    return {
+        "enabled": settings.CASCADE_ENABLED,
+        # Savings from accepted cheap answers minus what escalated ones cost on top
+        "net_cost_saved_usd": round(sum(
+            stats["cost_saved_usd"] - stats["escalated_cost_usd"] for stats in _cascade_stats.values()
+        ), 6),
+        "min_confidence": settings.CASCADE_MIN_CONFIDENCE,
+        "escalate_stake": settings.CASCADE_ESCALATE_STAKE,
+        "tiers": tiers,
+    }
+
+
+async def _chat_with_metrics(
+    agent: "ChatBot",
+    messages: list["Message"],
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    context: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Send messages to the LLM, recording latency, token usage, cost and errors.
+
+    With a `context` (dispute_id, dispute_type, tier) the call is also stored
+    in `llm_calls`. Returns the provider-normalized response (`content`,
+    `usage`, `model`).
+    """
+    # Without an explicit provider/model the manager keeps its own defaults and fallback
+    kwargs = {"model": model} if model else {}
+    requested = provider or agent.llm_provider
+    provider = requested or settings.DEFAULT_LLM_PROVIDER
+    model = model or agent.model_name or settings.DEFAULT_MODEL
+    start = time.perf_counter()
+    try:
+        response = await agent.llm_manager.chat(messages=messages, provider=requested, **kwargs)
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        LLM_REQUEST_DURATION.labels(provider, model, "error").observe(elapsed)
+        LLM_ERRORS.labels(provider, type(e).__name__).inc()
+        if context is not None:
+            await _record_call({**context, "provider": provider, "model": model, "latency_ms": elapsed * 1000,
+                                "outcome": "error", "error": f"{type(e).__name__}: {e}"[:500]})
+        raise
+
+    elapsed = time.perf_counter() - start
+    provider = response.provider or provider
+    model = response.model or model
+    LLM_REQUEST_DURATION.labels(provider, model, "success").observe(elapsed)
+    usage = response.usage or {}
+    cost = _cost(model, usage)
+    LLM_TOKENS.labels(provider, model, "prompt").inc(usage.get("prompt_tokens", 0))
+    LLM_TOKENS.labels(provider, model, "completion").inc(usage.get("completion_tokens", 0))
+    LLM_COST.labels(provider, model).inc(cost)
+    if context is not None:
+        await _record_call({
+            **context, "provider": provider, "model": model,
+            "prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0),
+            "cost_usd": cost, "latency_ms": elapsed * 1000, "outcome": "success",
+        })
+    return response
+
+
+async def _exceeded_budget(dispute_id: Optional[str]) -> Optional[str]:
+    """"dispute" or "day" if that LLM budget is used up, else None."""
+    if not settings.LLM_BUDGET_PER_DISPUTE_USD and not settings.LLM_BUDGET_PER_DAY_USD:
+        return None
+    spend = await db.get_llm_spend(dispute_id, datetime.now().date().isoformat())
+    if settings.LLM_BUDGET_PER_DISPUTE_USD and spend["dispute"] >= settings.LLM_BUDGET_PER_DISPUTE_USD:
+        return "dispute"
+    if settings.LLM_BUDGET_PER_DAY_USD and spend["day"] >= settings.LLM_BUDGET_PER_DAY_USD:
+        return "day"
+    return None
+
+
+async def _record_call(call: Dict[str, Any]) -> None:
+    # Accounting must never fail the analysis itself
+    try:
+        await db.record_llm_call(call)
+    except Exception:
+        logger.exception("Could not record LLM call for %s", call.get("dispute_id"))
+
+
 def _format_evidence(evidence_list: list[dict]) -> str:
     """Format evidence list for the prompt."""
     if not evidence_list:
@@ -118,10 +404,10 @@ def _format_evidence(evidence_list: list[dict]) -> str:
 
 
 # Singleton instance for the API
-_agent_instance: ChatBot | None = None
+_agent_instance: "ChatBot | None" = None
 
 
-def get_dispute_agent() -> ChatBot:
+def get_dispute_agent() -> "ChatBot":
     """Get or create the singleton ChatBot instance."""
     global _agent_instance
     if _agent_instance is None:
@@ -2,10 +2,14 @@
 from fastapi import APIRouter
 from .routes import router as spoon_router
 from .disputes import router as disputes_router
+from .admin import router as admin_router
+from .events import router as events_router
 
 # Combine all routers
 router = APIRouter()
 router.include_router(spoon_router)
 router.include_router(disputes_router)
+router.include_router(admin_router)
+router.include_router(events_router)
 
 __all__ = ["router"]
@@ -0,0 +1,102 @@
+"""Admin API routes for operational introspection."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import hmac
+import os
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+
+from agents import get_cascade_report
+from config import settings
+import database as db
+from services import resolution_queue
+from .imports import FORMATS, decode_lines, run_import
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Reject the request unless it carries the configured admin token.
+
+    Without an ADMIN_TOKEN the admin endpoints are closed to everyone.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not hmac.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/query-stats")
+async def get_query_stats(limit: int = 50) -> List[Dict[str, Any]]:
+    """Aggregated per-statement database stats for the worker answering, slowest total time first.
+
+    Each entry names that worker (its pid); `settleit_db_query_duration_seconds`
+    on /metrics covers every worker.
+    """
+    worker = os.getpid()
+    return [{**entry, "worker": worker} for entry in db.get_query_stats()[:limit]]
+
+
+@router.delete("/query-stats")
+async def reset_query_stats() -> Dict[str, str]:
+    """Clear the aggregated per-statement stats."""
+    db.reset_query_stats()
+    return {"message": "Query stats reset"}
+
+
+@router.get("/resolution-queue")
+async def get_resolution_queue() -> Dict[str, Any]:
+    """Depth, in-flight jobs and oldest wait of the answering worker's AI resolution queue."""
+    return {"worker": os.getpid(), **resolution_queue.stats()}
+
+
+@router.get("/llm-cascade")
+async def get_llm_cascade() -> Dict[str, Any]:
+    """Per-tier calls, escalations, latency, cost and savings of the model cascade (answering worker)."""
+    return {"worker": os.getpid(), **get_cascade_report()}
+
+
+@router.get("/llm-usage")
+async def get_llm_usage(
+    group_by: str = Query(default="day", pattern=f"^({'|'.join(db.LLM_USAGE_GROUPS)})$"),
+    since: Optional[str] = Query(default=None, description="First day (YYYY-MM-DD)"),
+    until: Optional[str] = Query(default=None, description="Last day (YYYY-MM-DD)"),
+) -> List[Dict[str, Any]]:
+    """LLM calls, tokens, cost, latency, cache hits, errors and rejections per group."""
+    return await db.get_llm_usage(group_by, since, until)
+
+
+@router.get("/llm-usage/disputes/{dispute_id}")
+async def get_dispute_llm_usage(dispute_id: str) -> Dict[str, Any]:
+    """Every LLM call recorded for one dispute, with totals."""
+    calls = await db.get_dispute_llm_calls(dispute_id)
+    return {
+        "dispute_id": dispute_id,
+        "calls": calls,
+        "prompt_tokens": sum(call['prompt_tokens'] for call in calls),
+        "completion_tokens": sum(call['completion_tokens'] for call in calls),
+        "cost_usd": round(sum(call['cost_usd'] for call in calls), 6),
+    }
+
+
+@router.post("/disputes/import")
+async def import_disputes(
+    request: Request,
+    format: Optional[str] = Query(default=None, pattern=f"^({'|'.join(FORMATS)})$"),
+) -> Dict[str, Any]:
+    """
+    Bulk-import disputes with nested evidence from an NDJSON or CSV body.
+
+    The body is read as a stream and inserted in batches of
+    `IMPORT_BATCH_SIZE`. Rows that fail validation or already exist are
+    listed in `errors` (line number, id, reason) and do not stop the import.
+    The format comes from `format` or, failing that, the Content-Type
+    (`text/csv`, otherwise NDJSON).
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    return await run_import(decode_lines(request.stream()), format)
@@ -4,14 +4,35 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+import logging
+import time
+from typing import List, Optional, Union
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 from datetime import datetime
 import database as db
+from agents import LLMBudgetExceeded
+from config import settings
+from observability.metrics import REGISTRY
+from services import precedent_index, resolution_queue
+from services.deadlines import parse_deadline
+from .idempotency import run_idempotent
+from .responses import TrustedJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class AIAnalysisFailed(Exception):
+    """The AI agent could not analyze a dispute (provider error, timeout, ...)."""
 
 router = APIRouter(prefix="/api/disputes", tags=["Disputes"])
 
+VALIDATOR_LEASES = REGISTRY.counter(
+    "settleit_validator_leases_total",
+    "Validator work queue operations by outcome (claimed, empty, renewed, released, conflict).",
+    ("outcome",),
+)
+
 
 # Request/Response Models
 class EvidenceItem(BaseModel):
@@ -62,6 +83,30 @@ class DisputeResponse(BaseModel):
     resolved_at: Optional[str] = None
 
 
+class DisputeSummary(BaseModel):
+    """Slim list item for dashboards (`GET /api/disputes/?view=summary`)."""
+    id: str
+    title: str
+    type: str
+    status: str
+    stake_amount: float
+    opponent_stake_amount: float
+    token: str
+    deadline: Optional[str] = None
+    created_at: str
+    funded_at: Optional[str] = None
+    evidence_submitted_at: Optional[str] = None
+    in_review_at: Optional[str] = None
+    resolved_at: Optional[str] = None
+
+
+class DisputeChangesResponse(BaseModel):
+    disputes: List[DisputeResponse]
+    deleted: List[str]
+    cursor: int
+    has_more: bool
+
+
 class CreateDisputeRequest(BaseModel):
     title: str
     type: str  # 'Promise' or 'Bet'
@@ -83,135 +128,298 @@ class CreateDisputeRequest(BaseModel):
 
 
 
-@router.get("/", response_model=List[DisputeResponse])
-async def get_all_disputes():
-    """Get all disputes."""
-    disputes = await db.get_all_disputes()
-    result = []
-    
-    for dispute in disputes:
-        evidence_list = await db.get_evidence_by_dispute(dispute['id'])
-        evidence = [
-            EvidenceItem(
-                id=e['id'],
-                type=e['type'],
-                content=e['content'],
-                submitted_by=e['submitted_by'],
-                timestamp=e['timestamp'],
-                description=e.get('description'),
-            )
-            for e in evidence_list
-        ]
-        
-        decision = None
-        if dispute.get('decision_reason'):  # Check if there's a decision reason
-            decision = Decision(
-                winner=dispute.get('decision_winner'),  # Can be None for AI decisions
-                reason=dispute['decision_reason'] or '',
-                decided_at=dispute['decision_decided_at'] or '',
-                decided_by=dispute['decision_decided_by'] or '',
-            )
-        
-        result.append(DisputeResponse(
-            id=dispute['id'],
-            title=dispute['title'],
-            type=dispute['type'],
-            description=dispute['description'],
-            creator_id=dispute['creator_id'],
-            opponent_id=dispute['opponent_id'],
-            creator_position=dispute.get('creator_position'),
-            opponent_position=dispute.get('opponent_position'),
-            validator_id=dispute.get('validator_id'),
-            validator_type=dispute['validator_type'],
-            resolution_method=dispute.get('resolution_method'),
-            status=dispute['status'],
-            stake_amount=dispute['stake_amount'],
-            opponent_stake_amount=dispute['opponent_stake_amount'],
-            token=dispute['token'],
-            creator_wallet=dispute.get('creator_wallet'),
-            opponent_wallet=dispute.get('opponent_wallet'),
-            escrow_tx_id=dispute.get('escrow_tx_id'),
-            payout_tx_id=dispute.get('payout_tx_id'),
-            neofs_object_id=dispute.get('neofs_object_id'),
-            deadline=dispute.get('deadline'),
-            evidence_requirements=dispute.get('evidence_requirements'),
-            evidence=evidence,
-            decision=decision,
-            created_at=dispute['created_at'],
-            funded_at=dispute.get('funded_at'),
-            evidence_submitted_at=dispute.get('evidence_submitted_at'),
-            in_review_at=dispute.get('in_review_at'),
-            resolved_at=dispute.get('resolved_at'),
-        ))
-    
+# DisputeResponse field -> disputes columns it is built from, in response order
+FIELD_COLUMNS = {
+    'id': ('id',),
+    'title': ('title',),
+    'type': ('type',),
+    'description': ('description',),
+    'creator_id': ('creator_id',),
+    'opponent_id': ('opponent_id',),
+    'creator_position': ('creator_position',),
+    'opponent_position': ('opponent_position',),
+    'validator_id': ('validator_id',),
+    'validator_type': ('validator_type',),
+    'resolution_method': ('resolution_method',),
+    'status': ('status',),
+    'stake_amount': ('stake_amount',),
+    'opponent_stake_amount': ('opponent_stake_amount',),
+    'token': ('token',),
+    'creator_wallet': ('creator_wallet',),
+    'opponent_wallet': ('opponent_wallet',),
+    'escrow_tx_id': ('escrow_tx_id',),
+    'payout_tx_id': ('payout_tx_id',),
+    'neofs_object_id': ('neofs_object_id',),
+    'deadline': ('deadline',),
+    'evidence_requirements': ('evidence_requirements',),
+    'evidence': (),  # separate table
+    'decision': ('decision_winner', 'decision_reason', 'decision_decided_at', 'decision_decided_by'),
+    'created_at': ('created_at',),
+    'funded_at': ('funded_at',),
+    'evidence_submitted_at': ('evidence_submitted_at',),
+    'in_review_at': ('in_review_at',),
+    'resolved_at': ('resolved_at',),
+}
+
+SUMMARY_FIELDS = tuple(DisputeSummary.model_fields)
+
+
+def _evidence_to_response(e: dict) -> dict:
+    return {
+        'id': e['id'],
+        'type': e['type'],
+        'content': e['content'],
+        'submitted_by': e['submitted_by'],
+        'timestamp': e['timestamp'],
+        'description': e.get('description'),
+    }
+
+
+def _decision_to_response(dispute: dict) -> Optional[dict]:
+    if not dispute.get('decision_reason'):  # No decision reason, no decision
+        return None
+    return {
+        'winner': dispute.get('decision_winner'),  # Can be None for AI decisions
+        'reason': dispute['decision_reason'] or '',
+        'decided_at': dispute['decision_decided_at'] or '',
+        'decided_by': dispute['decision_decided_by'] or '',
+    }
+
+
+def dispute_to_response(dispute: dict, evidence_list: List[dict]) -> dict:
+    """Map a dispute row and its evidence rows to the `DisputeResponse` shape.
+
+    Rows come from our own database, so the result is serialized as-is
+    (see `TrustedJSONResponse`) instead of being validated field by field.
+    """
+    return {
+        'id': dispute['id'],
+        'title': dispute['title'],
+        'type': dispute['type'],
+        'description': dispute['description'],
+        'creator_id': dispute['creator_id'],
+        'opponent_id': dispute['opponent_id'],
+        'creator_position': dispute.get('creator_position'),
+        'opponent_position': dispute.get('opponent_position'),
+        'validator_id': dispute.get('validator_id'),
+        'validator_type': dispute['validator_type'],
+        'resolution_method': dispute.get('resolution_method'),
+        'status': dispute['status'],
+        'stake_amount': float(dispute['stake_amount']),
+        'opponent_stake_amount': float(dispute['opponent_stake_amount']),
+        'token': dispute['token'],
+        'creator_wallet': dispute.get('creator_wallet'),
+        'opponent_wallet': dispute.get('opponent_wallet'),
+        'escrow_tx_id': dispute.get('escrow_tx_id'),
+        'payout_tx_id': dispute.get('payout_tx_id'),
+        'neofs_object_id': dispute.get('neofs_object_id'),
+        'deadline': dispute.get('deadline'),
+        'evidence_requirements': dispute.get('evidence_requirements'),
+        'evidence': [_evidence_to_response(e) for e in evidence_list],
+        'decision': _decision_to_response(dispute),
+        'created_at': dispute['created_at'],
+        'funded_at': dispute.get('funded_at'),
+        'evidence_submitted_at': dispute.get('evidence_submitted_at'),
+        'in_review_at': dispute.get('in_review_at'),
+        'resolved_at': dispute.get('resolved_at'),
+    }
+
+
+def dispute_to_sparse_response(dispute: dict, fields: List[str], evidence_list: List[dict]) -> dict:
+    """Like `dispute_to_response`, but only for the requested response fields."""
+    result = {}
+    for field in fields:
+        if field == 'evidence':
+            result[field] = [_evidence_to_response(e) for e in evidence_list]
+        elif field == 'decision':
+            result[field] = _decision_to_response(dispute)
+        elif field in ('stake_amount', 'opponent_stake_amount'):
+            result[field] = float(dispute[field])
+        else:
+            result[field] = dispute.get(field)
     return result
 
 
+def _parse_fields(fields: Optional[str], view: Optional[str]) -> Optional[List[str]]:
+    """Resolve `fields`/`view` to response fields in response order (None = everything)."""
+    if fields:
+        requested = {f.strip() for f in fields.split(',') if f.strip()}
+        unknown = requested - FIELD_COLUMNS.keys()
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        requested.add('id')
+    elif view == 'summary':
+        requested = set(SUMMARY_FIELDS)
+    else:
+        return None
+    return [field for field in FIELD_COLUMNS if field in requested]
+
+
+@router.get("/", response_model=Union[List[DisputeResponse], List[DisputeSummary]])
+async def get_all_disputes(
+    view: Optional[str] = Query(default=None, pattern="^(full|summary)$"),
+    fields: Optional[str] = None,
+):
+    """
+    Get all disputes.
+
+    `view=summary` returns `DisputeSummary` items for dashboards; `fields=`
+    takes a comma-separated list of `DisputeResponse` fields (`id` is always
+    included). Only the needed columns are read, and evidence is only loaded
+    when `evidence` is requested.
+    """
+    selected = _parse_fields(fields, view)
+    if selected is None:
+        disputes = await db.get_all_disputes()
+        evidence_by_dispute = await db.get_evidence_for_disputes([d['id'] for d in disputes])
+        return TrustedJSONResponse([
+            dispute_to_response(dispute, evidence_by_dispute[dispute['id']])
+            for dispute in disputes
+        ])
+
+    columns = list(dict.fromkeys(column for field in selected for column in FIELD_COLUMNS[field]))
+    disputes = await db.get_all_disputes(columns)
+    evidence_by_dispute = {}
+    if 'evidence' in selected:
+        evidence_by_dispute = await db.get_evidence_for_disputes([d['id'] for d in disputes])
+    return TrustedJSONResponse([
+        dispute_to_sparse_response(dispute, selected, evidence_by_dispute.get(dispute['id'], []))
+        for dispute in disputes
+    ])
+
+
+@router.get("/changes", response_model=DisputeChangesResponse)
+async def get_dispute_changes(since: int = 0, limit: int = Query(default=500, ge=1, le=5000)):
+    """
+    Get disputes created, updated or deleted after cursor `since`.
+
+    Start with `since=0`, then pass the returned `cursor` on the next call.
+    Disputes are returned in full (new evidence counts as a change to its
+    dispute); deleted disputes are listed by id. When `has_more` is true, call
+    again straight away with the new cursor.
+    """
+    changes = await db.get_changes_since(since, limit)
+    disputes = changes['disputes']
+    evidence_by_dispute = await db.get_evidence_for_disputes([d['id'] for d in disputes])
+    return TrustedJSONResponse({
+        'disputes': [dispute_to_response(d, evidence_by_dispute[d['id']]) for d in disputes],
+        'deleted': changes['deleted'],
+        'cursor': changes['cursor'],
+        'has_more': changes['has_more'],
+    })
+
+
+@router.get("/stats")
+async def get_dispute_stats():
+    """
+    Dashboard statistics: disputes per status and type, stake locked in
+    disputes past Draft and not yet Resolved or Cancelled (per token), and
+    how many were resolved (by AI or a human).
+
+    Read from the `dispute_stats` aggregate, which every write keeps current,
+    so the cost does not depend on the number of disputes.
+    """
+    return await db.get_dispute_stats()
+
+
+def _lease_to_response(dispute_id: str, owner: str, expires_at: float) -> dict:
+    return {
+        'dispute_id': dispute_id,
+        'owner': owner,
+        'expires_at': datetime.fromtimestamp(expires_at).isoformat(),
+    }
+
+
+async def _lease_conflict(dispute_id: str) -> HTTPException:
+    VALIDATOR_LEASES.labels("conflict").inc()
+    if not await db.get_dispute_by_id(dispute_id):
+        return HTTPException(status_code=404, detail="Dispute not found")
+    return HTTPException(status_code=409, detail="Dispute is not leased to this validator")
+
+
+@router.post("/queue/claim")
+async def claim_next_review(validator_id: str = Query(..., min_length=1)):
+    """
+    Claim the next dispute awaiting this validator's decision.
+
+    The dispute is leased to the validator for `VALIDATOR_LEASE_SECONDS`;
+    other validators cannot claim it until the lease is released or runs
+    out. Disputes assigned to the validator come before unassigned ones.
+    Returns 204 when the queue is empty.
+    """
+    dispute = await db.claim_review(validator_id, settings.VALIDATOR_LEASE_SECONDS)
+    if dispute is None:
+        VALIDATOR_LEASES.labels("empty").inc()
+        return Response(status_code=204)
+    VALIDATOR_LEASES.labels("claimed").inc()
+    evidence_list = await db.get_evidence_by_dispute(dispute['id'])
+    return TrustedJSONResponse({
+        'dispute': dispute_to_response(dispute, evidence_list),
+        'lease': _lease_to_response(dispute['id'], validator_id, dispute['lease_expires_at']),
+    })
+
+
+@router.post("/{dispute_id}/lease/renew")
+async def renew_review_lease(dispute_id: str, validator_id: str = Query(..., min_length=1)):
+    """Extend this validator's lease on a dispute by `VALIDATOR_LEASE_SECONDS` (409 if not theirs)."""
+    expires_at = await db.renew_review_lease(dispute_id, validator_id, settings.VALIDATOR_LEASE_SECONDS)
+    if expires_at is None:
+        raise await _lease_conflict(dispute_id)
+    VALIDATOR_LEASES.labels("renewed").inc()
+    return _lease_to_response(dispute_id, validator_id, expires_at)
+
+
+@router.delete("/{dispute_id}/lease", status_code=204)
+async def release_review_lease(dispute_id: str, validator_id: str = Query(..., min_length=1)):
+    """Give a claimed dispute back to the queue without deciding it (409 if not theirs)."""
+    if not await db.release_review_lease(dispute_id, validator_id):
+        raise await _lease_conflict(dispute_id)
+    VALIDATOR_LEASES.labels("released").inc()
+    return Response(status_code=204)
+
+
+async def _get_writable_dispute(dispute_id: str) -> dict:
+    """Get a dispute that may still be changed: 404 if missing, 409 if archived (read-only)."""
+    dispute = await db.get_dispute_by_id(dispute_id)
+    if not dispute:
+        raise HTTPException(status_code=404, detail="Dispute not found")
+    if dispute.get('archived_at'):
+        raise HTTPException(status_code=409, detail="Dispute is archived and can no longer be changed")
+    return dispute
+
+
 @router.get("/{dispute_id}", response_model=DisputeResponse)
 async def get_dispute(dispute_id: str):
     """Get a dispute by ID."""
     dispute = await db.get_dispute_by_id(dispute_id)
     if not dispute:
         raise HTTPException(status_code=404, detail="Dispute not found")
-    
+
     evidence_list = await db.get_evidence_by_dispute(dispute_id)
-    evidence = [
-        EvidenceItem(
-            id=e['id'],
-            type=e['type'],
-            content=e['content'],
-            submitted_by=e['submitted_by'],
-            timestamp=e['timestamp'],
-            description=e.get('description'),
-        )
-        for e in evidence_list
-    ]
-    
-    decision = None
-    if dispute.get('decision_reason'):  # Check if there's a decision reason
-        decision = Decision(
-            winner=dispute.get('decision_winner'),  # Can be None for AI decisions
-            reason=dispute['decision_reason'] or '',
-            decided_at=dispute['decision_decided_at'] or '',
-            decided_by=dispute['decision_decided_by'] or '',
-        )
-    
-    return DisputeResponse(
-        id=dispute['id'],
-        title=dispute['title'],
-        type=dispute['type'],
-        description=dispute['description'],
-        creator_id=dispute['creator_id'],
-        opponent_id=dispute['opponent_id'],
-        creator_position=dispute.get('creator_position'),
-        opponent_position=dispute.get('opponent_position'),
-        validator_id=dispute.get('validator_id'),
-        validator_type=dispute['validator_type'],
-        resolution_method=dispute.get('resolution_method'),
-        status=dispute['status'],
-        stake_amount=dispute['stake_amount'],
-        opponent_stake_amount=dispute['opponent_stake_amount'],
-        token=dispute['token'],
-        creator_wallet=dispute.get('creator_wallet'),
-        opponent_wallet=dispute.get('opponent_wallet'),
-        escrow_tx_id=dispute.get('escrow_tx_id'),
-        payout_tx_id=dispute.get('payout_tx_id'),
-        neofs_object_id=dispute.get('neofs_object_id'),
-        deadline=dispute.get('deadline'),
-        evidence_requirements=dispute.get('evidence_requirements'),
-        evidence=evidence,
-        decision=decision,
-        created_at=dispute['created_at'],
-        funded_at=dispute.get('funded_at'),
-        evidence_submitted_at=dispute.get('evidence_submitted_at'),
-        in_review_at=dispute.get('in_review_at'),
-        resolved_at=dispute.get('resolved_at'),
-    )
+    return TrustedJSONResponse(dispute_to_response(dispute, evidence_list))
+
+
+@router.get("/{dispute_id}/precedents")
+async def get_precedents(dispute_id: str, limit: int = Query(default=None, ge=1, le=50)):
+    """Resolved Bets most similar to this dispute, with their verdicts."""
+    dispute = await db.get_dispute_by_id(dispute_id)
+    if not dispute:
+        raise HTTPException(status_code=404, detail="Dispute not found")
+    if not settings.PRECEDENT_INDEX_ENABLED or dispute['type'] != 'Bet':
+        return []
+    return await precedent_index.find_precedents(dispute, k=limit)
 
 
 @router.post("/", response_model=DisputeResponse)
-async def create_dispute(request: CreateDisputeRequest):
-    """Create a new dispute."""
+async def create_dispute(
+    request: CreateDisputeRequest,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Create a new dispute (a retry with the same Idempotency-Key returns the original)."""
+    return await run_idempotent("create", idempotency_key, request, lambda: _create_dispute(request))
+
+
+async def _create_dispute(request: CreateDisputeRequest):
     import uuid
     from datetime import datetime
     
@@ -256,18 +464,20 @@ async def create_dispute(request: CreateDisputeRequest):
     }
     
     await db.create_dispute(dispute_data)
+    response = await get_dispute(dispute_id)
     
-    # If Bet type with AI resolution, immediately resolve
+    # AI Bets are resolved in the background; the client gets the Draft now
+    # and sees the dispute move to Resolved via polling or the change feed
     if request.type == 'Bet' and resolution_method == 'ai':
-        # This will be handled by a separate endpoint
-        pass
+        resolution_queue.submit(dispute_id)
     
-    return await get_dispute(dispute_id)
+    return response
 
 
 @router.put("/{dispute_id}", response_model=DisputeResponse)
 async def update_dispute(dispute_id: str, updates: dict):
-    """Update a dispute."""
+    """Update a dispute (409 once it is archived)."""
+    await _get_writable_dispute(dispute_id)
     # Convert decision object if present
     if 'decision' in updates and updates['decision']:
         decision = updates.pop('decision')
@@ -285,7 +495,7 @@ async def update_dispute(dispute_id: str, updates: dict):
             # In a real implementation, you'd have a delete_evidence function
             pass
         for e in evidence_list:
-            await db.add_evidence({
+            added = await db.add_evidence({
                 'id': e.get('id', f"evid_{datetime.now().timestamp()}"),
                 'dispute_id': dispute_id,
                 'type': e['type'],
@@ -294,15 +504,30 @@ async def update_dispute(dispute_id: str, updates: dict):
                 'timestamp': e.get('timestamp', datetime.now()).isoformat() if isinstance(e.get('timestamp'), datetime) else e.get('timestamp', datetime.now().isoformat()),
                 'description': e.get('description'),
             })
+            if added is None:
+                await _get_writable_dispute(dispute_id)
     
-    await db.update_dispute(dispute_id, updates)
+    if updates and not await db.update_dispute(dispute_id, updates):
+        # Archived or deleted since the check above
+        await _get_writable_dispute(dispute_id)
     return await get_dispute(dispute_id)
 
 
 @router.post("/{dispute_id}/evidence")
-async def add_evidence(dispute_id: str, evidence: dict):
-    """Add evidence to a dispute."""
+async def add_evidence(
+    dispute_id: str,
+    evidence: dict,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Add evidence to a dispute (a retry with the same Idempotency-Key adds nothing; 409 once archived)."""
+    return await run_idempotent(
+        f"evidence:{dispute_id}", idempotency_key, evidence, lambda: _add_evidence(dispute_id, evidence)
+    )
+
+
+async def _add_evidence(dispute_id: str, evidence: dict):
     import uuid
+    await _get_writable_dispute(dispute_id)
     evidence_data = {
         'id': f"evid_{int(datetime.now().timestamp() * 1000)}_{uuid.uuid4().hex[:8]}",
         'dispute_id': dispute_id,
@@ -312,16 +537,36 @@ async def add_evidence(dispute_id: str, evidence: dict):
         'timestamp': datetime.now().isoformat(),
         'description': evidence.get('description'),
     }
-    await db.add_evidence(evidence_data)
+    if await db.add_evidence(evidence_data) is None:
+        # Archived or deleted since the check above
+        await _get_writable_dispute(dispute_id)
     return {"id": evidence_data['id'], "message": "Evidence added"}
 
 
 @router.post("/{dispute_id}/resolve")
-async def resolve_dispute(dispute_id: str, resolution: dict):
-    """Resolve a dispute with AI or human decision."""
-    dispute = await db.get_dispute_by_id(dispute_id)
-    if not dispute:
-        raise HTTPException(status_code=404, detail="Dispute not found")
+async def resolve_dispute(
+    dispute_id: str,
+    resolution: dict,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Resolve a dispute with AI or human decision.
+
+    A retry with the same Idempotency-Key gets the original result instead
+    of running the AI analysis again. Answers 429 when the LLM budget is used
+    up and 502 when the AI analysis fails; the dispute is left unresolved.
+    """
+    try:
+        return await run_idempotent(
+            f"resolve:{dispute_id}", idempotency_key, resolution, lambda: _resolve_dispute(dispute_id, resolution)
+        )
+    except LLMBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except AIAnalysisFailed as e:
+        raise HTTPException(status_code=502, detail=f"AI analysis failed: {e}")
+
+
+async def _resolve_dispute(dispute_id: str, resolution: dict):
+    dispute = await _get_writable_dispute(dispute_id)
     
     method = resolution.get('method')  # 'ai' or 'human'
     decision_data = resolution.get('decision')
@@ -352,38 +597,49 @@ async def resolve_dispute(dispute_id: str, resolution: dict):
 
 Format in markdown with clear sections for each side's analysis and final verdict.
 """
-            # Use a simpler agent call for bets
+            agent_response = await precedent_index.reuse_verdict(dispute)
+            if agent_response is None:
+                # Use a simpler agent call for bets
+                try:
+                    agent = get_dispute_agent()
+                    # For bets, we can use a direct query
+                    result = await run_dispute_analysis(
+                        agent=agent,
+                        dispute_id=dispute_id,
+                        title=dispute['title'],
+                        description=bet_query,
+                        creator_evidence=[],
+                        opponent_evidence=[],
+                        stake_amount=dispute['stake_amount'],
+                        dispute_type=dispute['type'],
+                    )
+                    agent_response = result.get('agent_response', '') if isinstance(result, dict) else str(result)
+                except LLMBudgetExceeded:
+                    raise
+                except Exception as e:
+                    raise AIAnalysisFailed(str(e)) from e
+        else:
+            # For Promise type, use full evidence analysis
+            evidence_list = await db.get_evidence_by_dispute(dispute_id)
+            creator_evidence = [e for e in evidence_list if e['submitted_by'] == dispute['creator_id']]
+            opponent_evidence = [e for e in evidence_list if e['submitted_by'] == dispute['opponent_id']]
+            
             try:
                 agent = get_dispute_agent()
-                # For bets, we can use a direct query
                 result = await run_dispute_analysis(
                     agent=agent,
                     dispute_id=dispute_id,
                     title=dispute['title'],
-                    description=bet_query,
-                    creator_evidence=[],
-                    opponent_evidence=[],
+                    description=dispute['description'],
+                    creator_evidence=creator_evidence,
+                    opponent_evidence=opponent_evidence,
                     stake_amount=dispute['stake_amount'],
+                    dispute_type=dispute['type'],
                 )
-                agent_response = result.get('agent_response', '') if isinstance(result, dict) else str(result)
+            except LLMBudgetExceeded:
+                raise
             except Exception as e:
-                agent_response = f"AI analysis error: {str(e)}"
-        else:
-            # For Promise type, use full evidence analysis
-            evidence_list = await db.get_evidence_by_dispute(dispute_id)
-            creator_evidence = [e for e in evidence_list if e['submitted_by'] == dispute['creator_id']]
-            opponent_evidence = [e for e in evidence_list if e['submitted_by'] == dispute['opponent_id']]
-            
-            agent = get_dispute_agent()
-            result = await run_dispute_analysis(
-                agent=agent,
-                dispute_id=dispute_id,
-                title=dispute['title'],
-                description=dispute['description'],
-                creator_evidence=creator_evidence,
-                opponent_evidence=opponent_evidence,
-                stake_amount=dispute['stake_amount'],
-            )
+                raise AIAnalysisFailed(str(e)) from e
             agent_response = result.get('agent_response', '') if isinstance(result, dict) else str(result)
         
         # For AI decisions, just store the analysis - no winner selection
@@ -403,11 +659,104 @@ Format in markdown with clear sections for each side's analysis and final verdic
             'decidedBy': decision_data.get('decidedBy', 'human-validator'),
         }
     
-    await db.update_dispute(dispute_id, {
+    resolved = await db.update_dispute(dispute_id, {
         'status': 'Resolved',
         'resolved_at': datetime.now().isoformat(),
         'decision': decision,
     })
-    
+    if not resolved:
+        # Archived or deleted while the decision was being made
+        await _get_writable_dispute(dispute_id)
+        raise HTTPException(status_code=409, detail="Dispute changed while it was being resolved")
+
+    if settings.PRECEDENT_INDEX_ENABLED and method == 'ai' and dispute['type'] == 'Bet':
+        # Later lookups in this worker see the new precedent without a refresh
+        precedent_index.add({**dispute, 'decision_reason': decision['reason']})
+
     return await get_dispute(dispute_id)
 
+
+def _deadline_passed(dispute: dict) -> bool:
+    due = parse_deadline(dispute.get('deadline'))
+    return due is not None and due <= time.time()
+
+
+async def auto_resolve(dispute_id: str) -> bool:
+    """
+    Background AI resolution job (run by `services.resolution_queue`).
+
+    Claims the dispute by moving it from an open status to In Review with a
+    lease of AUTO_RESOLVE_LEASE_SECONDS, then resolves it with the AI agent.
+    A dispute left In Review by a job that died is claimed again once its
+    lease has run out. If the resolution fails, the dispute stays In Review
+    and its lease is set to expire AUTO_RESOLVE_RETRY_SECONDS later, when the
+    queue's recovery sweep retries it; when the LLM budget is used up it
+    waits AUTO_RESOLVE_BUDGET_RETRY_SECONDS instead. Returns False if it was
+    already claimed, if it is a Promise whose deadline has not passed, or if
+    the budget refused it.
+    """
+    dispute = await db.get_dispute_by_id(dispute_id)
+    if not dispute:
+        return False
+    promise = dispute['type'] == 'Promise'
+    if promise and not _deadline_passed(dispute):
+        return False
+    claimed = await db.update_dispute(
+        dispute_id,
+        {
+            'status': 'In Review',
+            'in_review_at': datetime.now().isoformat(),
+            'lease_expires_at': time.time() + settings.AUTO_RESOLVE_LEASE_SECONDS,
+        },
+        only_if_status=db.DEADLINE_OPEN_STATUSES,
+        only_if_deadline=dispute['deadline'] if promise else None,
+        or_if_lease_expired=True,
+    )
+    if not claimed:
+        return False
+    try:
+        await _resolve_dispute(dispute_id, {'method': 'ai'})
+    except LLMBudgetExceeded as e:
+        logger.warning("Deferring AI resolution of %s: %s", dispute_id, e)
+        await _retry_later(dispute_id, settings.AUTO_RESOLVE_BUDGET_RETRY_SECONDS)
+        return False
+    except Exception:
+        await _retry_later(dispute_id, settings.AUTO_RESOLVE_RETRY_SECONDS)
+        raise
+    return True
+
+
+async def _retry_later(dispute_id: str, delay: float) -> None:
+    """Keep a claimed dispute In Review and let its lease run out after `delay` seconds."""
+    await db.update_dispute(
+        dispute_id,
+        {'lease_expires_at': time.time() + delay},
+        only_if_status=('In Review',),
+    )
+
+
+async def handle_deadline(dispute_id: str) -> bool:
+    """
+    Deadline handler for the scheduler: move an open dispute to review.
+
+    Disputes with an AI validator are queued for resolution instead (or
+    resolved inline if the queue is full). The stored deadline is checked
+    again, since another worker may have moved it without this worker's
+    scheduler hearing of it. Returns whether this call made the transition
+    (another worker may have won).
+    """
+    dispute = await db.get_dispute_by_id(dispute_id)
+    if not dispute or dispute['status'] not in db.DEADLINE_OPEN_STATUSES:
+        return False
+    if not _deadline_passed(dispute):
+        return False
+
+    if dispute['validator_type'] == 'ai':
+        return resolution_queue.submit(dispute_id) or await auto_resolve(dispute_id)
+
+    return await db.update_dispute(
+        dispute_id,
+        {'status': 'In Review', 'in_review_at': datetime.now().isoformat()},
+        only_if_status=db.DEADLINE_OPEN_STATUSES,
+        only_if_deadline=dispute['deadline'],
+    )
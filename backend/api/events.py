@@ -0,0 +1,82 @@
+"""Server-push change feed for disputes (SSE and WebSocket)."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+import orjson
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from config import settings
+from events import Subscription, hub
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {orjson.dumps(event).decode()}\n\n"
+
+
+async def _sse_stream(request: Request, subscription: Subscription) -> AsyncIterator[str]:
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=settings.EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_sse(event)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(request: Request, dispute_id: Optional[str] = None, user_id: Optional[str] = None):
+    """
+    Subscribe to dispute changes over Server-Sent Events.
+
+    Pass `dispute_id` to follow one dispute, or `user_id` to follow every dispute
+    the user is a party or validator in. A `resync` event means events were
+    dropped because the client fell behind and it should refetch.
+    """
+    subscription = hub.subscribe(dispute_id=dispute_id, user_id=user_id)
+    return StreamingResponse(
+        _sse_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, dispute_id: Optional[str] = None, user_id: Optional[str] = None):
+    """Subscribe to dispute changes over a WebSocket (same filters and events as /stream)."""
+    await websocket.accept()
+    subscription = hub.subscribe(dispute_id=dispute_id, user_id=user_id)
+
+    async def wait_for_disconnect() -> None:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    disconnected = asyncio.create_task(wait_for_disconnect())
+    try:
+        while not disconnected.done():
+            next_event = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event not in done:
+                next_event.cancel()
+                break
+            await websocket.send_text(orjson.dumps(next_event.result()).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        hub.unsubscribe(subscription)
@@ -0,0 +1,93 @@
+"""Idempotency-Key support for POST endpoints.
+
+A client that retries a POST sends the same `Idempotency-Key` header. The
+first request with a key claims it in `idempotency_keys` and stores its
+response. Retries get that stored response back (`Idempotent-Replayed: true`)
+and the handler does not run again:
+
+- a retry while the first request is still running gets 409 and `Retry-After`;
+- reusing a key for a different request body gets 422;
+- a request that fails (any exception, including HTTP errors) releases its
+  key, so the retry runs normally.
+
+Keys are scoped per endpoint and dispute and kept for
+`IDEMPOTENCY_KEY_TTL_SECONDS`.
+"""
+import hashlib
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+import database as db
+from config import settings
+from observability.metrics import REGISTRY
+from .responses import TrustedJSONResponse
+
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENT_REQUESTS = REGISTRY.counter(
+    "settleit_idempotent_requests_total",
+    "Requests with an Idempotency-Key by outcome (executed, replayed, in_progress, mismatch).",
+    ("scope", "outcome"),
+)
+
+
+def request_hash(payload: Any) -> str:
+    """SHA-256 of the request body as canonical JSON."""
+    return hashlib.sha256(orjson.dumps(jsonable_encoder(payload), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+async def run_idempotent(
+    scope: str,
+    key: Optional[str],
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Run `handler` once per (scope, key) and replay its response to retries.
+
+    `scope` names the endpoint and, for nested routes, the dispute
+    (`resolve:<id>`); metrics use the part before the colon. Without a key
+    the handler simply runs.
+    """
+    if key is None:
+        return await handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    metric_scope = scope.split(":", 1)[0]
+    digest = request_hash(payload)
+    existing = await db.claim_idempotency_key(scope, key, digest, settings.IDEMPOTENCY_LOCK_SECONDS)
+    if existing is not None:
+        if existing['request_hash'] != digest:
+            IDEMPOTENT_REQUESTS.labels(metric_scope, "mismatch").inc()
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if existing['status'] != 'completed':
+            IDEMPOTENT_REQUESTS.labels(metric_scope, "in_progress").inc()
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        IDEMPOTENT_REQUESTS.labels(metric_scope, "replayed").inc()
+        return Response(
+            content=existing['response'],
+            status_code=existing['status_code'],
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    try:
+        result = await handler()
+    except BaseException:
+        await db.release_idempotency_key(scope, key)
+        raise
+
+    response = result if isinstance(result, Response) else TrustedJSONResponse(jsonable_encoder(result))
+    await db.complete_idempotency_key(
+        scope, key, response.status_code, bytes(response.body), settings.IDEMPOTENCY_KEY_TTL_SECONDS
+    )
+    IDEMPOTENT_REQUESTS.labels(metric_scope, "executed").inc()
+    return response
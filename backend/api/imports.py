@@ -0,0 +1,293 @@
+"""Bulk dispute import for migrations and seeding.
+
+Rows come as NDJSON (one dispute per line) or CSV (a header line, then one
+dispute per record; quoted fields may span lines). Each row is a dispute in
+the `DisputeResponse` shape, so the output of `GET /api/disputes/` can be
+imported as is. `evidence` is a list of evidence items and `decision` an
+object. In CSV those two columns hold JSON and empty cells count as missing.
+
+Rows are validated as they arrive. Valid rows are inserted in transactions of
+`IMPORT_BATCH_SIZE` with `database.import_disputes`. An invalid row, or one
+whose id or evidence id already exists (in the database or earlier in the
+import), is reported with its line number and does not stop the import.
+"""
+import codecs
+import csv
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Deque, Dict, Iterator, List, Literal, Optional, Tuple, Union
+
+import orjson
+from pydantic import BaseModel, Field, ValidationError
+
+import database as db
+from config import settings
+
+FORMATS = ("ndjson", "csv")
+
+# CSV columns that hold JSON
+_JSON_COLUMNS = ("evidence", "decision")
+
+
+class ImportEvidence(BaseModel):
+    id: Optional[str] = None  # generated from the dispute id when missing
+    type: str
+    content: str
+    submitted_by: str
+    timestamp: str
+    description: Optional[str] = None
+
+
+class ImportDecision(BaseModel):
+    winner: Optional[str] = None
+    reason: str
+    decided_at: str
+    decided_by: str
+
+
+class ImportDispute(BaseModel):
+    id: Optional[str] = None  # generated when missing
+    title: str = Field(min_length=1)
+    type: Literal['Promise', 'Bet']
+    description: str = ''
+    creator_id: str = Field(min_length=1)
+    opponent_id: str = Field(min_length=1)
+    creator_position: Optional[str] = None
+    opponent_position: Optional[str] = None
+    validator_id: Optional[str] = None
+    validator_type: Literal['ai', 'human', 'pending'] = 'pending'
+    resolution_method: Optional[Literal['ai', 'human']] = None
+    status: Literal['Draft', 'Awaiting Funding', 'In Review', 'Resolved', 'Cancelled'] = 'Draft'
+    stake_amount: float = Field(ge=0)
+    opponent_stake_amount: float = Field(ge=0)
+    token: str = Field(min_length=1)
+    creator_wallet: Optional[str] = None
+    opponent_wallet: Optional[str] = None
+    escrow_tx_id: Optional[str] = None
+    payout_tx_id: Optional[str] = None
+    neofs_object_id: Optional[str] = None
+    deadline: Optional[str] = None
+    evidence_requirements: Optional[str] = None
+    evidence: List[ImportEvidence] = []
+    decision: Optional[ImportDecision] = None
+    created_at: Optional[str] = None  # defaults to the import time
+    funded_at: Optional[str] = None
+    evidence_submitted_at: Optional[str] = None
+    in_review_at: Optional[str] = None
+    resolved_at: Optional[str] = None
+
+
+def _to_rows(dispute: ImportDispute, imported_at: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Map a validated row to a disputes row and its evidence rows."""
+    row = dispute.model_dump(exclude={'evidence', 'decision'})
+    row['id'] = dispute.id or f"dispute_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
+    row['created_at'] = dispute.created_at or imported_at
+    decision = dispute.decision
+    row['decision_winner'] = decision and decision.winner
+    row['decision_reason'] = decision and decision.reason
+    row['decision_decided_at'] = decision and decision.decided_at
+    row['decision_decided_by'] = decision and decision.decided_by
+    evidence = [
+        {**item.model_dump(), 'id': item.id or f"evid_{row['id']}_{i}", 'dispute_id': row['id']}
+        for i, item in enumerate(dispute.evidence)
+    ]
+    return row, evidence
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e['loc'] else e['msg']
+        for e in error.errors()
+    )
+
+
+class _RowError(ValueError):
+    """A CSV record that could not be read, with its id cell if it has one."""
+
+    def __init__(self, message: str, dispute_id: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.dispute_id = dispute_id
+
+
+# A row: an NDJSON line, a CSV record as a dict, or why the CSV record could not be read
+_Row = Union[str, Dict[str, Any], _RowError]
+
+
+def _raw_id(raw: _Row) -> Optional[str]:
+    """The id a row that failed validation gave, for its error report."""
+    if isinstance(raw, _RowError):
+        return raw.dispute_id
+    if isinstance(raw, str):
+        try:
+            raw = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return None
+    value = raw.get('id') if isinstance(raw, dict) else None
+    return None if value is None else str(value)
+
+
+class _CsvRows:
+    """Turns CSV lines into row dicts keyed by the header line.
+
+    One `csv.reader` reads the whole stream, so a quoted field may span lines.
+    Lines are queued until their quotes balance and then parsed; each record
+    is numbered by the line it starts on, from the reader's `line_num`.
+    """
+
+    def __init__(self) -> None:
+        self.header: Optional[List[str]] = None
+        self._queued: Deque[str] = deque()
+        self._quotes = 0
+        self._reader = csv.reader(self)
+
+    def __iter__(self) -> "_CsvRows":
+        return self
+
+    def __next__(self) -> str:
+        # The reader's line source; running dry only pauses it until more lines are added
+        if not self._queued:
+            raise StopIteration
+        return self._queued.popleft()
+
+    def add(self, line: str) -> Iterator[Tuple[int, _Row]]:
+        """Queue a line and yield (line number, row) for each record it completes."""
+        self._queued.append(line + "\n")
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            return  # inside a quoted field
+        self._quotes = 0
+        while self._queued:
+            line_no = self._reader.line_num + 1
+            row = self._parse(next(self._reader))
+            if row is not None:
+                yield line_no, row
+
+    def finish(self) -> Iterator[Tuple[int, _Row]]:
+        """Yield an error for a quoted field still open at the end of the stream."""
+        if self._queued:
+            yield self._reader.line_num + 1, _RowError("quoted field is not closed")
+            self._queued.clear()
+
+    def _parse(self, values: List[str]) -> Optional[_Row]:
+        if not ''.join(values).strip():
+            return None  # blank line
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return None
+        row = {name: value for name, value in zip(self.header, values) if value != ''}
+        if len(values) != len(self.header):
+            return _RowError(f"expected {len(self.header)} columns, got {len(values)}", row.get('id'))
+        for column in _JSON_COLUMNS:
+            if column in row:
+                try:
+                    row[column] = orjson.loads(row[column])
+                except orjson.JSONDecodeError as e:
+                    return _RowError(f"{column}: invalid JSON ({e})", row.get('id'))
+        return row
+
+
+async def _numbered_rows(lines: AsyncIterable[str], fmt: str) -> AsyncIterator[Tuple[int, _Row]]:
+    """Yield (line number, row) for each non-blank NDJSON line or CSV record."""
+    if fmt == "csv":
+        csv_rows = _CsvRows()
+        async for line in lines:
+            for numbered in csv_rows.add(line):
+                yield numbered
+        for numbered in csv_rows.finish():
+            yield numbered
+        return
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line.strip():
+            yield line_no, line
+
+
+async def run_import(lines: AsyncIterable[str], fmt: str, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Validate and insert disputes from `lines`; returns counts and per-row errors."""
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    imported_at = datetime.now().isoformat()
+    started = time.perf_counter()
+    report: Dict[str, Any] = {"rows": 0, "imported": 0, "evidence": 0, "failed": 0, "errors": []}
+    seen: set = set()
+    seen_evidence: set = set()
+    disputes: List[Dict[str, Any]] = []
+    evidence: List[Dict[str, Any]] = []
+    lines_by_id: Dict[str, int] = {}
+
+    def fail(line_no: int, dispute_id: Optional[str], error: str) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < settings.IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_no, "id": dispute_id, "error": error})
+
+    async def flush() -> None:
+        skipped = await db.import_disputes(disputes, evidence)
+        for dispute_id, reason in skipped.items():
+            fail(lines_by_id[dispute_id], dispute_id, reason)
+        report["imported"] += len(disputes) - len(skipped)
+        report["evidence"] += sum(1 for item in evidence if item['dispute_id'] not in skipped)
+        disputes.clear()
+        evidence.clear()
+        lines_by_id.clear()
+
+    async for line_no, raw in _numbered_rows(lines, fmt):
+        try:
+            if isinstance(raw, _RowError):
+                raise raw
+            if isinstance(raw, dict):
+                dispute = ImportDispute.model_validate(raw)
+            else:
+                dispute = ImportDispute.model_validate_json(raw)
+        except ValidationError as e:
+            report["rows"] += 1
+            fail(line_no, _raw_id(raw), _describe(e))
+            continue
+        except ValueError as e:
+            report["rows"] += 1
+            fail(line_no, _raw_id(raw), str(e))
+            continue
+
+        report["rows"] += 1
+        row, items = _to_rows(dispute, imported_at)
+        if row['id'] in seen:
+            fail(line_no, row['id'], "duplicate id in this import")
+            continue
+        evidence_ids = [item['id'] for item in items]
+        duplicate = next(
+            (evidence_id for i, evidence_id in enumerate(evidence_ids)
+             if evidence_id in seen_evidence or evidence_id in evidence_ids[:i]),
+            None,
+        )
+        if duplicate is not None:
+            # The batch insert would fail as a whole on it
+            fail(line_no, row['id'], f"duplicate evidence id {duplicate} in this import")
+            continue
+        seen.add(row['id'])
+        seen_evidence.update(evidence_ids)
+        lines_by_id[row['id']] = line_no
+        disputes.append(row)
+        evidence.extend(items)
+        if len(disputes) >= batch_size:
+            await flush()
+
+    if disputes:
+        await flush()
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+
+async def decode_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a UTF-8 byte stream (e.g. a request body) into lines."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
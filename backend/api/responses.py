@@ -0,0 +1,17 @@
+"""Response classes shared by the API routers."""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class TrustedJSONResponse(JSONResponse):
+    """orjson-encoded JSON response for data already in response-model shape.
+
+    Returning an instance from a route skips FastAPI's response_model
+    validation and re-serialization, so only use it for data built from our
+    own database rows.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
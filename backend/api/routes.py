@@ -9,7 +9,7 @@ from typing import Any
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from agents import get_dispute_agent, analyze_dispute as run_dispute_analysis
+from agents import LLMBudgetExceeded, get_dispute_agent, analyze_dispute as run_dispute_analysis
 
 router = APIRouter(prefix="/api/spoon", tags=["SpoonOS"])
 
@@ -105,9 +105,11 @@ async def analyze_dispute(request: AnalyzeDisputeRequest) -> AnalysisResponse:
         if isinstance(result, str):
             agent_response = result
             status = "completed"
+            verdict, confidence = None, 0.0
         else:
             agent_response = result.get("agent_response", "")
             status = result.get("status", "completed")
+            verdict, confidence = result.get("verdict"), result.get("confidence", 0.0)
 
         # Convert response to string if it's not already
         if not isinstance(agent_response, str):
@@ -116,8 +118,8 @@ async def analyze_dispute(request: AnalyzeDisputeRequest) -> AnalysisResponse:
         # Return full agent response without truncation
         return AnalysisResponse(
             dispute_id=request.dispute_id,
-            recommendation=None,  # Could parse from agent response
-            confidence=0.0,
+            recommendation=verdict,
+            confidence=confidence,
             reasoning=agent_response,  # Full response, no truncation
             evidence_scores={
                 "creator": 0.0,
@@ -126,6 +128,8 @@ async def analyze_dispute(request: AnalyzeDisputeRequest) -> AnalysisResponse:
             status=status,
         )
 
+    except LLMBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
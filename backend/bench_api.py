@@ -0,0 +1,63 @@
+"""
+Simple HTTP load generator for benchmarking the backend.
+Run with: python bench_api.py --path /api/disputes/ --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+async def _worker(session: aiohttp.ClientSession, url: str, headers: dict, deadline: float, latencies: list, sizes: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        async with session.get(url, headers=headers) as response:
+            body = await response.read()
+            response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(body))
+
+
+async def run(base_url: str, path: str, concurrency: int, duration: float, headers: dict) -> dict:
+    """Hammer one endpoint for `duration` seconds and return throughput/latency stats."""
+    latencies: list = []
+    sizes: list = []
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, auto_decompress=False) as session:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            _worker(session, base_url + path, headers, deadline, latencies, sizes)
+            for _ in range(concurrency)
+        ))
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "avg_bytes": statistics.mean(sizes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--header", action="append", default=[], help="'Name: value', repeatable")
+    args = parser.parse_args()
+
+    headers = dict(h.split(": ", 1) for h in args.header)
+    stats = asyncio.run(run(args.url, args.path, args.concurrency, args.duration, headers))
+    print(
+        f"{args.path}: {stats['requests']} requests, {stats['rps']:.0f} req/s, "
+        f"p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, "
+        f"{stats['avg_bytes']:.0f} bytes/response"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Neo N3 blockchain access for the SettleIt backend."""
+from .rpc import NeoRpcClient, RpcError, close_neo_client, get_neo_client, normalize_hash
+
+__all__ = ["NeoRpcClient", "RpcError", "close_neo_client", "get_neo_client", "normalize_hash"]
@@ -0,0 +1,332 @@
+"""Local stand-ins for a Neo N3 RPC node and a NeoFS gateway, for tests and benchmarks.
+
+`MockNeoNode` keeps a tiny in-memory chain and answers the JSON-RPC methods
+the backend uses (single and batch requests) on 127.0.0.1. Each HTTP request
+is counted in `round_trips`, each call in `calls`. `MockNeoFSGateway` stores
+uploaded objects in memory and can be told to fail.
+
+    async with MockNeoNode() as node:
+        txid = node.add_transaction(notifications=[...])
+        node.produce_block()
+        client = NeoRpcClient(node.url)
+"""
+import asyncio
+import base64
+import hashlib
+import itertools
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import orjson
+from aiohttp import web
+
+from .tx import CONTRACT_CALL, Transaction, verify_signature
+
+# Fee model of the mock node, in GAS datoshi
+GAS_PER_CONTRACT_CALL = 1_000_000
+FEE_PER_BYTE = 1_000
+VERIFICATION_FEE = 1_000_000
+
+
+def _hash(*parts: Any) -> str:
+    return "0x" + hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def string_item(value: str) -> Dict[str, str]:
+    """A NeoVM ByteString stack item as it appears in notifications."""
+    return {"type": "ByteString", "value": base64.b64encode(value.encode()).decode()}
+
+
+def integer_item(value: int) -> Dict[str, str]:
+    return {"type": "Integer", "value": str(value)}
+
+
+class MockNeoNode:
+    """In-memory chain served over JSON-RPC."""
+
+    def __init__(self, delay: float = 0.0, network_magic: int = 894710606) -> None:
+        self.delay = delay
+        self.network_magic = network_magic
+        # Scripts containing any of these byte strings FAULT
+        self.fault_on: List[bytes] = []
+        self.blocks: List[Dict[str, Any]] = []
+        self.block_index: Dict[str, int] = {}
+        self.mempool: Dict[str, Dict[str, Any]] = {}
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        self.application_logs: Dict[str, Dict[str, Any]] = {}
+        self.round_trips = 0
+        self.calls: Counter = Counter()
+        self.sent: List[str] = []
+        self._nonce = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+        self.produce_block()  # genesis
+
+    # Chain manipulation
+
+    def add_transaction(
+        self,
+        notifications: Optional[List[Dict[str, Any]]] = None,
+        vmstate: str = "HALT",
+        sender: str = "NZNovMockSenderAddressxxxxxxxxxxxx",
+        txid: Optional[str] = None,
+    ) -> str:
+        """Put a transaction in the mempool; it is confirmed by the next block."""
+        txid = txid or _hash("tx", next(self._nonce))
+        self.mempool[txid] = {
+            "tx": {
+                "hash": txid,
+                "size": 250,
+                "version": 0,
+                "nonce": next(self._nonce),
+                "sender": sender,
+                "sysfee": "997775",
+                "netfee": "1234520",
+                "validuntilblock": len(self.blocks) + 5760,
+                "signers": [{"account": "0x" + "0" * 40, "scopes": "CalledByEntry"}],
+                "attributes": [],
+                "script": "",
+                "witnesses": [],
+            },
+            "log": {
+                "txid": txid,
+                "executions": [{
+                    "trigger": "Application",
+                    "vmstate": vmstate,
+                    "exception": None if vmstate == "HALT" else "ABORT",
+                    "gasconsumed": "997775",
+                    "stack": [],
+                    "notifications": notifications or [],
+                }],
+            },
+        }
+        return txid
+
+    def produce_block(self) -> Dict[str, Any]:
+        """Seal the mempool into a new block."""
+        index = len(self.blocks)
+        block_hash = _hash("block", index)
+        block_time = int(time.time() * 1000)
+        transactions = []
+        for txid, entry in self.mempool.items():
+            transactions.append(entry["tx"])
+            self.transactions[txid] = {
+                **entry["tx"],
+                "blockhash": block_hash,
+                "blocktime": block_time,
+                "vmstate": entry["log"]["executions"][0]["vmstate"],
+            }
+            self.application_logs[txid] = entry["log"]
+        self.mempool.clear()
+        block = {
+            "hash": block_hash,
+            "size": 700,
+            "version": 0,
+            "previousblockhash": self.blocks[-1]["hash"] if self.blocks else "0x" + "0" * 64,
+            "merkleroot": _hash("merkle", index),
+            "time": block_time,
+            "nonce": "0",
+            "index": index,
+            "primary": 0,
+            "nextconsensus": "NMockConsensusAddressxxxxxxxxxxxxx",
+            "witnesses": [],
+            "tx": transactions,
+        }
+        self.blocks.append(block)
+        self.block_index[block_hash] = index
+        return block
+
+    # JSON-RPC
+
+    def _dispatch(self, method: str, params: List[Any]) -> Any:
+        self.calls[method] += 1
+        height = len(self.blocks)
+        if method == "getblockcount":
+            return height
+        if method == "getversion":
+            return {"useragent": "/MockNeo:3.6.0/", "protocol": {"network": 0, "msperblock": 15000}}
+        if method == "getblock":
+            key = params[0]
+            block = None
+            if isinstance(key, int):
+                block = self.blocks[key] if 0 <= key < height else None
+            else:
+                block = self.blocks[self.block_index[key]] if key in self.block_index else None
+            if block is None:
+                raise _Unknown(-101, "Unknown block")
+            return {**block, "confirmations": height - block["index"]}
+        if method == "getrawtransaction":
+            txid = params[0]
+            if txid in self.transactions:
+                tx = self.transactions[txid]
+                return {**tx, "confirmations": height - self.block_index[tx["blockhash"]]}
+            if txid in self.mempool:
+                return dict(self.mempool[txid]["tx"])
+            raise _Unknown(-100, "Unknown transaction")
+        if method == "getapplicationlog":
+            if params[0] in self.application_logs:
+                return self.application_logs[params[0]]
+            raise _Unknown(-100, "Unknown transaction")
+        if method == "invokescript":
+            script = base64.b64decode(params[0])
+            calls = script.count(CONTRACT_CALL)
+            state = "FAULT" if any(marker in script for marker in self.fault_on) else "HALT"
+            return {
+                "script": params[0],
+                "state": state,
+                "gasconsumed": str(calls * GAS_PER_CONTRACT_CALL),
+                "exception": None if state == "HALT" else "mock fault",
+                "stack": [],
+            }
+        if method == "calculatenetworkfee":
+            raw = base64.b64decode(params[0])
+            tx = Transaction.from_bytes(raw)
+            # Witnesses may be unsigned here; count the signature the node will see
+            size = len(raw) + 66 * sum(1 for invocation, _ in tx.witnesses if not invocation)
+            return {"networkfee": str(size * FEE_PER_BYTE + VERIFICATION_FEE * len(tx.signers))}
+        if method == "sendrawtransaction":
+            return self._send(params[0])
+        raise _Unknown(-32601, "Method not found")
+
+    def _send(self, raw_b64: str) -> Dict[str, str]:
+        raw = base64.b64decode(raw_b64)
+        tx = Transaction.from_bytes(raw)
+        if tx.hash in self.transactions or tx.hash in self.mempool:
+            raise _Unknown(-501, "Already exists")
+        if tx.valid_until_block < len(self.blocks):
+            raise _Unknown(-506, "Expired transaction")
+        for invocation, verification in tx.witnesses:
+            if not verify_signature(verification[2:35], tx.sign_data(self.network_magic), invocation[2:]):
+                raise _Unknown(-504, "Invalid signature")
+        if tx.system_fee < tx.script.count(CONTRACT_CALL) * GAS_PER_CONTRACT_CALL:
+            raise _Unknown(-500, "Insufficient system fee")
+        if tx.network_fee < len(raw) * FEE_PER_BYTE + VERIFICATION_FEE * len(tx.signers):
+            raise _Unknown(-500, "Insufficient network fee")
+        self.sent.append(raw_b64)
+        vmstate = "FAULT" if any(marker in tx.script for marker in self.fault_on) else "HALT"
+        self.add_transaction(vmstate=vmstate, txid=tx.hash)
+        return {"hash": tx.hash}
+
+    def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = self._dispatch(request.get("method"), request.get("params") or [])
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        except _Unknown as exc:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": exc.code, "message": exc.message}}
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.round_trips += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        payload = orjson.loads(await request.read())
+        if isinstance(payload, list):
+            body = [self._answer(item) for item in payload]
+        else:
+            body = self._answer(payload)
+        return web.Response(body=orjson.dumps(body), content_type="application/json")
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockNeoNode":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+class _Unknown(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class MockNeoFSGateway:
+    """In-memory NeoFS HTTP gateway (`/upload/{cid}`, `/get/{cid}/{oid}`).
+
+    The next `fail_next` uploads answer 503; `max_in_flight` records the
+    highest number of concurrent uploads seen.
+    """
+
+    def __init__(self, delay: float = 0.0, fail_next: int = 0) -> None:
+        self.delay = delay
+        self.fail_next = fail_next
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.attempts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def _upload(self, request: web.Request) -> web.Response:
+        self.attempts += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return web.Response(status=503, text="gateway unavailable")
+            form = await request.post()
+            upload = form["file"]
+            payload = upload.file.read()
+            object_id = hashlib.sha256(payload).hexdigest()[:43]
+            self.objects[object_id] = {
+                "container_id": request.match_info["cid"],
+                "payload": payload,
+                "filename": upload.filename,
+                "attributes": {
+                    name[len("X-Attribute-"):]: value
+                    for name, value in request.headers.items()
+                    if name.lower().startswith("x-attribute-")
+                },
+            }
+            return web.json_response({"object_id": object_id, "container_id": request.match_info["cid"]})
+        finally:
+            self.in_flight -= 1
+
+    async def _get(self, request: web.Request) -> web.Response:
+        obj = self.objects.get(request.match_info["oid"])
+        if obj is None:
+            return web.Response(status=404)
+        return web.Response(body=obj["payload"], content_type="application/json")
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/upload/{cid}", self._upload)
+        app.router.add_get("/get/{cid}/{oid}", self._get)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockNeoFSGateway":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
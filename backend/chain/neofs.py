@@ -0,0 +1,91 @@
+"""NeoFS HTTP gateway client.
+
+Objects are uploaded with `POST /upload/{container_id}` (multipart, one file
+field); object attributes are sent as `X-Attribute-<Name>` headers and the
+gateway answers with the new object id. Requests share one keep-alive pool,
+and at most `concurrency` uploads are in flight at a time.
+"""
+import asyncio
+from typing import Dict, Optional
+
+import aiohttp
+
+from config import settings
+
+
+class NeoFSError(Exception):
+    """An upload the gateway rejected or that could not reach it."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        """Network errors, 429 and 5xx are worth retrying; other 4xx are not."""
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+class NeoFSGateway:
+    """Pooled uploader for a NeoFS HTTP gateway."""
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        container_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.url = (url or settings.NEOFS_GATEWAY_URL).rstrip("/")
+        self.container_id = container_id or settings.NEOFS_CONTAINER_ID
+        self.concurrency = concurrency or settings.PROOF_UPLOAD_CONCURRENCY
+        self.timeout = timeout or settings.PROOF_UPLOAD_TIMEOUT
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "NeoFSGateway":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def upload(
+        self,
+        payload: bytes,
+        filename: str,
+        attributes: Optional[Dict[str, str]] = None,
+        content_type: str = "application/json",
+    ) -> str:
+        """Store `payload` as an object in the container and return its object id."""
+        form = aiohttp.FormData()
+        form.add_field("file", payload, filename=filename, content_type=content_type)
+        headers = {f"X-Attribute-{name}": value for name, value in (attributes or {}).items()}
+
+        async with self._semaphore:
+            try:
+                async with self._get_session().post(
+                    f"{self.url}/upload/{self.container_id}", data=form, headers=headers
+                ) as response:
+                    if response.status >= 400:
+                        raise NeoFSError(f"Gateway returned {response.status}: {await response.text()}", response.status)
+                    body = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                raise NeoFSError(f"Gateway request failed: {exc!r}") from exc
+
+        object_id = body.get("object_id")
+        if not object_id:
+            raise NeoFSError(f"Gateway response has no object_id: {body}", response.status)
+        return object_id
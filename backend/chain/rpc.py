@@ -0,0 +1,332 @@
+"""Neo N3 JSON-RPC client.
+
+All calls go through one aiohttp session with a bounded keep-alive connection
+pool. `batch()` packs many calls into JSON-RPC batch requests, so checking
+hundreds of transactions costs a handful of HTTP round-trips.
+
+Two caches sit in front of the node:
+
+- the block height (`getblockcount`) is kept for `NEO_RPC_HEIGHT_TTL` seconds
+  and concurrent callers share one in-flight request;
+- confirmed transactions, application logs and blocks never change (Neo N3
+  has single-block finality), so they are kept in an LRU of
+  `NEO_RPC_CACHE_SIZE` entries with no expiry. Unconfirmed or unknown
+  transactions are never cached.
+"""
+import asyncio
+import base64
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+import orjson
+
+from config import settings
+from observability.metrics import REGISTRY
+
+NEO_RPC_ROUND_TRIPS = REGISTRY.histogram(
+    "settleit_neo_rpc_round_trip_seconds",
+    "Latency of HTTP round-trips to the Neo RPC node, by outcome.",
+    ("outcome",),
+)
+NEO_RPC_CALLS = REGISTRY.counter(
+    "settleit_neo_rpc_calls_total",
+    "JSON-RPC calls sent to the Neo node (a batch counts each call).",
+    ("method",),
+)
+NEO_RPC_CACHE = REGISTRY.counter(
+    "settleit_neo_rpc_cache_total",
+    "Neo RPC cache lookups by cache and result (hit, miss).",
+    ("cache", "result"),
+)
+
+# Error codes the node returns for transactions/blocks it does not know
+UNKNOWN_CODES = frozenset({-100, -101, -102, -103, -104, -105, -106})
+
+Call = Tuple[str, Sequence[Any]]
+
+
+class RpcError(Exception):
+    """A JSON-RPC error object returned by the node."""
+
+    def __init__(self, code: int, message: str, data: Any = None) -> None:
+        super().__init__(f"{message} (code {code})")
+        self.code = code
+        self.message = message
+        self.data = data
+
+    @property
+    def unknown(self) -> bool:
+        """True if the node simply does not have the requested item."""
+        return self.code in UNKNOWN_CODES
+
+
+class _LruCache:
+    """Small LRU map for immutable chain data."""
+
+    def __init__(self, name: str, max_size: int) -> None:
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._max_size = max_size
+        self._hit = NEO_RPC_CACHE.labels(name, "hit")
+        self._miss = NEO_RPC_CACHE.labels(name, "miss")
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any) -> Any:
+        value = self._data.get(key)
+        if value is None:
+            self._miss.inc()
+            return None
+        self._data.move_to_end(key)
+        self._hit.inc()
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+
+class NeoRpcClient:
+    """Pooled, batching JSON-RPC client for a Neo N3 node."""
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        height_ttl: Optional[float] = None,
+        cache_size: Optional[int] = None,
+    ) -> None:
+        self.url = url or settings.NEO_RPC_URL
+        self.pool_size = pool_size or settings.NEO_RPC_POOL_SIZE
+        self.batch_size = batch_size or settings.NEO_RPC_BATCH_SIZE
+        self.timeout = timeout or settings.NEO_RPC_TIMEOUT
+        self.height_ttl = settings.NEO_RPC_HEIGHT_TTL if height_ttl is None else height_ttl
+        cache_size = cache_size or settings.NEO_RPC_CACHE_SIZE
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ids = itertools.count(1)
+        self._height: Optional[int] = None
+        self._height_at = 0.0
+        self._height_request: Optional[asyncio.Future] = None
+        self._transactions = _LruCache("transaction", cache_size)
+        self._application_logs = _LruCache("application_log", cache_size)
+        self._blocks = _LruCache("block", cache_size)
+
+    async def __aenter__(self) -> "NeoRpcClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json"},
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post(self, payload: Any) -> Any:
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            async with self._get_session().post(self.url, data=orjson.dumps(payload)) as response:
+                response.raise_for_status()
+                body = orjson.loads(await response.read())
+            outcome = "ok"
+            return body
+        finally:
+            NEO_RPC_ROUND_TRIPS.labels(outcome).observe(time.perf_counter() - start)
+
+    async def call(self, method: str, *params: Any) -> Any:
+        """Send a single call and return its result (raises RpcError)."""
+        NEO_RPC_CALLS.labels(method).inc()
+        reply = await self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        if reply.get("error"):
+            error = reply["error"]
+            raise RpcError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return reply.get("result")
+
+    async def batch(self, calls: Iterable[Call]) -> List[Any]:
+        """Send calls as JSON-RPC batches; returns results in order.
+
+        A call that failed on the node is returned as its `RpcError` instead
+        of raising, so one unknown transaction does not fail the whole batch.
+        Chunks of `batch_size` calls are sent concurrently over the pool.
+        """
+        requests = []
+        for method, params in calls:
+            NEO_RPC_CALLS.labels(method).inc()
+            requests.append({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        if not requests:
+            return []
+
+        chunks = [requests[i:i + self.batch_size] for i in range(0, len(requests), self.batch_size)]
+        replies = await asyncio.gather(*(self._post(chunk) for chunk in chunks))
+
+        by_id: Dict[int, Any] = {}
+        for reply in replies:
+            # A node that rejects the whole batch answers with a single error object
+            for item in reply if isinstance(reply, list) else [reply]:
+                by_id[item.get("id")] = item
+
+        results = []
+        for request in requests:
+            item = by_id.get(request["id"])
+            if item is None:
+                results.append(RpcError(-32603, "Missing response in batch"))
+            elif item.get("error"):
+                error = item["error"]
+                results.append(RpcError(error.get("code", 0), error.get("message", ""), error.get("data")))
+            else:
+                results.append(item.get("result"))
+        return results
+
+    async def get_block_count(self) -> int:
+        """Current block count (height + 1), cached for `height_ttl` seconds."""
+        if self._height is not None and time.monotonic() - self._height_at < self.height_ttl:
+            NEO_RPC_CACHE.labels("block_count", "hit").inc()
+            return self._height
+        if self._height_request is not None:
+            NEO_RPC_CACHE.labels("block_count", "hit").inc()
+            return await asyncio.shield(self._height_request)
+
+        NEO_RPC_CACHE.labels("block_count", "miss").inc()
+        self._height_request = asyncio.ensure_future(self.call("getblockcount"))
+        try:
+            self._height = await asyncio.shield(self._height_request)
+            self._height_at = time.monotonic()
+            return self._height
+        finally:
+            self._height_request = None
+
+    async def get_blocks(self, indexes: Iterable[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Verbose blocks by index; None for blocks not produced yet."""
+        return await self._fetch_immutable(
+            self._blocks, "getblock", list(indexes), lambda index: (index, True), lambda block: True
+        )
+
+    async def get_transactions(self, txids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Verbose transactions by hash; None for unknown ones.
+
+        Mempool transactions (no `blockhash` yet) are returned but not cached.
+        """
+        return await self._fetch_immutable(
+            self._transactions, "getrawtransaction", list(txids), lambda txid: (txid, True),
+            lambda tx: bool(tx.get("blockhash")),
+        )
+
+    async def get_application_logs(self, txids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Application logs by transaction hash; None until the transaction is in a block."""
+        return await self._fetch_immutable(
+            self._application_logs, "getapplicationlog", list(txids), lambda txid: (txid,), lambda log: True
+        )
+
+    async def _fetch_immutable(self, cache: _LruCache, method, keys, params, cacheable) -> Dict[Any, Any]:
+        found: Dict[Any, Any] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = cache.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        results = await self.batch((method, params(key)) for key in missing)
+        for key, result in zip(missing, results):
+            if isinstance(result, RpcError):
+                if not result.unknown:
+                    raise result
+                result = None
+            elif result is not None and cacheable(result):
+                cache.put(key, result)
+            found[key] = result
+        return found
+
+    async def invoke_script(self, script: bytes, signers: Sequence[Dict[str, str]] = ()) -> Dict[str, Any]:
+        """Test-run a script; the result has `state` and `gasconsumed`."""
+        return await self.call("invokescript", base64.b64encode(script).decode(), list(signers))
+
+    async def calculate_network_fee(self, raw_tx: bytes) -> int:
+        result = await self.call("calculatenetworkfee", base64.b64encode(raw_tx).decode())
+        return int(result["networkfee"])
+
+    async def send_raw_transaction(self, raw_tx: bytes) -> None:
+        """Relay a signed transaction; resending one the node already has is not an error."""
+        try:
+            await self.call("sendrawtransaction", base64.b64encode(raw_tx).decode())
+        except RpcError as exc:
+            if "exist" not in exc.message.lower():
+                raise
+
+    async def verify_escrows(self, txids: Iterable[str], contract_hash: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Check escrow transactions in bulk.
+
+        For each hash returns `confirmed` (in a block, VM state HALT and, when a
+        contract hash is given, at least one notification from it), plus the
+        block hash/time and the contract's notifications.
+        """
+        txids = list(dict.fromkeys(txids))
+        contract = normalize_hash(contract_hash or settings.NEO_ESCROW_CONTRACT_HASH)
+        transactions, logs = await asyncio.gather(
+            self.get_transactions(txids), self.get_application_logs(txids)
+        )
+        statuses = {}
+        for txid in txids:
+            tx = transactions.get(txid)
+            log = logs.get(txid)
+            notifications = [
+                notification
+                for execution in (log or {}).get("executions", [])
+                for notification in execution.get("notifications", [])
+                if not contract or normalize_hash(notification.get("contract")) == contract
+            ]
+            halted = bool(log) and all(e.get("vmstate") == "HALT" for e in log.get("executions", []))
+            statuses[txid] = {
+                "found": tx is not None,
+                "confirmed": bool(tx and tx.get("blockhash")) and halted and (not contract or bool(notifications)),
+                "blockhash": tx.get("blockhash") if tx else None,
+                "blocktime": tx.get("blocktime") if tx else None,
+                "notifications": notifications,
+            }
+        return statuses
+
+
+def normalize_hash(value: Optional[str]) -> str:
+    """Lower-case a script/transaction hash and strip its 0x prefix."""
+    if not value:
+        return ""
+    value = value.lower()
+    return value[2:] if value.startswith("0x") else value
+
+
+_client: Optional[NeoRpcClient] = None
+
+
+def get_neo_client() -> NeoRpcClient:
+    """Get or create the shared client for `NEO_RPC_URL`."""
+    global _client
+    if _client is None:
+        _client = NeoRpcClient()
+    return _client
+
+
+async def close_neo_client() -> None:
+    """Close the shared client's connection pool (on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
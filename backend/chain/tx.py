@@ -0,0 +1,275 @@
+"""Minimal Neo N3 transaction building and signing.
+
+Enough of the N3 wire format to build a contract-invocation transaction for a
+single-signature account, sign it with a WIF key and serialize it for
+`sendrawtransaction`: base58check WIF decoding, a script builder for
+`System.Contract.Call`, transaction (de)serialization and secp256r1 witnesses.
+The `cryptography` package is only imported when a key is loaded.
+"""
+import base64
+import hashlib
+import struct
+from dataclasses import dataclass, field
+from typing import Any, List, Sequence, Tuple
+
+# NeoVM opcodes used below
+PUSHINT8, PUSHINT16, PUSHINT32, PUSHINT64, PUSHINT128, PUSHINT256 = 0x00, 0x01, 0x02, 0x03, 0x04, 0x05
+PUSHT, PUSHF = 0x08, 0x09
+PUSHDATA1, PUSHDATA2, PUSHDATA4 = 0x0C, 0x0D, 0x0E
+PUSHM1, PUSH0 = 0x0F, 0x10
+NEWARRAY0 = 0xC2
+PACK = 0xC0
+SYSCALL = 0x41
+
+CALL_FLAGS_ALL = 0x0F
+WITNESS_SCOPE_CALLED_BY_ENTRY = 0x01
+
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def interop_hash(name: str) -> bytes:
+    """The 4-byte SYSCALL id of an interop service."""
+    return hashlib.sha256(name.encode()).digest()[:4]
+
+
+CONTRACT_CALL = interop_hash("System.Contract.Call")
+CHECK_SIG = interop_hash("System.Crypto.CheckSig")
+
+
+def hash160(data: bytes) -> bytes:
+    return hashlib.new("ripemd160", hashlib.sha256(data).digest()).digest()
+
+
+def uint160_from_string(value: str) -> bytes:
+    """Script hash as shown by Neo tools (0x..., big-endian) -> serialized bytes."""
+    value = value[2:] if value.lower().startswith("0x") else value
+    raw = bytes.fromhex(value)
+    if len(raw) != 20:
+        raise ValueError(f"Not a script hash: {value!r}")
+    return raw[::-1]
+
+
+def uint_to_string(raw: bytes) -> str:
+    """Serialized UInt160/UInt256 -> 0x-prefixed big-endian hex."""
+    return "0x" + raw[::-1].hex()
+
+
+def base58check_decode(value: str) -> bytes:
+    number = 0
+    for char in value:
+        number = number * 58 + _BASE58_ALPHABET.index(char)
+    raw = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    raw = b"\x00" * (len(value) - len(value.lstrip("1"))) + raw
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        raise ValueError("Invalid base58 checksum")
+    return payload
+
+
+def write_var_int(value: int) -> bytes:
+    if value < 0xFD:
+        return bytes([value])
+    if value <= 0xFFFF:
+        return b"\xfd" + struct.pack("<H", value)
+    if value <= 0xFFFFFFFF:
+        return b"\xfe" + struct.pack("<I", value)
+    return b"\xff" + struct.pack("<Q", value)
+
+
+def write_var_bytes(data: bytes) -> bytes:
+    return write_var_int(len(data)) + data
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+
+    def read(self, count: int) -> bytes:
+        chunk = self.data[self.pos:self.pos + count]
+        if len(chunk) != count:
+            raise ValueError("Unexpected end of transaction")
+        self.pos += count
+        return chunk
+
+    def read_var_int(self) -> int:
+        prefix = self.read(1)[0]
+        if prefix == 0xFD:
+            return struct.unpack("<H", self.read(2))[0]
+        if prefix == 0xFE:
+            return struct.unpack("<I", self.read(4))[0]
+        if prefix == 0xFF:
+            return struct.unpack("<Q", self.read(8))[0]
+        return prefix
+
+    def read_var_bytes(self) -> bytes:
+        return self.read(self.read_var_int())
+
+
+class ScriptBuilder:
+    """Emits NeoVM scripts for contract calls."""
+
+    def __init__(self) -> None:
+        self._script = bytearray()
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._script)
+
+    def __len__(self) -> int:
+        return len(self._script)
+
+    def emit_push(self, value: Any) -> "ScriptBuilder":
+        if isinstance(value, bool):
+            self._script.append(PUSHT if value else PUSHF)
+        elif isinstance(value, int):
+            self._emit_int(value)
+        elif isinstance(value, str):
+            self._emit_data(value.encode())
+        elif isinstance(value, (bytes, bytearray)):
+            self._emit_data(bytes(value))
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                self._script.append(NEWARRAY0)
+            else:
+                for item in reversed(value):
+                    self.emit_push(item)
+                self._emit_int(len(value))
+                self._script.append(PACK)
+        else:
+            raise TypeError(f"Cannot push {type(value).__name__}")
+        return self
+
+    def _emit_int(self, value: int) -> None:
+        if -1 <= value <= 16:
+            self._script.append(PUSH0 + value if value >= 0 else PUSHM1)
+            return
+        for opcode, size in ((PUSHINT8, 1), (PUSHINT16, 2), (PUSHINT32, 4), (PUSHINT64, 8),
+                             (PUSHINT128, 16), (PUSHINT256, 32)):
+            if -(1 << (size * 8 - 1)) <= value < (1 << (size * 8 - 1)):
+                self._script.append(opcode)
+                self._script += value.to_bytes(size, "little", signed=True)
+                return
+        raise ValueError("Integer too large for NeoVM")
+
+    def _emit_data(self, data: bytes) -> None:
+        if len(data) < 0x100:
+            self._script += bytes([PUSHDATA1, len(data)])
+        elif len(data) < 0x10000:
+            self._script.append(PUSHDATA2)
+            self._script += struct.pack("<H", len(data))
+        else:
+            self._script.append(PUSHDATA4)
+            self._script += struct.pack("<I", len(data))
+        self._script += data
+
+    def emit_contract_call(self, contract_hash: str, method: str, args: Sequence[Any] = ()) -> "ScriptBuilder":
+        """Append `contract.method(*args)` via System.Contract.Call."""
+        self.emit_push(list(args))
+        self._emit_int(CALL_FLAGS_ALL)
+        self._emit_data(method.encode())
+        self._emit_data(uint160_from_string(contract_hash))
+        self._script.append(SYSCALL)
+        self._script += CONTRACT_CALL
+        return self
+
+
+class Account:
+    """A single-signature account loaded from a WIF private key."""
+
+    def __init__(self, wif: str) -> None:
+        from cryptography.hazmat.primitives.asymmetric import ec
+
+        payload = base58check_decode(wif)
+        if len(payload) != 34 or payload[0] != 0x80 or payload[33] != 0x01:
+            raise ValueError("Not a compressed-key WIF")
+        self._key = ec.derive_private_key(int.from_bytes(payload[1:33], "big"), ec.SECP256R1())
+        numbers = self._key.public_key().public_numbers()
+        self.public_key = bytes([0x02 + (numbers.y & 1)]) + numbers.x.to_bytes(32, "big")
+        self.verification_script = bytes([PUSHDATA1, 33]) + self.public_key + bytes([SYSCALL]) + CHECK_SIG
+        self.script_hash = hash160(self.verification_script)
+
+    @property
+    def script_hash_string(self) -> str:
+        return uint_to_string(self.script_hash)
+
+    def sign(self, data: bytes) -> bytes:
+        """ECDSA/SHA-256 signature over `data` as 64 bytes (r || s)."""
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+
+        r, s = decode_dss_signature(self._key.sign(data, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+
+def verify_signature(public_key: bytes, data: bytes, signature: bytes) -> bool:
+    """Check an (r || s) secp256r1 signature; used by the mock node."""
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+    key = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), public_key)
+    der = encode_dss_signature(int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big"))
+    try:
+        key.verify(der, data, ec.ECDSA(hashes.SHA256()))
+        return True
+    except InvalidSignature:
+        return False
+
+
+@dataclass
+class Transaction:
+    script: bytes
+    signers: List[Tuple[bytes, int]]
+    nonce: int
+    valid_until_block: int
+    system_fee: int = 0
+    network_fee: int = 0
+    version: int = 0
+    witnesses: List[Tuple[bytes, bytes]] = field(default_factory=list)
+
+    def unsigned_bytes(self) -> bytes:
+        data = struct.pack("<BIqqI", self.version, self.nonce, self.system_fee, self.network_fee, self.valid_until_block)
+        data += write_var_int(len(self.signers))
+        for account, scopes in self.signers:
+            data += account + bytes([scopes])
+        data += write_var_int(0)  # attributes
+        data += write_var_bytes(self.script)
+        return data
+
+    def to_bytes(self) -> bytes:
+        data = self.unsigned_bytes() + write_var_int(len(self.witnesses))
+        for invocation, verification in self.witnesses:
+            data += write_var_bytes(invocation) + write_var_bytes(verification)
+        return data
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode()
+
+    @property
+    def hash(self) -> str:
+        """Transaction id, 0x-prefixed."""
+        return uint_to_string(hashlib.sha256(self.unsigned_bytes()).digest())
+
+    def sign_data(self, network_magic: int) -> bytes:
+        return struct.pack("<I", network_magic) + hashlib.sha256(self.unsigned_bytes()).digest()
+
+    def sign(self, account: Account, network_magic: int) -> None:
+        """Replace the witnesses with `account`'s signature."""
+        signature = account.sign(self.sign_data(network_magic))
+        self.witnesses = [(bytes([PUSHDATA1, 64]) + signature, account.verification_script)]
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Transaction":
+        reader = _Reader(data)
+        version, nonce, system_fee, network_fee, valid_until_block = struct.unpack("<BIqqI", reader.read(25))
+        signers = []
+        for _ in range(reader.read_var_int()):
+            account = reader.read(20)
+            signers.append((account, reader.read(1)[0]))
+        if reader.read_var_int():
+            raise ValueError("Transaction attributes are not supported")
+        script = reader.read_var_bytes()
+        witnesses = [(reader.read_var_bytes(), reader.read_var_bytes()) for _ in range(reader.read_var_int())]
+        return cls(script, signers, nonce, valid_until_block, system_fee, network_fee, version, witnesses)
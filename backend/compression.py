@@ -0,0 +1,178 @@
+"""Response compression middleware (brotli / gzip content negotiation)."""
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from observability.metrics import REGISTRY
+
+try:  # brotli is optional; gzip is always available
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSION_BYTES = REGISTRY.counter(
+    "settleit_http_compression_bytes_total",
+    "Response bytes before (in) and after (out) compression.",
+    ("encoding", "stage"),
+)
+COMPRESSION_SECONDS = REGISTRY.counter(
+    "settleit_http_compression_seconds_total",
+    "Time spent compressing response bodies.",
+    ("encoding",),
+)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+)
+
+
+class _Encoder:
+    """Incremental encoder; every chunk is flushed so streams are not held back."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self._bytes_in = COMPRESSION_BYTES.labels(encoding, "in")
+        self._bytes_out = COMPRESSION_BYTES.labels(encoding, "out")
+        self._seconds = COMPRESSION_SECONDS.labels(encoding)
+
+    def _record(self, data: bytes, output: bytes, start: float) -> bytes:
+        self._seconds.inc(time.perf_counter() - start)
+        self._bytes_in.inc(len(data))
+        self._bytes_out.inc(len(output))
+        return output
+
+    def compress(self, data: bytes) -> bytes:
+        start = time.perf_counter()
+        if self.encoding == "br":
+            output = self._compressor.process(data) + self._compressor.flush()
+        else:
+            output = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return self._record(data, output, start)
+
+    def finish(self) -> bytes:
+        start = time.perf_counter()
+        if self.encoding == "br":
+            output = self._compressor.finish()
+        else:
+            output = self._compressor.flush(zlib.Z_FINISH)
+        return self._record(b"", output, start)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Compress responses for clients that accept brotli or gzip.
+
+    Complete bodies smaller than `minimum_size` are sent as-is. Streaming
+    responses (SSE, NDJSON) are compressed chunk by chunk with a flush after
+    each one, so events still reach the client as soon as they are sent.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(scope=start_message)
+                content_type = headers.get("content-type", "")
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+                if compressible:
+                    headers.add_vary_header("Accept-Encoding")
+                if (
+                    not compressible
+                    or "content-encoding" in headers
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                else:
+                    encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                    headers["Content-Encoding"] = encoding
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        body = encoder.compress(body) + encoder.finish()
+                        headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+                        encoder = None
+                await send(start_message)
+                start_message = None
+                if passthrough or encoder is None:
+                    await send(message)
+                    return
+
+            if passthrough:
+                await send(message)
+                return
+
+            data = encoder.compress(body)
+            if not more_body:
+                data += encoder.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -20,6 +20,28 @@ class Settings:
     DEFAULT_LLM_PROVIDER: str = os.getenv("DEFAULT_LLM_PROVIDER", "gemini")
     DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "gemini-2.5-pro")
     GEMINI_MAX_TOKENS: int = int(os.getenv("GEMINI_MAX_TOKENS", "20000"))
+    # Model cascade: CASCADE_FAST_MODEL answers first with a verdict and a
+    # confidence; answers below CASCADE_MIN_CONFIDENCE escalate to
+    # DEFAULT_MODEL, and disputes staking CASCADE_ESCALATE_STAKE or more go
+    # straight to it. An empty CASCADE_FAST_PROVIDER uses the default provider
+    CASCADE_ENABLED: bool = os.getenv("CASCADE_ENABLED", "true").lower() == "true"
+    CASCADE_FAST_PROVIDER: str = os.getenv("CASCADE_FAST_PROVIDER", "")
+    CASCADE_FAST_MODEL: str = os.getenv("CASCADE_FAST_MODEL", "gemini-2.5-flash")
+    CASCADE_MIN_CONFIDENCE: float = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.8"))
+    CASCADE_ESCALATE_STAKE: float = float(os.getenv("CASCADE_ESCALATE_STAKE", "100"))
+    # USD per million prompt/completion tokens ("model=prompt/completion,..."),
+    # used for the cost metrics and the cascade report
+    LLM_PRICES: str = os.getenv(
+        "LLM_PRICES", "gemini-2.5-flash=0.30/2.50,gemini-2.5-pro=1.25/10.00"
+    )
+    # LLM budgets in USD (0 = unlimited), from recorded llm_calls costs. Once
+    # one is used up, LLM_BUDGET_ACTION "downgrade" limits analyses to the
+    # fast cascade tier and "reject" refuses them
+    LLM_BUDGET_PER_DISPUTE_USD: float = float(os.getenv("LLM_BUDGET_PER_DISPUTE_USD", "0"))
+    LLM_BUDGET_PER_DAY_USD: float = float(os.getenv("LLM_BUDGET_PER_DAY_USD", "0"))
+    LLM_BUDGET_ACTION: str = os.getenv("LLM_BUDGET_ACTION", "downgrade")
+    # Import the agent SDK in the background after startup instead of on first use
+    AGENT_WARMUP: bool = os.getenv("AGENT_WARMUP", "true").lower() == "true"
 
     # Web3 Configuration
     WEB3_PROVIDER_URL: str = os.getenv("WEB3_PROVIDER_URL", "")
@@ -34,11 +56,151 @@ class Settings:
     NEOFS_CONTAINER_ID: str = os.getenv("NEOFS_CONTAINER_ID", "")
     NEOFS_WALLET_WIF: str = os.getenv("NEOFS_WALLET_WIF", "")
 
+    # Neo RPC client: keep-alive pool size, calls per JSON-RPC batch, request
+    # timeout, block-height cache TTL and entries kept for confirmed chain data
+    NEO_RPC_POOL_SIZE: int = int(os.getenv("NEO_RPC_POOL_SIZE", "8"))
+    NEO_RPC_BATCH_SIZE: int = int(os.getenv("NEO_RPC_BATCH_SIZE", "100"))
+    NEO_RPC_TIMEOUT: float = float(os.getenv("NEO_RPC_TIMEOUT", "10"))
+    NEO_RPC_HEIGHT_TTL: float = float(os.getenv("NEO_RPC_HEIGHT_TTL", "2"))
+    NEO_RPC_CACHE_SIZE: int = int(os.getenv("NEO_RPC_CACHE_SIZE", "10000"))
+
+    # Escrow watcher: follow blocks and set funded_at for confirmed escrow
+    # transactions (needs NEO_ESCROW_CONTRACT_HASH). Every --prod worker runs
+    # one; their writes are idempotent, but each makes its own RPC calls
+    ESCROW_WATCHER_ENABLED: bool = os.getenv("ESCROW_WATCHER_ENABLED", "false").lower() == "true"
+    ESCROW_POLL_SECONDS: float = float(os.getenv("ESCROW_POLL_SECONDS", "5"))
+    ESCROW_MAX_BLOCKS_PER_TICK: int = int(os.getenv("ESCROW_MAX_BLOCKS_PER_TICK", "100"))
+
+    # NeoFS proof uploads for resolved disputes (run when the gateway and
+    # container are configured): parallel uploads, per-upload timeout, outbox
+    # rows per pass, idle poll interval and retry policy
+    PROOF_UPLOAD_CONCURRENCY: int = int(os.getenv("PROOF_UPLOAD_CONCURRENCY", "4"))
+    PROOF_UPLOAD_TIMEOUT: float = float(os.getenv("PROOF_UPLOAD_TIMEOUT", "30"))
+    PROOF_UPLOAD_BATCH_SIZE: int = int(os.getenv("PROOF_UPLOAD_BATCH_SIZE", "20"))
+    PROOF_UPLOAD_POLL_SECONDS: float = float(os.getenv("PROOF_UPLOAD_POLL_SECONDS", "10"))
+    PROOF_UPLOAD_MAX_ATTEMPTS: int = int(os.getenv("PROOF_UPLOAD_MAX_ATTEMPTS", "8"))
+    PROOF_UPLOAD_RETRY_BASE_SECONDS: float = float(os.getenv("PROOF_UPLOAD_RETRY_BASE_SECONDS", "2"))
+    PROOF_UPLOAD_RETRY_MAX_SECONDS: float = float(os.getenv("PROOF_UPLOAD_RETRY_MAX_SECONDS", "300"))
+
+    # Oracle payouts: batch resolveBet calls for resolved on-chain bets into
+    # one transaction signed with NEO_ORACLE_WIF (safe in every worker:
+    # a dispute is only ever recorded in one pending batch).
+    # Batches flush every PAYOUT_FLUSH_SECONDS or at PAYOUT_BATCH_SIZE
+    # disputes and are split to stay under the size (bytes) and fee (GAS) caps
+    PAYOUT_BATCHER_ENABLED: bool = os.getenv("PAYOUT_BATCHER_ENABLED", "false").lower() == "true"
+    PAYOUT_FLUSH_SECONDS: float = float(os.getenv("PAYOUT_FLUSH_SECONDS", "30"))
+    PAYOUT_BATCH_SIZE: int = int(os.getenv("PAYOUT_BATCH_SIZE", "50"))
+    PAYOUT_MAX_TX_SIZE: int = int(os.getenv("PAYOUT_MAX_TX_SIZE", "65536"))
+    PAYOUT_MAX_FEE: float = float(os.getenv("PAYOUT_MAX_FEE", "5"))
+    PAYOUT_VALID_BLOCKS: int = int(os.getenv("PAYOUT_VALID_BLOCKS", "240"))
+    PAYOUT_CONTRACT_METHOD: str = os.getenv("PAYOUT_CONTRACT_METHOD", "resolveBet")
+
     # Server Configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
+    # Production server (main.py --prod)
+    # WEB_CONCURRENCY=0 sizes the worker pool from the CPU count
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))
+    SHUTDOWN_DRAIN_SECONDS: int = int(os.getenv("SHUTDOWN_DRAIN_SECONDS", "60"))
+    # Directory where each worker writes its metrics every METRICS_SNAPSHOT_SECONDS
+    # so /metrics covers all workers (--prod with several workers uses a
+    # temporary directory when this is empty)
+    METRICS_DIR: str = os.getenv("METRICS_DIR", "")
+    METRICS_SNAPSHOT_SECONDS: float = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "5"))
+
+    # SQLite database file (defaults to backend/settleit.db)
+    DATABASE_PATH: str = os.getenv("DATABASE_PATH", "")
+    # Seconds a connection waits for another writer before "database is locked"
+    DB_BUSY_TIMEOUT: float = float(os.getenv("DB_BUSY_TIMEOUT", "10"))
+    # Group commit: dispute creates, updates and evidence from one worker go
+    # through a single writer that commits up to DB_GROUP_COMMIT_MAX_OPS
+    # queued writes together, waiting up to DB_GROUP_COMMIT_WINDOW_MS for more
+    DB_GROUP_COMMIT_ENABLED: bool = os.getenv("DB_GROUP_COMMIT_ENABLED", "true").lower() == "true"
+    DB_GROUP_COMMIT_WINDOW_MS: float = float(os.getenv("DB_GROUP_COMMIT_WINDOW_MS", "2"))
+    DB_GROUP_COMMIT_MAX_OPS: int = int(os.getenv("DB_GROUP_COMMIT_MAX_OPS", "200"))
+
+    # Precedent index over AI-resolved Bets (MinHash, per worker): matches
+    # below PRECEDENT_MIN_SIMILARITY are not offered; with reuse enabled an AI
+    # Bet whose best match reaches PRECEDENT_REUSE_THRESHOLD skips the LLM
+    PRECEDENT_INDEX_ENABLED: bool = os.getenv("PRECEDENT_INDEX_ENABLED", "true").lower() == "true"
+    PRECEDENT_REUSE_ENABLED: bool = os.getenv("PRECEDENT_REUSE_ENABLED", "false").lower() == "true"
+    PRECEDENT_REUSE_THRESHOLD: float = float(os.getenv("PRECEDENT_REUSE_THRESHOLD", "0.9"))
+    PRECEDENT_MIN_SIMILARITY: float = float(os.getenv("PRECEDENT_MIN_SIMILARITY", "0.5"))
+    PRECEDENT_TOP_K: int = int(os.getenv("PRECEDENT_TOP_K", "5"))
+    PRECEDENT_NUM_PERM: int = int(os.getenv("PRECEDENT_NUM_PERM", "128"))
+
+    # Idempotency-Key on create/evidence/resolve POSTs: how long a stored
+    # response is replayed, and how long a key stays locked while its first
+    # request runs (must outlast the slowest AI resolve)
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "600"))
+
+    # Validator work queue: how long a claimed dispute stays leased to its
+    # validator without a renewal before others can claim it
+    VALIDATOR_LEASE_SECONDS: float = float(os.getenv("VALIDATOR_LEASE_SECONDS", "900"))
+
+    # Archival: disputes resolved more than ARCHIVE_AFTER_DAYS ago move to the
+    # archive tables, ARCHIVE_BATCH_SIZE per transaction, every
+    # ARCHIVE_INTERVAL_SECONDS; up to ARCHIVE_VACUUM_PAGES freed pages are then
+    # returned to the filesystem (0 disables the vacuum)
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "true").lower() == "true"
+    ARCHIVE_AFTER_DAYS: float = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    ARCHIVE_INTERVAL_SECONDS: float = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.05"))
+    ARCHIVE_VACUUM_PAGES: int = int(os.getenv("ARCHIVE_VACUUM_PAGES", "2000"))
+
+    # Bulk import: disputes per insert transaction, and per-row errors
+    # reported at most (all failures are still counted)
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+    IMPORT_MAX_ERRORS: int = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+    # Admin endpoints require "X-Admin-Token: <ADMIN_TOKEN>"; they are
+    # disabled (403) while it is empty
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    # Database tracing: statements slower than this are logged with their
+    # EXPLAIN QUERY PLAN (negative disables slow-query logging)
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+
+    # Fire Promise deadlines (move to review / AI resolve) from a background scheduler
+    DEADLINE_SCHEDULER_ENABLED: bool = os.getenv("DEADLINE_SCHEDULER_ENABLED", "true").lower() == "true"
+
+    # AI resolutions run in the background: worker tasks and max queued jobs
+    AUTO_RESOLVE_WORKERS: int = int(os.getenv("AUTO_RESOLVE_WORKERS", "2"))
+    AUTO_RESOLVE_QUEUE_SIZE: int = int(os.getenv("AUTO_RESOLVE_QUEUE_SIZE", "100"))
+    # A job leases its dispute for AUTO_RESOLVE_LEASE_SECONDS (must outlast the
+    # slowest AI resolve) and a failed one is retried AUTO_RESOLVE_RETRY_SECONDS
+    # later. Every AUTO_RESOLVE_RECOVERY_SECONDS each worker re-queues AI
+    # disputes left in Draft or whose lease ran out (a crashed or killed job).
+    # A job refused by the LLM budget waits AUTO_RESOLVE_BUDGET_RETRY_SECONDS
+    AUTO_RESOLVE_LEASE_SECONDS: float = float(os.getenv("AUTO_RESOLVE_LEASE_SECONDS", "600"))
+    AUTO_RESOLVE_RETRY_SECONDS: float = float(os.getenv("AUTO_RESOLVE_RETRY_SECONDS", "300"))
+    AUTO_RESOLVE_BUDGET_RETRY_SECONDS: float = float(os.getenv("AUTO_RESOLVE_BUDGET_RETRY_SECONDS", "3600"))
+    AUTO_RESOLVE_RECOVERY_SECONDS: float = float(os.getenv("AUTO_RESOLVE_RECOVERY_SECONDS", "60"))
+
+    # Change feed: per-connection event buffer and SSE keep-alive interval.
+    # Each worker polls the change sequence every EVENT_TAIL_SECONDS for writes
+    # made by other workers and publishes them to its own subscribers
+    EVENT_BUFFER_SIZE: int = int(os.getenv("EVENT_BUFFER_SIZE", "256"))
+    EVENT_HEARTBEAT_SECONDS: float = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+    EVENT_TAIL_ENABLED: bool = os.getenv("EVENT_TAIL_ENABLED", "true").lower() == "true"
+    EVENT_TAIL_SECONDS: float = float(os.getenv("EVENT_TAIL_SECONDS", "0.5"))
+
+    # Response compression (bodies below COMPRESSION_MIN_SIZE bytes are sent as-is)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "4"))
+
+    # Per-request profiling (off by default)
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_TOKEN: str = os.getenv("PROFILING_TOKEN", "")
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_INTERVAL_MS: float = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+    PROFILING_OUTPUT_DIR: str = os.getenv("PROFILING_OUTPUT_DIR", "profiles")
+
     def get_available_provider(self) -> tuple[str, str]:
         """Get the first available LLM provider and its API key."""
         providers = [
@@ -1,25 +1,321 @@
 """Database setup and models for storing disputes."""
 import aiosqlite
+import asyncio
+import functools
 import json
+import logging
+import operator
+import re
+import sqlite3
+import time
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Sequence, Set, Tuple, Union
 from pathlib import Path
 
-DB_PATH = Path(__file__).parent / "settleit.db"
+import events
+from config import settings
+from observability.metrics import DB_GROUP_COMMIT_SIZE, DB_GROUP_COMMIT_WAIT, DB_QUERY_DURATION, DB_QUERY_ERRORS
+
+DB_PATH = Path(settings.DATABASE_PATH or Path(__file__).parent / "settleit.db")
+
+logger = logging.getLogger(__name__)
+
+# Aggregated per-statement stats, keyed by normalized SQL (per process)
+_query_stats: Dict[str, Dict[str, Any]] = {}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and literals so equivalent statements share one stats entry."""
+    sql = _STRING_LITERAL_RE.sub("?", sql)
+    sql = _NUMBER_LITERAL_RE.sub("?", sql)
+    sql = _WHITESPACE_RE.sub(" ", sql).strip()
+    return _IN_LIST_RE.sub("(?, ...)", sql)
+
+
+async def _explain(db: aiosqlite.Connection, sql: str, params: Sequence[Any]) -> List[str]:
+    try:
+        cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[3] for row in await cursor.fetchall()]
+    except Exception as e:  # e.g. PRAGMA / DDL statements have no plan
+        return [f"<no plan: {e}>"]
+
+
+async def _trace(
+    db: aiosqlite.Connection,
+    sql: str,
+    params: Sequence[Any],
+    elapsed: float,
+    row_count: int,
+) -> None:
+    """Record a statement in the per-statement stats and log it if slow."""
+    normalized = normalize_sql(sql)
+    elapsed_ms = elapsed * 1000
+    row_count = max(row_count, 0)  # sqlite reports -1 for DDL
+    stats = _query_stats.get(normalized)
+    if stats is None:
+        stats = _query_stats[normalized] = {
+            "sql": normalized,
+            "calls": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "rows": 0,
+            "slow_calls": 0,
+            "last_plan": None,
+        }
+    stats["calls"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+    stats["rows"] += row_count
+
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold < 0 or elapsed_ms < threshold:
+        return
+
+    plan = await _explain(db, sql, params)
+    stats["slow_calls"] += 1
+    stats["last_plan"] = plan
+    logger.warning(
+        "Slow query (%.1f ms, %d params, %d rows): %s\n  plan: %s",
+        elapsed_ms, len(params), row_count, normalized, " | ".join(plan),
+    )
+
+
+async def _execute(db: aiosqlite.Connection, sql: str, params: Sequence[Any] = ()) -> aiosqlite.Cursor:
+    """Execute a statement through the tracing layer."""
+    start = time.perf_counter()
+    cursor = await db.execute(sql, params)
+    await _trace(db, sql, params, time.perf_counter() - start, cursor.rowcount)
+    return cursor
+
+
+async def _executemany(db: aiosqlite.Connection, sql: str, rows: Sequence[Sequence[Any]]) -> aiosqlite.Cursor:
+    """Execute a statement once per parameter row through the tracing layer."""
+    start = time.perf_counter()
+    cursor = await db.executemany(sql, rows)
+    await _trace(db, sql, rows[0] if rows else (), time.perf_counter() - start, cursor.rowcount)
+    return cursor
+
+
+async def _fetchall(db: aiosqlite.Connection, sql: str, params: Sequence[Any] = ()) -> List[Any]:
+    """Run a query through the tracing layer and return all rows."""
+    start = time.perf_counter()
+    cursor = await db.execute(sql, params)
+    rows = await cursor.fetchall()
+    await _trace(db, sql, params, time.perf_counter() - start, len(rows))
+    return rows
+
+
+async def _fetchone(db: aiosqlite.Connection, sql: str, params: Sequence[Any] = ()) -> Optional[Any]:
+    """Run a query through the tracing layer and return the first row."""
+    start = time.perf_counter()
+    cursor = await db.execute(sql, params)
+    row = await cursor.fetchone()
+    await _trace(db, sql, params, time.perf_counter() - start, 1 if row else 0)
+    return row
+
+
+def get_query_stats() -> List[Dict[str, Any]]:
+    """Aggregated per-statement stats, slowest total time first."""
+    result = []
+    for stats in _query_stats.values():
+        entry = dict(stats)
+        entry["avg_ms"] = entry["total_ms"] / entry["calls"] if entry["calls"] else 0.0
+        result.append(entry)
+    return sorted(result, key=lambda e: e["total_ms"], reverse=True)
+
+
+def reset_query_stats() -> None:
+    """Clear the aggregated per-statement stats."""
+    _query_stats.clear()
+
+
+def _timed(func):
+    """Record latency and failures of a database operation under its function name."""
+    duration = DB_QUERY_DURATION.labels(func.__name__)
+    errors = DB_QUERY_ERRORS.labels(func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+# Columns of the disputes table (used to validate projections)
+DISPUTE_COLUMNS = frozenset({
+    'id', 'title', 'type', 'description', 'creator_id', 'opponent_id',
+    'creator_position', 'opponent_position', 'validator_id', 'validator_type',
+    'status', 'stake_amount', 'opponent_stake_amount', 'token', 'deadline',
+    'evidence_requirements', 'created_at', 'funded_at', 'evidence_submitted_at',
+    'in_review_at', 'resolved_at', 'decision_winner', 'decision_reason',
+    'decision_decided_at', 'decision_decided_by', 'creator_wallet',
+    'opponent_wallet', 'escrow_tx_id', 'payout_tx_id', 'neofs_object_id',
+    'row_version', 'resolution_method', 'lease_owner', 'lease_expires_at',
+})
+
+
+# Columns of the evidence table, in order (archive rows also carry archived_at)
+EVIDENCE_COLUMNS = "id, dispute_id, type, content, submitted_by, timestamp, description"
+
+# Statuses in which a dispute's deadline is still pending
+DEADLINE_OPEN_STATUSES = ('Draft', 'Awaiting Funding')
+
+
+def _connect() -> aiosqlite.Connection:
+    """Open a database connection.
+
+    Several server workers may share the database file, so a connection waits up
+    to DB_BUSY_TIMEOUT seconds for another writer instead of failing with
+    `database is locked`.
+    """
+    return aiosqlite.connect(DB_PATH, timeout=settings.DB_BUSY_TIMEOUT)
+
+
+WriteOp = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class GroupCommitWriter:
+    """Single writer that runs queued write operations in shared transactions.
+
+    Each operation is an async function of the connection that runs its
+    statements without committing. The writer takes whatever is queued (up to
+    DB_GROUP_COMMIT_MAX_OPS, waiting at most DB_GROUP_COMMIT_WINDOW_MS for more),
+    runs every operation in one `BEGIN IMMEDIATE` transaction and commits
+    once. So N concurrent writes cost one write-lock acquisition and one fsync
+    instead of N. Each operation runs in its own savepoint, so one that
+    raises is rolled back and fails alone. A caller's future resolves only
+    after the commit, when its write is durable.
+    """
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, op: WriteOp) -> Any:
+        """Queue `op` and return its result once its group commit is durable."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use in this event loop (each asyncio.run() in scripts gets a new one)
+            self._loop, self._queue, self._task = loop, asyncio.Queue(), None
+        future = loop.create_future()
+        self._queue.put_nowait((op, future, time.perf_counter()))
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._drain(), name="db-group-commit")
+        return await future
+
+    async def _drain(self) -> None:
+        # Runs while writes keep arriving and exits when the queue is empty
+        max_ops = max(1, settings.DB_GROUP_COMMIT_MAX_OPS)
+        window = settings.DB_GROUP_COMMIT_WINDOW_MS / 1000
+        while not self._queue.empty():
+            if window > 0 and self._queue.qsize() < max_ops:
+                await asyncio.sleep(window)
+            batch = [self._queue.get_nowait() for _ in range(min(max_ops, self._queue.qsize()))]
+            await self._commit(batch)
+
+    async def _commit(self, batch: List[Tuple[WriteOp, asyncio.Future, float]]) -> None:
+        results: List[Tuple[asyncio.Future, bool, Any]] = []
+        start_version = None
+        try:
+            async with _connect() as db:
+                db.row_factory = aiosqlite.Row
+                await _execute(db, "BEGIN IMMEDIATE")
+                if _local_versions is not None:
+                    start_version = await _sync_version(db)
+                for op, future, _ in batch:
+                    await _execute(db, "SAVEPOINT write_op")
+                    try:
+                        result = await op(db)
+                    except Exception as exc:
+                        await _execute(db, "ROLLBACK TO write_op")
+                        if _local_versions is not None:
+                            _forget_versions_above(await _sync_version(db))
+                        results.append((future, False, exc))
+                    else:
+                        results.append((future, True, result))
+                    await _execute(db, "RELEASE write_op")
+                await db.commit()
+        except Exception as exc:
+            # Nothing was committed: every write in the batch fails
+            if start_version is not None:
+                _forget_versions_above(start_version)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        DB_GROUP_COMMIT_SIZE.observe(len(batch))
+        now = time.perf_counter()
+        for (future, ok, value), (_, _, queued_at) in zip(results, batch):
+            DB_GROUP_COMMIT_WAIT.observe(now - queued_at)
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+_writer = GroupCommitWriter()
+
+
+async def _write(op: WriteOp) -> Any:
+    """Run a write operation and commit it, through the group-commit writer if enabled."""
+    if settings.DB_GROUP_COMMIT_ENABLED:
+        return await _writer.submit(op)
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        result = await op(db)
+        await db.commit()
+        return result
 
 
 async def _ensure_column(db: aiosqlite.Connection, table: str, column: str, definition: str) -> None:
-    cursor = await db.execute(f"PRAGMA table_info({table})")
-    existing = [row[1] for row in await cursor.fetchall()]
+    existing = [row[1] for row in await _fetchall(db, f"PRAGMA table_info({table})")]
     if column not in existing:
-        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        try:
+            await _execute(db, f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        except sqlite3.OperationalError as e:
+            # Another worker added it between our check and the ALTER
+            if "duplicate column" not in str(e):
+                raise
+
+
+async def _ensure_archive_table(db: aiosqlite.Connection, table: str, archive: str) -> None:
+    """Create `archive` with `table`'s columns plus archived_at, adding any columns it lacks."""
+    await _execute(db, f"CREATE TABLE IF NOT EXISTS {archive} (id TEXT PRIMARY KEY, archived_at TEXT NOT NULL)")
+    existing = {row[1] for row in await _fetchall(db, f"PRAGMA table_info({archive})")}
+    for _, column, column_type, *_ in await _fetchall(db, f"PRAGMA table_info({table})"):
+        if column not in existing:
+            await _ensure_column(db, archive, column, column_type)
 
 
+@_timed
 async def init_db():
     """Initialize the database with required tables."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
+        # Lets the archiver hand freed pages back with incremental_vacuum. This
+        # only takes effect on a new database (`python manage.py vacuum` converts one).
+        await _execute(db, "PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL lets readers in other workers proceed while one worker writes;
+        # the mode is persistent, so setting it once per startup is enough.
+        await _execute(db, "PRAGMA journal_mode=WAL")
+
         # Disputes table
-        await db.execute("""
+        await _execute(db, """
             CREATE TABLE IF NOT EXISTS disputes (
                 id TEXT PRIMARY KEY,
                 title TEXT NOT NULL,
@@ -59,9 +355,15 @@ async def init_db():
         await _ensure_column(db, "disputes", "escrow_tx_id", "TEXT")
         await _ensure_column(db, "disputes", "payout_tx_id", "TEXT")
         await _ensure_column(db, "disputes", "neofs_object_id", "TEXT")
+        await _ensure_column(db, "disputes", "row_version", "INTEGER")
+        await _ensure_column(db, "disputes", "resolution_method", "TEXT")
+        # Validator work queue: who holds a human-review dispute and until when
+        # (Unix time; 0 means never claimed or released)
+        await _ensure_column(db, "disputes", "lease_owner", "TEXT")
+        await _ensure_column(db, "disputes", "lease_expires_at", "REAL NOT NULL DEFAULT 0")
         
         # Evidence table
-        await db.execute("""
+        await _execute(db, """
             CREATE TABLE IF NOT EXISTS evidence (
                 id TEXT PRIMARY KEY,
                 dispute_id TEXT NOT NULL,
@@ -73,39 +375,407 @@ async def init_db():
                 FOREIGN KEY (dispute_id) REFERENCES disputes(id)
             )
         """)
-        
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_evidence_dispute
+            ON evidence (dispute_id, timestamp)
+        """)
+
+        # Archive: resolved disputes past ARCHIVE_AFTER_DAYS move, with their
+        # evidence, to copies of the two tables; reads by id fall back to them
+        await _ensure_archive_table(db, "disputes", "disputes_archive")
+        await _ensure_archive_table(db, "evidence", "evidence_archive")
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_evidence_archive_dispute ON evidence_archive (dispute_id, timestamp)")
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_disputes_archive_row_version ON disputes_archive (row_version)")
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_disputes_resolved ON disputes (resolved_at)
+            WHERE status = 'Resolved'
+        """)
+
+        # Delta sync: every write stamps the dispute with the next value of a
+        # global sequence; deleted disputes leave a tombstone at their version.
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS sync_sequence (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                value INTEGER NOT NULL
+            )
+        """)
+        await _execute(db, "INSERT OR IGNORE INTO sync_sequence (id, value) VALUES (1, 0)")
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS dispute_tombstones (
+                dispute_id TEXT PRIMARY KEY,
+                row_version INTEGER NOT NULL,
+                deleted_at TEXT NOT NULL
+            )
+        """)
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_disputes_created_at ON disputes (created_at)")
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_disputes_row_version ON disputes (row_version)")
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_tombstones_row_version ON dispute_tombstones (row_version)")
+        # Partial index: only open disputes with a deadline, for scheduler recovery
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_disputes_open_deadline ON disputes (deadline)
+            WHERE deadline IS NOT NULL AND status IN ('Draft', 'Awaiting Funding')
+        """)
+        # Escrow watcher: disputes whose escrow transaction is not confirmed yet,
+        # and the last chain block each watcher has fully processed
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_disputes_pending_escrow ON disputes (escrow_tx_id)
+            WHERE escrow_tx_id IS NOT NULL AND funded_at IS NULL
+        """)
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS chain_checkpoints (
+                name TEXT PRIMARY KEY,
+                block_index INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        # Transactional outbox for NeoFS proof uploads: a row is added in the
+        # same transaction that resolves the dispute
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS proof_outbox (
+                dispute_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                neofs_object_id TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_proof_outbox_due ON proof_outbox (next_attempt_at)
+            WHERE status = 'pending'
+        """)
+        # Oracle payouts: resolved disputes with an on-chain bet and a winner are
+        # paid out in batched transactions. A batch is written (signed) before
+        # it is sent, and payout_tx_id is only set once its transaction is confirmed.
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_disputes_payout_due ON disputes (resolved_at)
+            WHERE status = 'Resolved' AND payout_tx_id IS NULL
+                AND escrow_tx_id IS NOT NULL AND decision_winner IS NOT NULL
+        """)
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS payout_batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tx_hash TEXT NOT NULL UNIQUE,
+                raw_tx TEXT NOT NULL,
+                status TEXT NOT NULL,
+                valid_until_block INTEGER NOT NULL,
+                system_fee INTEGER NOT NULL,
+                network_fee INTEGER NOT NULL,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS payout_batch_items (
+                batch_id INTEGER NOT NULL,
+                dispute_id TEXT NOT NULL,
+                PRIMARY KEY (batch_id, dispute_id)
+            )
+        """)
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_payout_items_dispute ON payout_batch_items (dispute_id)")
+        # Idempotency-Key records: the stored response of a keyed POST, replayed
+        # to retries until expires_at (a short lock while the request runs)
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                request_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                status_code INTEGER,
+                response BLOB,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (scope, key)
+            )
+        """)
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys (expires_at)")
+        # One row per LLM call made for an analysis (and per reused precedent)
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dispute_id TEXT,
+                dispute_type TEXT,
+                tier TEXT,
+                provider TEXT,
+                model TEXT,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                cost_usd REAL NOT NULL DEFAULT 0,
+                latency_ms REAL NOT NULL DEFAULT 0,
+                cache_hit INTEGER NOT NULL DEFAULT 0,
+                outcome TEXT NOT NULL,
+                error TEXT,
+                day TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_llm_calls_dispute ON llm_calls (dispute_id)")
+        await _execute(db, "CREATE INDEX IF NOT EXISTS idx_llm_calls_day ON llm_calls (day)")
+        # Dashboard aggregates: one row per (status, type, token, resolved_by),
+        # kept in step by every write that changes one of those or the stakes
+        await _execute(db, """
+            CREATE TABLE IF NOT EXISTS dispute_stats (
+                status TEXT NOT NULL,
+                type TEXT NOT NULL,
+                token TEXT NOT NULL,
+                resolved_by TEXT NOT NULL,
+                disputes INTEGER NOT NULL DEFAULT 0,
+                stake REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (status, type, token, resolved_by)
+            )
+        """)
+        if not await _fetchone(db, "SELECT 1 FROM dispute_stats LIMIT 1"):
+            await _rebuild_dispute_stats(db)
+        # AI disputes an auto-resolve job may still have to pick up (recovery sweep)
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_disputes_auto_resolve ON disputes (created_at)
+            WHERE status IN ('Draft', 'In Review') AND (resolution_method = 'ai' OR validator_type = 'ai')
+        """)
+        # Only disputes awaiting a human decision, in claim order per validator
+        await _execute(db, """
+            CREATE INDEX IF NOT EXISTS idx_disputes_review_queue
+            ON disputes (validator_id, lease_expires_at, in_review_at)
+            WHERE status = 'In Review' AND validator_type = 'human'
+        """)
+        if await _fetchone(db, "SELECT 1 FROM disputes WHERE row_version IS NULL LIMIT 1"):
+            version = await _next_version(db)
+            await _execute(db, "UPDATE disputes SET row_version = ? WHERE row_version IS NULL", (version,))
+
         await db.commit()
 
 
-async def get_all_disputes() -> List[Dict[str, Any]]:
-    """Get all disputes from the database."""
-    async with aiosqlite.connect(DB_PATH) as db:
+# Change-sequence values allocated by this process, once a change tail
+# (services.ChangeTail) is following writes made by other processes
+_local_versions: Optional[Set[int]] = None
+
+
+def track_local_versions() -> None:
+    """Start remembering the change-sequence values this process allocates."""
+    global _local_versions
+    if _local_versions is None:
+        _local_versions = set()
+
+
+def _forget_versions_above(value: int) -> None:
+    # Values allocated by a rolled-back write are handed out again, maybe to another process
+    if _local_versions:
+        _local_versions.difference_update([version for version in _local_versions if version > value])
+
+
+async def _sync_version(db: aiosqlite.Connection) -> int:
+    row = await _fetchone(db, "SELECT value FROM sync_sequence WHERE id = 1")
+    return row[0] if row else 0
+
+
+def pop_local_versions(upto: int) -> Set[int]:
+    """Remove and return this process's change-sequence values up to `upto`."""
+    if not _local_versions:
+        return set()
+    popped = {version for version in _local_versions if version <= upto}
+    _local_versions.difference_update(popped)
+    return popped
+
+
+async def _next_version(db: aiosqlite.Connection) -> int:
+    """Allocate the next change-sequence value inside the caller's write transaction."""
+    row = await _fetchone(db, "UPDATE sync_sequence SET value = value + 1 WHERE id = 1 RETURNING value")
+    if _local_versions is not None:
+        _local_versions.add(row[0])
+    return row[0]
+
+
+# Dispute columns that dispute_stats is grouped or summed by
+STATS_COLUMNS = ('status', 'type', 'token', 'stake_amount', 'opponent_stake_amount', 'decision_decided_by')
+
+# Statuses whose stakes are not locked (not yet staked, or paid out)
+UNLOCKED_STATUSES = ('Draft', 'Resolved', 'Cancelled')
+
+# SQL twin of _stats_key's resolved_by, for rebuilding from the disputes table
+_RESOLVED_BY_SQL = """
+    CASE WHEN status != 'Resolved' THEN ''
+         WHEN decision_decided_by = 'ai-agent-spoonos' THEN 'ai'
+         ELSE 'human' END
+"""
+
+
+def _stats_key(row: Dict[str, Any]) -> tuple:
+    if row['status'] != 'Resolved':
+        resolved_by = ''
+    elif row.get('decision_decided_by') == 'ai-agent-spoonos':
+        resolved_by = 'ai'
+    else:
+        resolved_by = 'human'
+    return row['status'], row['type'], row['token'], resolved_by
+
+
+async def _apply_stats(db: aiosqlite.Connection, row: Dict[str, Any], sign: int) -> None:
+    """Add (+1) or remove (-1) a dispute's contribution to dispute_stats in the caller's transaction."""
+    stake = (row['stake_amount'] or 0) + (row['opponent_stake_amount'] or 0)
+    await _execute(db, """
+        INSERT INTO dispute_stats (status, type, token, resolved_by, disputes, stake) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (status, type, token, resolved_by) DO UPDATE SET
+            disputes = disputes + excluded.disputes,
+            stake = stake + excluded.stake
+    """, (*_stats_key(row), sign, sign * stake))
+
+
+async def _rebuild_dispute_stats(db: aiosqlite.Connection) -> None:
+    await _execute(db, "DELETE FROM dispute_stats")
+    await _execute(db, f"""
+        INSERT INTO dispute_stats (status, type, token, resolved_by, disputes, stake)
+        SELECT status, type, token, {_RESOLVED_BY_SQL}, COUNT(*), SUM(stake_amount + opponent_stake_amount)
+        FROM (
+            SELECT {', '.join(STATS_COLUMNS)} FROM disputes
+            UNION ALL
+            SELECT {', '.join(STATS_COLUMNS)} FROM disputes_archive
+        )
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+@_timed
+async def get_all_disputes(columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Get all disputes from the database, optionally only the given columns."""
+    if columns is None:
+        projection = "*"
+    else:
+        unknown = set(columns) - DISPUTE_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown dispute columns: {', '.join(sorted(unknown))}")
+        projection = ", ".join(columns)
+
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
-        cursor = await db.execute("SELECT * FROM disputes ORDER BY created_at DESC")
-        rows = await cursor.fetchall()
+        rows = await _fetchall(db, f"SELECT {projection} FROM disputes ORDER BY created_at DESC")
         return [dict(row) for row in rows]
 
 
+@_timed
 async def get_dispute_by_id(dispute_id: str) -> Optional[Dict[str, Any]]:
-    """Get a dispute by ID."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    """Get a dispute by ID, from the archive if it has been archived."""
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
-        cursor = await db.execute("SELECT * FROM disputes WHERE id = ?", (dispute_id,))
-        row = await cursor.fetchone()
+        row = await _fetchone(db, "SELECT * FROM disputes WHERE id = ?", (dispute_id,))
+        if row is None:
+            row = await _fetchone(db, "SELECT * FROM disputes_archive WHERE id = ?", (dispute_id,))
         return dict(row) if row else None
 
 
+@_timed
+async def get_changes_since(since: int, limit: int) -> Dict[str, Any]:
+    """Get disputes changed and deleted after change-sequence value `since`.
+
+    Returns at most `limit` entries (disputes and tombstones together) in
+    sequence order, plus the cursor to pass as `since` next time.
+    """
+    changes, has_more = await get_change_log_since(since, limit)
+    return {
+        "disputes": [change for _, change in changes if isinstance(change, dict)],
+        "deleted": [change for _, change in changes if isinstance(change, str)],
+        "cursor": changes[-1][0] if changes else since,
+        "has_more": has_more,
+    }
+
+
+@_timed
+async def get_change_log_since(since: int, limit: int) -> Tuple[List[Tuple[int, Union[Dict[str, Any], str]]], bool]:
+    """Get up to `limit` (row_version, dispute or deleted id) entries after `since`, and whether more follow."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        disputes = await _fetchall(
+            db,
+            "SELECT * FROM disputes WHERE row_version > ? ORDER BY row_version LIMIT ?",
+            (since, limit + 1),
+        )
+        tombstones = await _fetchall(
+            db,
+            "SELECT dispute_id, row_version FROM dispute_tombstones "
+            "WHERE row_version > ? ORDER BY row_version LIMIT ?",
+            (since, limit + 1),
+        )
+
+    changes = sorted(
+        [(row["row_version"], dict(row)) for row in disputes]
+        + [(row["row_version"], row["dispute_id"]) for row in tombstones],
+        key=lambda change: change[0],
+    )
+    return changes[:limit], len(changes) > limit
+
+
+@_timed
+async def get_pending_auto_resolutions() -> List[str]:
+    """Get ids of AI-resolved disputes with no resolution job running.
+
+    These are AI Bets still waiting in Draft, and AI Bets or AI-validated
+    Promises left In Review by a job whose lease ran out (the job crashed or
+    was killed, or failed and is due for a retry).
+    """
+    async with _connect() as db:
+        # The first two terms match idx_disputes_auto_resolve
+        rows = await _fetchall(db, """
+            SELECT id FROM disputes
+            WHERE status IN ('Draft', 'In Review') AND (resolution_method = 'ai' OR validator_type = 'ai')
+                AND (
+                    (type = 'Bet' AND resolution_method = 'ai' AND status = 'Draft')
+                    OR (status = 'In Review' AND lease_expires_at <= ? AND (
+                        (type = 'Bet' AND resolution_method = 'ai') OR (type = 'Promise' AND validator_type = 'ai')
+                    ))
+                )
+            ORDER BY created_at
+        """, (time.time(),))
+        return [row[0] for row in rows]
+
+
+@_timed
+async def get_open_deadlines() -> List[Dict[str, Any]]:
+    """Get id and deadline of every dispute whose deadline is still pending."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        # The WHERE clause must match idx_disputes_open_deadline literally
+        rows = await _fetchall(db, """
+            SELECT id, deadline FROM disputes
+            WHERE deadline IS NOT NULL AND status IN ('Draft', 'Awaiting Funding')
+            ORDER BY deadline
+        """)
+        return [dict(row) for row in rows]
+
+
+_RESOLVED_AI_BET = "id, title, description, creator_position, opponent_position, decision_reason, row_version"
+_RESOLVED_AI_BET_SINCE = """
+    row_version > ? AND status = 'Resolved' AND type = 'Bet' AND decision_decided_by = 'ai-agent-spoonos'
+"""
+
+
+@_timed
+async def get_resolved_ai_bets_since(since: int, limit: int) -> List[Dict[str, Any]]:
+    """Get AI-resolved Bets (archived ones included) changed after `since`, in sequence order."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        rows = await _fetchall(db, f"""
+            SELECT {_RESOLVED_AI_BET} FROM disputes WHERE {_RESOLVED_AI_BET_SINCE}
+            UNION ALL
+            SELECT {_RESOLVED_AI_BET} FROM disputes_archive WHERE {_RESOLVED_AI_BET_SINCE}
+            ORDER BY row_version
+            LIMIT ?
+        """, (since, since, limit))
+        return [dict(row) for row in rows]
+
+
+@_timed
 async def create_dispute(dispute_data: Dict[str, Any]) -> str:
     """Create a new dispute in the database."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
+    async def insert(db: aiosqlite.Connection) -> None:
+        await _execute(db, """
             INSERT INTO disputes (
                 id, title, type, description, creator_id, opponent_id,
                 creator_position, opponent_position, validator_id, validator_type,
                 status, stake_amount, opponent_stake_amount, token, deadline,
                 evidence_requirements, created_at, creator_wallet, opponent_wallet,
-                escrow_tx_id, payout_tx_id, neofs_object_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                escrow_tx_id, payout_tx_id, neofs_object_id, resolution_method, row_version
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             dispute_data['id'],
             dispute_data['title'],
@@ -129,13 +799,40 @@ async def create_dispute(dispute_data: Dict[str, Any]) -> str:
             dispute_data.get('escrow_tx_id'),
             dispute_data.get('payout_tx_id'),
             dispute_data.get('neofs_object_id'),
+            dispute_data.get('resolution_method'),
+            await _next_version(db),
         ))
-        await db.commit()
-        return dispute_data['id']
+        await _apply_stats(db, dispute_data, 1)
+
+    await _write(insert)
+
+    events.hub.publish(
+        events.DISPUTE_CREATED,
+        dispute_data['id'],
+        participants=(dispute_data['creator_id'], dispute_data['opponent_id'], dispute_data.get('validator_id')),
+        status=dispute_data['status'],
+        deadline=dispute_data.get('deadline'),
+    )
+    return dispute_data['id']
 
 
-async def update_dispute(dispute_id: str, updates: Dict[str, Any]) -> bool:
-    """Update a dispute in the database."""
+@_timed
+async def update_dispute(
+    dispute_id: str,
+    updates: Dict[str, Any],
+    only_if_status: Optional[Sequence[str]] = None,
+    only_if_deadline: Optional[str] = None,
+    or_if_lease_expired: bool = False,
+) -> bool:
+    """Update a dispute in the database.
+
+    With `only_if_status`, the update only applies while the dispute is in one
+    of those statuses, so concurrent transitions cannot both win;
+    `or_if_lease_expired` also lets it apply to an In Review dispute whose
+    lease has run out. With `only_if_deadline`, it only applies while the
+    deadline is still that value, so a deadline moved since the caller checked
+    it is not acted on. Returns whether a row was updated.
+    """
     if not updates:
         return False
     
@@ -170,31 +867,182 @@ async def update_dispute(dispute_id: str, updates: Dict[str, Any]) -> bool:
     if not set_clauses:
         return False
     
-    values.append(dispute_id)
-    query = f"UPDATE disputes SET {', '.join(set_clauses)} WHERE id = ?"
-    
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(query, values)
+    set_clauses.append("row_version = ?")
+    where = "id = ?"
+    condition_params: List[Any] = list(only_if_status or ())
+    if only_if_status:
+        status_condition = f"status IN ({', '.join('?' * len(only_if_status))})"
+        if or_if_lease_expired:
+            status_condition = f"({status_condition} OR (status = 'In Review' AND lease_expires_at <= ?))"
+            condition_params.append(time.time())
+        where += f" AND {status_condition}"
+    if only_if_deadline is not None:
+        where += " AND deadline = ?"
+    query = (
+        f"UPDATE disputes SET {', '.join(set_clauses)} WHERE {where} "
+        f"RETURNING creator_id, opponent_id, validator_id, deadline, {', '.join(STATS_COLUMNS)}"
+    )
+    affects_stats = any(key in STATS_COLUMNS or key == 'decision' for key in updates)
+
+    async def update(db: aiosqlite.Connection) -> List[Any]:
+        params = [*values, await _next_version(db), dispute_id, *condition_params]
+        if only_if_deadline is not None:
+            params.append(only_if_deadline)
+        # The transaction holds the write lock, so the row cannot change in between
+        before = affects_stats and await _fetchone(
+            db, f"SELECT {', '.join(STATS_COLUMNS)} FROM disputes WHERE id = ?", (dispute_id,)
+        )
+        rows = await _fetchall(db, query, params)
+        if rows and before:
+            await _apply_stats(db, dict(before), -1)
+            await _apply_stats(db, dict(rows[0]), 1)
+        if rows and updates.get('status') == 'Resolved':
+            await _enqueue_proof(db, dispute_id)
+        return rows
+
+    rows = await _write(update)
+
+    if not rows:
+        return False
+
+    creator_id, opponent_id, validator_id, deadline, status = rows[0][:5]
+    events.hub.publish(
+        events.DISPUTE_RESOLVED if updates.get('status') == 'Resolved' else events.DISPUTE_UPDATED,
+        dispute_id,
+        participants=(creator_id, opponent_id, validator_id),
+        status=status,
+        changed=[key for key in updates if key != 'evidence'],
+        deadline=deadline,
+    )
+    return True
+
+
+@_timed
+async def get_dispute_stats() -> Dict[str, Any]:
+    """Dashboard totals from dispute_stats (a few rows, however many disputes there are)."""
+    async with _connect() as db:
+        rows = await _fetchall(
+            db, "SELECT status, type, token, resolved_by, disputes, stake FROM dispute_stats WHERE disputes != 0"
+        )
+
+    by_status: Dict[str, int] = {}
+    by_type: Dict[str, int] = {}
+    by_resolver: Dict[str, int] = {}
+    stake_locked: Dict[str, float] = {}
+    for status, dispute_type, token, resolved_by, disputes, stake in rows:
+        by_status[status] = by_status.get(status, 0) + disputes
+        by_type[dispute_type] = by_type.get(dispute_type, 0) + disputes
+        if resolved_by:
+            by_resolver[resolved_by] = by_resolver.get(resolved_by, 0) + disputes
+        if status not in UNLOCKED_STATUSES:
+            stake_locked[token] = round(stake_locked.get(token, 0) + stake, 8)
+
+    total = sum(by_status.values())
+    resolved = by_status.get('Resolved', 0)
+    return {
+        'total': total,
+        'by_status': by_status,
+        'by_type': by_type,
+        'stake_locked': stake_locked,
+        'resolution': {
+            'resolved': resolved,
+            'by': by_resolver,
+            'rate': round(resolved / total, 4) if total else 0.0,
+            'ai_share': round(by_resolver.get('ai', 0) / resolved, 4) if resolved else 0.0,
+        },
+    }
+
+
+@_timed
+async def rebuild_dispute_stats() -> List[Dict[str, Any]]:
+    """Recompute dispute_stats from the disputes and disputes_archive tables.
+
+    Returns the groups whose stored totals differed from the recomputed ones
+    (empty when the incremental updates were exact).
+    """
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        # Take the write lock first, so no write lands between the two reads
+        await _execute(db, "BEGIN IMMEDIATE")
+        stored = await _fetchall(db, "SELECT * FROM dispute_stats WHERE disputes != 0")
+        await _rebuild_dispute_stats(db)
+        rebuilt = await _fetchall(db, "SELECT * FROM dispute_stats")
         await db.commit()
-        return True
+
+    def totals(rows):
+        return {
+            (row['status'], row['type'], row['token'], row['resolved_by']): (row['disputes'], round(row['stake'], 8))
+            for row in rows
+        }
+
+    before, after = totals(stored), totals(rebuilt)
+    return [
+        {
+            'status': key[0], 'type': key[1], 'token': key[2], 'resolved_by': key[3],
+            'stored': before.get(key, (0, 0.0)), 'actual': after.get(key, (0, 0.0)),
+        }
+        for key in sorted(before.keys() | after.keys())
+        if before.get(key, (0, 0.0)) != after.get(key, (0, 0.0))
+    ]
 
 
+@_timed
 async def get_evidence_by_dispute(dispute_id: str) -> List[Dict[str, Any]]:
-    """Get all evidence for a dispute."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    """Get all evidence for a dispute (archived evidence included)."""
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
+        rows = await _fetchall(
+            db,
             "SELECT * FROM evidence WHERE dispute_id = ? ORDER BY timestamp",
             (dispute_id,)
         )
-        rows = await cursor.fetchall()
+        if not rows:
+            rows = await _fetchall(
+                db,
+                f"SELECT {EVIDENCE_COLUMNS} FROM evidence_archive WHERE dispute_id = ? ORDER BY timestamp",
+                (dispute_id,)
+            )
         return [dict(row) for row in rows]
 
 
-async def add_evidence(evidence_data: Dict[str, Any]) -> str:
-    """Add evidence to a dispute."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
+@_timed
+async def get_evidence_for_disputes(dispute_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Get evidence for many disputes at once, grouped by dispute id."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {dispute_id: [] for dispute_id in dispute_ids}
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(dispute_ids), 500):
+            chunk = dispute_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = await _fetchall(
+                db,
+                f"SELECT * FROM evidence WHERE dispute_id IN ({placeholders}) ORDER BY timestamp",
+                chunk,
+            )
+            for row in rows:
+                grouped[row["dispute_id"]].append(dict(row))
+    return grouped
+
+
+@_timed
+async def add_evidence(evidence_data: Dict[str, Any]) -> Optional[str]:
+    """Add evidence to a dispute.
+
+    Archived disputes are read-only, so nothing is added (and None is
+    returned) unless the dispute is in the disputes table.
+    """
+    async def insert(db: aiosqlite.Connection) -> List[Any]:
+        # New evidence changes the dispute as seen by delta sync
+        participants = await _fetchall(
+            db,
+            "UPDATE disputes SET row_version = ? WHERE id = ? "
+            "RETURNING creator_id, opponent_id, validator_id",
+            (await _next_version(db), evidence_data['dispute_id']),
+        )
+        if not participants:
+            return participants
+        await _execute(db, """
             INSERT INTO evidence (
                 id, dispute_id, type, content, submitted_by, timestamp, description
             ) VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -207,15 +1055,724 @@ async def add_evidence(evidence_data: Dict[str, Any]) -> str:
             evidence_data['timestamp'],
             evidence_data.get('description'),
         ))
+        return participants
+
+    participants = await _write(insert)
+    if not participants:
+        return None
+
+    events.hub.publish(
+        events.EVIDENCE_ADDED,
+        evidence_data['dispute_id'],
+        participants=tuple(participants[0]),
+        evidence_id=evidence_data['id'],
+        submitted_by=evidence_data['submitted_by'],
+    )
+    return evidence_data['id']
+
+
+# Dispute columns a bulk import may set; the others keep their defaults
+IMPORT_COLUMNS = (
+    'id', 'title', 'type', 'description', 'creator_id', 'opponent_id',
+    'creator_position', 'opponent_position', 'validator_id', 'validator_type',
+    'status', 'stake_amount', 'opponent_stake_amount', 'token', 'deadline',
+    'evidence_requirements', 'created_at', 'funded_at', 'evidence_submitted_at',
+    'in_review_at', 'resolved_at', 'decision_winner', 'decision_reason',
+    'decision_decided_at', 'decision_decided_by', 'creator_wallet',
+    'opponent_wallet', 'escrow_tx_id', 'payout_tx_id', 'neofs_object_id',
+    'resolution_method',
+)
+_import_values = operator.itemgetter(*IMPORT_COLUMNS)
+
+
+async def _existing_ids(db: aiosqlite.Connection, tables: Sequence[str], column: str, ids: List[str]) -> set:
+    found = set()
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        for table in tables:
+            rows = await _fetchall(db, f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})", chunk)
+            found.update(row[0] for row in rows)
+    return found
+
+
+@_timed
+async def import_disputes(
+    disputes: Sequence[Dict[str, Any]],
+    evidence: Sequence[Dict[str, Any]],
+) -> Dict[str, str]:
+    """Insert a batch of new disputes and their evidence in one transaction.
+
+    Each dispute is a dict with every one of IMPORT_COLUMNS and each evidence
+    item a dict of evidence columns. Rows go in with `executemany`; every
+    dispute gets its own change-sequence value and dispute_stats is updated
+    once per group. A dispute whose id already exists (archived ones
+    included), or that has an evidence id that exists, is skipped with its
+    evidence. Returns {dispute_id: reason} for the skipped ones.
+    """
+    async with _connect() as db:
+        await _execute(db, "BEGIN IMMEDIATE")
+        skipped = {
+            dispute_id: "a dispute with this id already exists"
+            for dispute_id in await _existing_ids(
+                db, ("disputes", "disputes_archive"), "id", [d['id'] for d in disputes]
+            )
+        }
+        taken = await _existing_ids(db, ("evidence", "evidence_archive"), "id", [e['id'] for e in evidence])
+        for item in evidence:
+            if item['id'] in taken:
+                skipped.setdefault(item['dispute_id'], f"evidence id {item['id']} already exists")
+        disputes = [d for d in disputes if d['id'] not in skipped]
+        evidence = [e for e in evidence if e['dispute_id'] not in skipped]
+
+        if disputes:
+            row = await _fetchone(
+                db, "UPDATE sync_sequence SET value = value + ? WHERE id = 1 RETURNING value", (len(disputes),)
+            )
+            first_version = row[0] - len(disputes) + 1
+            if _local_versions is not None:
+                _local_versions.update(range(first_version, row[0] + 1))
+            await _executemany(db, f"""
+                INSERT INTO disputes ({', '.join(IMPORT_COLUMNS)}, row_version)
+                VALUES ({', '.join('?' * (len(IMPORT_COLUMNS) + 1))})
+            """, [
+                (*_import_values(dispute), first_version + i)
+                for i, dispute in enumerate(disputes)
+            ])
+            if evidence:
+                await _executemany(db, f"""
+                    INSERT INTO evidence ({EVIDENCE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (e['id'], e['dispute_id'], e['type'], e['content'], e['submitted_by'], e['timestamp'],
+                     e.get('description'))
+                    for e in evidence
+                ])
+            groups: Dict[tuple, List[float]] = {}
+            for dispute in disputes:
+                totals = groups.setdefault(_stats_key(dispute), [0, 0.0])
+                totals[0] += 1
+                totals[1] += (dispute['stake_amount'] or 0) + (dispute['opponent_stake_amount'] or 0)
+            await _executemany(db, """
+                INSERT INTO dispute_stats (status, type, token, resolved_by, disputes, stake) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (status, type, token, resolved_by) DO UPDATE SET
+                    disputes = disputes + excluded.disputes,
+                    stake = stake + excluded.stake
+            """, [(*key, count, stake) for key, (count, stake) in groups.items()])
         await db.commit()
-        return evidence_data['id']
+
+    for dispute in disputes:
+        events.hub.publish(
+            events.DISPUTE_CREATED,
+            dispute['id'],
+            participants=(dispute['creator_id'], dispute['opponent_id'], dispute.get('validator_id')),
+            status=dispute['status'],
+            deadline=dispute.get('deadline'),
+        )
+    return skipped
 
 
+@_timed
 async def delete_dispute(dispute_id: str) -> bool:
-    """Delete a dispute and its evidence."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("DELETE FROM evidence WHERE dispute_id = ?", (dispute_id,))
-        await db.execute("DELETE FROM disputes WHERE id = ?", (dispute_id,))
+    """Delete a dispute and its evidence (from the archive if it has been archived)."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        for disputes, evidence in (("disputes", "evidence"), ("disputes_archive", "evidence_archive")):
+            await _execute(db, f"DELETE FROM {evidence} WHERE dispute_id = ?", (dispute_id,))
+            rows = await _fetchall(
+                db,
+                f"DELETE FROM {disputes} WHERE id = ? "
+                f"RETURNING creator_id, opponent_id, validator_id, {', '.join(STATS_COLUMNS)}",
+                (dispute_id,),
+            )
+            if rows:
+                break
+        if rows:
+            await _apply_stats(db, dict(rows[0]), -1)
+            await _execute(
+                db,
+                "INSERT OR REPLACE INTO dispute_tombstones (dispute_id, row_version, deleted_at) VALUES (?, ?, ?)",
+                (dispute_id, await _next_version(db), datetime.now().isoformat()),
+            )
         await db.commit()
-        return True
 
+    if rows:
+        events.hub.publish(events.DISPUTE_DELETED, dispute_id, participants=tuple(rows[0])[:3])
+    return True
+
+
+@_timed
+async def archive_resolved_disputes(
+    resolved_before: str,
+    limit: int,
+    wait_for_proofs: bool = True,
+    wait_for_payouts: bool = True,
+) -> int:
+    """Move up to `limit` disputes resolved before `resolved_before` (ISO time) to the archive.
+
+    Disputes and their evidence are copied to disputes_archive/evidence_archive
+    and deleted in one short transaction; dispute_stats and row_version are
+    left alone, since the disputes themselves do not change. With
+    `wait_for_proofs`/`wait_for_payouts`, disputes whose proof upload or
+    payout is still pending stay until it finishes. Returns how many disputes
+    were moved.
+    """
+    where = "status = 'Resolved' AND resolved_at < ?"
+    if wait_for_proofs:
+        where += " AND NOT EXISTS (SELECT 1 FROM proof_outbox WHERE dispute_id = disputes.id AND status = 'pending')"
+    if wait_for_payouts:
+        where += " AND (escrow_tx_id IS NULL OR decision_winner IS NULL OR payout_tx_id IS NOT NULL)"
+    async with _connect() as db:
+        # Take the write lock first, so the selected rows cannot change before they move
+        await _execute(db, "BEGIN IMMEDIATE")
+        ids = [row[0] for row in await _fetchall(
+            db, f"SELECT id FROM disputes WHERE {where} ORDER BY resolved_at LIMIT ?", (resolved_before, limit)
+        )]
+        if ids:
+            columns = ", ".join(row[1] for row in await _fetchall(db, "PRAGMA table_info(disputes)"))
+            placeholders = ", ".join("?" * len(ids))
+            archived_at = datetime.now().isoformat()
+            await _execute(db, f"""
+                INSERT OR REPLACE INTO disputes_archive ({columns}, archived_at)
+                SELECT {columns}, ? FROM disputes WHERE id IN ({placeholders})
+            """, (archived_at, *ids))
+            await _execute(db, f"""
+                INSERT OR REPLACE INTO evidence_archive ({EVIDENCE_COLUMNS}, archived_at)
+                SELECT {EVIDENCE_COLUMNS}, ? FROM evidence WHERE dispute_id IN ({placeholders})
+            """, (archived_at, *ids))
+            await _execute(db, f"DELETE FROM evidence WHERE dispute_id IN ({placeholders})", ids)
+            await _execute(db, f"DELETE FROM disputes WHERE id IN ({placeholders})", ids)
+        await db.commit()
+        return len(ids)
+
+
+@_timed
+async def incremental_vacuum(max_pages: int) -> int:
+    """Return up to `max_pages` free pages to the filesystem; returns how many were freed.
+
+    Does nothing unless the database uses auto_vacuum=INCREMENTAL.
+    """
+    async with _connect() as db:
+        if (await _fetchone(db, "PRAGMA auto_vacuum"))[0] != 2:
+            return 0
+        before = (await _fetchone(db, "PRAGMA freelist_count"))[0]
+        if before:
+            # The pragma frees one page per step and execute() steps only once;
+            # executescript() runs it to completion
+            await db.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        return before - (await _fetchone(db, "PRAGMA freelist_count"))[0]
+
+
+async def vacuum() -> None:
+    """Rebuild the database file, switching it to auto_vacuum=INCREMENTAL.
+
+    Needs exclusive access for the duration; run it during maintenance.
+    """
+    async with _connect() as db:
+        await _execute(db, "PRAGMA auto_vacuum=INCREMENTAL")
+        await _execute(db, "VACUUM")
+
+
+@_timed
+async def get_sync_version() -> int:
+    """Get the current value of the change sequence."""
+    async with _connect() as db:
+        return await _sync_version(db)
+
+
+@_timed
+async def get_pending_escrows() -> List[Dict[str, Any]]:
+    """Get id and escrow_tx_id of every dispute whose escrow is not confirmed yet."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        # The WHERE clause must match idx_disputes_pending_escrow literally
+        rows = await _fetchall(db, """
+            SELECT id, escrow_tx_id FROM disputes
+            WHERE escrow_tx_id IS NOT NULL AND funded_at IS NULL
+        """)
+        return [dict(row) for row in rows]
+
+
+@_timed
+async def get_escrow_changes(since: int) -> List[Dict[str, Any]]:
+    """Get escrow fields of disputes changed after change-sequence value `since`."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        rows = await _fetchall(
+            db,
+            "SELECT id, escrow_tx_id, funded_at, row_version FROM disputes "
+            "WHERE row_version > ? ORDER BY row_version",
+            (since,),
+        )
+        return [dict(row) for row in rows]
+
+
+@_timed
+async def get_chain_checkpoint(name: str) -> Optional[int]:
+    """Get the last block index a chain watcher has fully processed."""
+    async with _connect() as db:
+        row = await _fetchone(db, "SELECT block_index FROM chain_checkpoints WHERE name = ?", (name,))
+        return row[0] if row else None
+
+
+@_timed
+async def mark_escrows_funded(
+    fundings: Sequence[Dict[str, Any]],
+    checkpoint: Optional[str] = None,
+    block_index: Optional[int] = None,
+) -> List[str]:
+    """Record confirmed escrows and advance a chain checkpoint in one transaction.
+
+    Each funding is `{dispute_id, escrow_tx_id, funded_at}`; a dispute is only
+    updated while its escrow_tx_id still matches and funded_at is unset.
+    Returns the ids of the disputes that were updated.
+    """
+    funded = []
+    async with _connect() as db:
+        for funding in fundings:
+            rows = await _fetchall(db, """
+                UPDATE disputes SET funded_at = ?, row_version = ?
+                WHERE id = ? AND escrow_tx_id = ? AND funded_at IS NULL
+                RETURNING creator_id, opponent_id, validator_id, status, deadline
+            """, (funding['funded_at'], await _next_version(db), funding['dispute_id'], funding['escrow_tx_id']))
+            if rows:
+                funded.append((funding['dispute_id'], rows[0]))
+        if checkpoint is not None and block_index is not None:
+            await _execute(db, """
+                INSERT INTO chain_checkpoints (name, block_index, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    block_index = MAX(block_index, excluded.block_index),
+                    updated_at = excluded.updated_at
+            """, (checkpoint, block_index, datetime.now().isoformat()))
+        await db.commit()
+
+    for dispute_id, (creator_id, opponent_id, validator_id, status, deadline) in funded:
+        events.hub.publish(
+            events.DISPUTE_UPDATED,
+            dispute_id,
+            participants=(creator_id, opponent_id, validator_id),
+            status=status,
+            changed=['funded_at'],
+            deadline=deadline,
+        )
+    return [dispute_id for dispute_id, _ in funded]
+
+
+async def _enqueue_proof(db: aiosqlite.Connection, dispute_id: str) -> None:
+    """Add a NeoFS proof upload to the outbox inside the caller's transaction.
+
+    A dispute resolved again already has an entry; it is reset to a fresh
+    pending upload so the new decision gets its own proof.
+    """
+    now = datetime.now().isoformat()
+    await _execute(db, """
+        INSERT INTO proof_outbox (dispute_id, status, attempts, next_attempt_at, created_at, updated_at)
+        VALUES (?, 'pending', 0, ?, ?, ?)
+        ON CONFLICT (dispute_id) DO UPDATE SET
+            status = 'pending',
+            attempts = 0,
+            next_attempt_at = excluded.next_attempt_at,
+            last_error = NULL,
+            neofs_object_id = NULL,
+            updated_at = excluded.updated_at
+    """, (dispute_id, time.time(), now, now))
+
+
+@_timed
+async def enqueue_missing_proofs() -> int:
+    """Queue proof uploads for resolved disputes that have none (backfill)."""
+    now = datetime.now().isoformat()
+    async with _connect() as db:
+        cursor = await _execute(db, """
+            INSERT OR IGNORE INTO proof_outbox (dispute_id, status, attempts, next_attempt_at, created_at, updated_at)
+            SELECT id, 'pending', 0, ?, ?, ? FROM disputes
+            WHERE status = 'Resolved' AND neofs_object_id IS NULL
+        """, (time.time(), now, now))
+        await db.commit()
+        return cursor.rowcount
+
+
+@_timed
+async def claim_proof_uploads(limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+    """Claim up to `limit` due proof uploads.
+
+    Claiming pushes `next_attempt_at` forward by `lease_seconds`, so other
+    workers skip the rows while this one uploads them; if it dies, they
+    become due again when the lease runs out.
+    """
+    now = time.time()
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        rows = await _fetchall(db, """
+            UPDATE proof_outbox SET next_attempt_at = ?
+            WHERE dispute_id IN (
+                SELECT dispute_id FROM proof_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at LIMIT ?
+            )
+            RETURNING dispute_id, attempts
+        """, (now + lease_seconds, now, limit))
+        await db.commit()
+        return [dict(row) for row in rows]
+
+
+@_timed
+async def complete_proof_upload(dispute_id: str, neofs_object_id: str) -> None:
+    """Record an uploaded proof on the dispute and close its outbox entry."""
+    now = datetime.now().isoformat()
+    async with _connect() as db:
+        rows = await _fetchall(db, """
+            UPDATE disputes SET neofs_object_id = ?, row_version = ? WHERE id = ?
+            RETURNING creator_id, opponent_id, validator_id, status, deadline
+        """, (neofs_object_id, await _next_version(db), dispute_id))
+        await _execute(db, """
+            UPDATE proof_outbox SET status = 'done', neofs_object_id = ?, last_error = NULL, updated_at = ?
+            WHERE dispute_id = ?
+        """, (neofs_object_id, now, dispute_id))
+        await db.commit()
+
+    if rows:
+        creator_id, opponent_id, validator_id, status, deadline = rows[0]
+        events.hub.publish(
+            events.DISPUTE_UPDATED,
+            dispute_id,
+            participants=(creator_id, opponent_id, validator_id),
+            status=status,
+            changed=['neofs_object_id'],
+            deadline=deadline,
+        )
+
+
+@_timed
+async def fail_proof_upload(dispute_id: str, error: str, retry_at: Optional[float]) -> None:
+    """Record a failed upload; retry at `retry_at` (Unix time) or give up if None."""
+    async with _connect() as db:
+        await _execute(db, """
+            UPDATE proof_outbox SET
+                attempts = attempts + 1,
+                status = CASE WHEN ? IS NULL THEN 'failed' ELSE 'pending' END,
+                next_attempt_at = COALESCE(?, next_attempt_at),
+                last_error = ?,
+                updated_at = ?
+            WHERE dispute_id = ?
+        """, (retry_at, retry_at, error[:500], datetime.now().isoformat(), dispute_id))
+        await db.commit()
+
+
+@_timed
+async def get_proof_outbox_counts() -> Dict[str, int]:
+    """Count proof outbox entries by status."""
+    async with _connect() as db:
+        rows = await _fetchall(db, "SELECT status, COUNT(*) FROM proof_outbox GROUP BY status")
+        return {status: count for status, count in rows}
+
+
+@_timed
+async def get_payout_candidates(limit: int) -> List[Dict[str, Any]]:
+    """Get resolved disputes that still need an on-chain payout and are not in an open batch."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        # The WHERE clause must match idx_disputes_payout_due literally
+        rows = await _fetchall(db, """
+            SELECT id, decision_winner, neofs_object_id FROM disputes
+            WHERE status = 'Resolved' AND payout_tx_id IS NULL
+                AND escrow_tx_id IS NOT NULL AND decision_winner IS NOT NULL
+                AND NOT EXISTS (
+                    SELECT 1 FROM payout_batch_items i
+                    JOIN payout_batches b ON b.id = i.batch_id
+                    WHERE i.dispute_id = disputes.id AND b.status = 'pending'
+                )
+            ORDER BY resolved_at
+            LIMIT ?
+        """, (limit,))
+        return [dict(row) for row in rows]
+
+
+@_timed
+async def create_payout_batch(
+    tx_hash: str,
+    raw_tx: str,
+    valid_until_block: int,
+    system_fee: int,
+    network_fee: int,
+    dispute_ids: Sequence[str],
+) -> Optional[int]:
+    """Record a signed payout transaction and its disputes before it is sent.
+
+    Every server worker may run a payout batcher, so the check and the insert
+    share one `BEGIN IMMEDIATE` transaction: if any of the disputes was paid or
+    put in a pending batch since it was read as a candidate, nothing is
+    recorded and None is returned, and the transaction must not be sent.
+    """
+    now = datetime.now().isoformat()
+    async with _connect() as db:
+        await _execute(db, "BEGIN IMMEDIATE")
+        taken = await _fetchone(db, f"""
+            SELECT 1 FROM disputes
+            WHERE id IN ({', '.join('?' * len(dispute_ids))})
+                AND (payout_tx_id IS NOT NULL OR EXISTS (
+                    SELECT 1 FROM payout_batch_items i
+                    JOIN payout_batches b ON b.id = i.batch_id
+                    WHERE i.dispute_id = disputes.id AND b.status = 'pending'
+                ))
+            LIMIT 1
+        """, tuple(dispute_ids))
+        if taken:
+            await db.rollback()
+            return None
+        cursor = await _execute(db, """
+            INSERT INTO payout_batches (
+                tx_hash, raw_tx, status, valid_until_block, system_fee, network_fee, created_at, updated_at
+            ) VALUES (?, ?, 'pending', ?, ?, ?, ?, ?)
+        """, (tx_hash, raw_tx, valid_until_block, system_fee, network_fee, now, now))
+        batch_id = cursor.lastrowid
+        await _executemany(
+            db,
+            "INSERT INTO payout_batch_items (batch_id, dispute_id) VALUES (?, ?)",
+            [(batch_id, dispute_id) for dispute_id in dispute_ids],
+        )
+        await db.commit()
+        return batch_id
+
+
+@_timed
+async def get_pending_payout_batches() -> List[Dict[str, Any]]:
+    """Get payout batches whose transaction is not known to be confirmed or dead."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        rows = await _fetchall(db, """
+            SELECT b.id, b.tx_hash, b.raw_tx, b.valid_until_block, group_concat(i.dispute_id) AS dispute_ids
+            FROM payout_batches b JOIN payout_batch_items i ON i.batch_id = b.id
+            WHERE b.status = 'pending'
+            GROUP BY b.id
+        """)
+        return [{**dict(row), 'dispute_ids': row['dispute_ids'].split(',')} for row in rows]
+
+
+@_timed
+async def confirm_payout_batch(batch_id: int) -> List[str]:
+    """Set payout_tx_id on every dispute in a confirmed batch, in one transaction."""
+    now = datetime.now().isoformat()
+    async with _connect() as db:
+        rows = await _fetchall(db, """
+            UPDATE payout_batches SET status = 'confirmed', updated_at = ?
+            WHERE id = ? AND status = 'pending'
+            RETURNING tx_hash
+        """, (now, batch_id))
+        updated = []
+        if rows:
+            tx_hash = rows[0][0]
+            items = await _fetchall(db, "SELECT dispute_id FROM payout_batch_items WHERE batch_id = ?", (batch_id,))
+            for (dispute_id,) in items:
+                # One change-sequence value per dispute keeps delta-sync cursors exact
+                updated += await _fetchall(db, """
+                    UPDATE disputes SET payout_tx_id = ?, row_version = ?
+                    WHERE id = ? AND payout_tx_id IS NULL
+                    RETURNING id, creator_id, opponent_id, validator_id, status, deadline
+                """, (tx_hash, await _next_version(db), dispute_id))
+        await db.commit()
+
+    for dispute_id, creator_id, opponent_id, validator_id, status, deadline in updated:
+        events.hub.publish(
+            events.DISPUTE_UPDATED,
+            dispute_id,
+            participants=(creator_id, opponent_id, validator_id),
+            status=status,
+            changed=['payout_tx_id'],
+            deadline=deadline,
+        )
+    return [row[0] for row in updated]
+
+
+@_timed
+async def close_payout_batch(batch_id: int, status: str, error: Optional[str] = None) -> None:
+    """Mark a payout batch failed or expired, releasing its disputes for a new batch."""
+    async with _connect() as db:
+        await _execute(db, """
+            UPDATE payout_batches SET status = ?, error = ?, updated_at = ?
+            WHERE id = ? AND status = 'pending'
+        """, (status, error, datetime.now().isoformat(), batch_id))
+        await db.commit()
+
+
+@_timed
+async def claim_idempotency_key(
+    scope: str, key: str, request_hash: str, lock_seconds: float
+) -> Optional[Dict[str, Any]]:
+    """Claim an idempotency key for a new request.
+
+    Returns None if the key was free (it is now held as `in_progress` for
+    `lock_seconds`), otherwise the existing record: its request hash, status
+    and, once completed, the stored status code and response body. Expired
+    records are purged first, so a key held by a crashed request frees up.
+    """
+    now = time.time()
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        await _execute(db, "DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+        cursor = await _execute(db, """
+            INSERT INTO idempotency_keys (scope, key, request_hash, status, created_at, expires_at)
+            VALUES (?, ?, ?, 'in_progress', ?, ?)
+            ON CONFLICT (scope, key) DO NOTHING
+        """, (scope, key, request_hash, now, now + lock_seconds))
+        existing = None
+        if cursor.rowcount != 1:
+            existing = await _fetchone(db, """
+                SELECT request_hash, status, status_code, response FROM idempotency_keys
+                WHERE scope = ? AND key = ?
+            """, (scope, key))
+        await db.commit()
+        return dict(existing) if existing else None
+
+
+@_timed
+async def complete_idempotency_key(
+    scope: str, key: str, status_code: int, response: bytes, ttl_seconds: float
+) -> None:
+    """Store the response of a claimed key so retries replay it for `ttl_seconds`."""
+    async with _connect() as db:
+        await _execute(db, """
+            UPDATE idempotency_keys
+            SET status = 'completed', status_code = ?, response = ?, expires_at = ?
+            WHERE scope = ? AND key = ?
+        """, (status_code, response, time.time() + ttl_seconds, scope, key))
+        await db.commit()
+
+
+@_timed
+async def release_idempotency_key(scope: str, key: str) -> None:
+    """Drop a claimed key whose request failed, so a retry runs it again."""
+    async with _connect() as db:
+        await _execute(db, "DELETE FROM idempotency_keys WHERE scope = ? AND key = ? AND status = 'in_progress'", (scope, key))
+        await db.commit()
+
+
+LLM_CALL_COLUMNS = (
+    'dispute_id', 'dispute_type', 'tier', 'provider', 'model', 'prompt_tokens',
+    'completion_tokens', 'cost_usd', 'latency_ms', 'cache_hit', 'outcome', 'error',
+)
+_LLM_CALL_DEFAULTS = {'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0, 'latency_ms': 0.0, 'cache_hit': 0}
+# Columns GET /api/admin/llm-usage can group by
+LLM_USAGE_GROUPS = {'day': 'day', 'provider': 'provider', 'model': 'model', 'dispute_type': 'dispute_type', 'tier': 'tier'}
+
+
+@_timed
+async def record_llm_call(call: Dict[str, Any]) -> None:
+    """Append one LLM call (or cache hit / budget rejection) to llm_calls."""
+    now = datetime.now()
+    async with _connect() as db:
+        await _execute(db, f"""
+            INSERT INTO llm_calls ({', '.join(LLM_CALL_COLUMNS)}, day, created_at)
+            VALUES ({', '.join('?' for _ in LLM_CALL_COLUMNS)}, ?, ?)
+        """, (
+            *(call.get(column, _LLM_CALL_DEFAULTS.get(column)) for column in LLM_CALL_COLUMNS),
+            now.date().isoformat(),
+            now.isoformat(),
+        ))
+        await db.commit()
+
+
+@_timed
+async def get_llm_spend(dispute_id: Optional[str], day: str) -> Dict[str, float]:
+    """USD spent on LLM calls for one dispute and on one day."""
+    async with _connect() as db:
+        dispute_row = await _fetchone(
+            db, "SELECT COALESCE(SUM(cost_usd), 0) FROM llm_calls WHERE dispute_id = ?", (dispute_id,)
+        ) if dispute_id else (0.0,)
+        day_row = await _fetchone(db, "SELECT COALESCE(SUM(cost_usd), 0) FROM llm_calls WHERE day = ?", (day,))
+        return {"dispute": dispute_row[0], "day": day_row[0]}
+
+
+_LLM_USAGE_TOTALS = """
+    COUNT(*) AS calls,
+    SUM(prompt_tokens) AS prompt_tokens,
+    SUM(completion_tokens) AS completion_tokens,
+    ROUND(SUM(cost_usd), 6) AS cost_usd,
+    ROUND(AVG(CASE WHEN cache_hit = 0 AND outcome != 'rejected' THEN latency_ms END), 1) AS avg_latency_ms,
+    SUM(cache_hit) AS cache_hits,
+    SUM(outcome = 'error') AS errors,
+    SUM(outcome = 'rejected') AS rejected
+"""
+
+
+@_timed
+async def get_llm_usage(group_by: str, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Aggregate llm_calls by one of LLM_USAGE_GROUPS, optionally for days in [since, until]."""
+    column = LLM_USAGE_GROUPS[group_by]
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        rows = await _fetchall(db, f"""
+            SELECT {column} AS key, {_LLM_USAGE_TOTALS}
+            FROM llm_calls
+            WHERE day >= ? AND day <= ?
+            GROUP BY {column}
+            ORDER BY {column}
+        """, (since or '0000-00-00', until or '9999-99-99'))
+        return [dict(row) for row in rows]
+
+
+@_timed
+async def get_dispute_llm_calls(dispute_id: str) -> List[Dict[str, Any]]:
+    """Every recorded LLM call for a dispute, oldest first."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        rows = await _fetchall(db, f"""
+            SELECT {', '.join(LLM_CALL_COLUMNS)}, created_at FROM llm_calls
+            WHERE dispute_id = ? ORDER BY id
+        """, (dispute_id,))
+        return [dict(row) for row in rows]
+
+
+# A claim seeks the next entry in idx_disputes_review_queue for one validator_id
+# (or the unassigned pool), so its cost does not grow with the backlog
+_REVIEW_QUEUE_NEXT = """
+    SELECT id FROM disputes
+    WHERE status = 'In Review' AND validator_type = 'human'
+        AND validator_id {match} AND lease_expires_at <= ?
+    ORDER BY lease_expires_at, in_review_at LIMIT 1
+"""
+
+
+@_timed
+async def claim_review(validator_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+    """Lease the next human-review dispute to `validator_id`.
+
+    Disputes assigned to the validator come before unassigned ones. Within
+    each, never-claimed and released disputes come first (oldest review
+    first), then those whose lease ran out. Returns the leased dispute, or
+    None when nothing is waiting.
+    """
+    now = time.time()
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        row = await _fetchone(db, f"""
+            UPDATE disputes SET lease_owner = ?, lease_expires_at = ?
+            WHERE id = COALESCE(({_REVIEW_QUEUE_NEXT.format(match='= ?')}), ({_REVIEW_QUEUE_NEXT.format(match='IS NULL')}))
+            RETURNING *
+        """, (validator_id, now + lease_seconds, validator_id, now, now))
+        await db.commit()
+        return dict(row) if row else None
+
+
+@_timed
+async def renew_review_lease(dispute_id: str, validator_id: str, lease_seconds: float) -> Optional[float]:
+    """Extend a lease held by `validator_id`; returns the new expiry, or None if it is not theirs."""
+    async with _connect() as db:
+        row = await _fetchone(db, """
+            UPDATE disputes SET lease_expires_at = ?
+            WHERE id = ? AND lease_owner = ? AND status = 'In Review' AND validator_type = 'human'
+            RETURNING lease_expires_at
+        """, (time.time() + lease_seconds, dispute_id, validator_id))
+        await db.commit()
+        return row[0] if row else None
+
+
+@_timed
+async def release_review_lease(dispute_id: str, validator_id: str) -> bool:
+    """Give a leased dispute back to the queue at its original place."""
+    async with _connect() as db:
+        cursor = await _execute(db, """
+            UPDATE disputes SET lease_owner = NULL, lease_expires_at = 0
+            WHERE id = ? AND lease_owner = ? AND status = 'In Review' AND validator_type = 'human'
+        """, (dispute_id, validator_id))
+        await db.commit()
+        return cursor.rowcount > 0
@@ -0,0 +1,124 @@
+"""In-process pub/sub hub for dispute change events.
+
+`database.py` publishes a compact event after every committed write; the
+SSE/WebSocket endpoints in `api/events.py` subscribe to it, and background
+services register synchronous listeners. Publishing never
+blocks: each subscriber has a bounded buffer, and when a slow client lets it
+fill up the oldest events are dropped and the client is told to resync.
+
+The hub lives in one process. With several server workers, each worker's
+`services.ChangeTail` publishes the writes made by the other workers from the
+shared change sequence, so a client sees every change whichever worker it
+is connected to (those arrive up to EVENT_TAIL_SECONDS later).
+"""
+import asyncio
+import itertools
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DISPUTE_CREATED = "dispute.created"
+DISPUTE_UPDATED = "dispute.updated"
+DISPUTE_RESOLVED = "dispute.resolved"
+DISPUTE_DELETED = "dispute.deleted"
+EVIDENCE_ADDED = "evidence.added"
+# Sent to a subscriber whose buffer overflowed; it should refetch its disputes
+RESYNC = "resync"
+
+
+class Subscription:
+    """A single client's view of the event stream."""
+
+    def __init__(self, dispute_id: Optional[str], user_id: Optional[str], buffer_size: int) -> None:
+        self.dispute_id = dispute_id
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def matches(self, event: Dict[str, Any], participants: Set[str]) -> bool:
+        if self.dispute_id is not None and event["dispute_id"] != self.dispute_id:
+            return False
+        if self.user_id is not None and self.user_id not in participants:
+            return False
+        return True
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Queue an event without blocking, dropping the oldest ones if the buffer is full."""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait({"seq": event["seq"], "type": RESYNC, "dropped": self.dropped})
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+
+class EventHub:
+    """Fan-out of dispute change events to subscribers."""
+
+    def __init__(self) -> None:
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._seq = itertools.count(1)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(
+        self,
+        dispute_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        buffer_size: Optional[int] = None,
+    ) -> Subscription:
+        subscription = Subscription(dispute_id, user_id, buffer_size or settings.EVENT_BUFFER_SIZE)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call `listener(event)` synchronously for every event (in-process consumers)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def publish(
+        self,
+        event_type: str,
+        dispute_id: str,
+        participants: Iterable[Optional[str]] = (),
+        **fields: Any,
+    ) -> None:
+        """Publish an event to every matching subscriber (must run on the event loop)."""
+        if not self._subscribers and not self._listeners:
+            return
+        event = {
+            "seq": next(self._seq),
+            "type": event_type,
+            "dispute_id": dispute_id,
+            "at": datetime.now().isoformat(),
+            **fields,
+        }
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Event listener %r failed", listener)
+        members = {p for p in participants if p}
+        for subscription in list(self._subscribers):
+            if subscription.matches(event, members):
+                subscription.offer(event)
+
+
+hub = EventHub()
@@ -1,12 +1,37 @@
 """Main entry point for the SpoonOS backend server."""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
 from config import settings
+from agents import warm_up as warm_up_agents
 from api import router
+from api.disputes import auto_resolve, handle_deadline
+from chain import close_neo_client
+from compression import CompressionMiddleware
+from observability import (
+    CONTENT_TYPE_LATEST,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    SnapshotWriter,
+    render_latest,
+    render_workers,
+)
+from services import Archiver, ChangeTail, DeadlineScheduler, EscrowWatcher, PayoutBatcher, ProofUploader, resolution_queue
 import database as db
 
+logger = logging.getLogger(__name__)
+
 # Create FastAPI application
 app = FastAPI(
     title="SettleIt SpoonOS Backend",
@@ -23,6 +48,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli/gzip for large list and analysis payloads (streams flush per chunk)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
+# Opt-in request profiling; not installed at all unless enabled
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.PROFILING_OUTPUT_DIR,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval=settings.PROFILING_INTERVAL_MS / 1000,
+    )
+
+# Record per-route latency and in-flight requests (outermost, so it times CORS too)
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(router)
 
@@ -31,6 +77,66 @@ app.include_router(router)
 async def startup_event():
     """Initialize database on startup."""
     await db.init_db()
+    await resolution_queue.start(auto_resolve)
+
+    if settings.METRICS_DIR:
+        app.state.metrics_snapshot = SnapshotWriter(settings.METRICS_DIR, settings.METRICS_SNAPSHOT_SECONDS)
+        await app.state.metrics_snapshot.start()
+
+    if settings.EVENT_TAIL_ENABLED:
+        app.state.change_tail = ChangeTail()
+        await app.state.change_tail.start()
+
+    if settings.DEADLINE_SCHEDULER_ENABLED:
+        app.state.deadline_scheduler = DeadlineScheduler(on_due=handle_deadline)
+        await app.state.deadline_scheduler.start()
+
+    if settings.ESCROW_WATCHER_ENABLED:
+        if settings.NEO_ESCROW_CONTRACT_HASH:
+            app.state.escrow_watcher = EscrowWatcher()
+            await app.state.escrow_watcher.start()
+        else:
+            logger.warning("ESCROW_WATCHER_ENABLED is set but NEO_ESCROW_CONTRACT_HASH is empty")
+
+    if settings.NEOFS_GATEWAY_URL and settings.NEOFS_CONTAINER_ID:
+        app.state.proof_uploader = ProofUploader()
+        await app.state.proof_uploader.start()
+
+    if settings.PAYOUT_BATCHER_ENABLED:
+        if settings.NEO_ESCROW_CONTRACT_HASH and settings.NEO_ORACLE_WIF:
+            app.state.payout_batcher = PayoutBatcher()
+            await app.state.payout_batcher.start()
+        else:
+            logger.warning("PAYOUT_BATCHER_ENABLED is set but NEO_ESCROW_CONTRACT_HASH or NEO_ORACLE_WIF is empty")
+
+    if settings.ARCHIVE_ENABLED:
+        app.state.archiver = Archiver()
+        await app.state.archiver.start()
+
+    if settings.AGENT_WARMUP:
+        # Import the SpoonOS/LLM stack in a worker thread so the server starts
+        # accepting traffic immediately and the first AI call is still fast.
+        app.state.agent_warmup = asyncio.get_running_loop().run_in_executor(None, warm_up_agents)
+        app.state.agent_warmup.add_done_callback(_log_warmup_result)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background services."""
+    for name in (
+        "metrics_snapshot", "change_tail", "deadline_scheduler", "escrow_watcher",
+        "proof_uploader", "payout_batcher", "archiver",
+    ):
+        service = getattr(app.state, name, None)
+        if service is not None:
+            await service.stop()
+    await resolution_queue.stop()
+    await close_neo_client()
+
+
+def _log_warmup_result(future: asyncio.Future) -> None:
+    if future.exception() is not None:
+        logger.warning("Agent warm-up failed: %s", future.exception())
 
 
 @app.get("/")
@@ -50,6 +156,22 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint for HTTP, database and LLM metrics.
+
+    Every sample has a `worker` label; with METRICS_DIR set the other workers'
+    latest snapshots are included.
+    """
+    if settings.METRICS_DIR:
+        content = await asyncio.to_thread(
+            render_workers, settings.METRICS_DIR, 3 * settings.METRICS_SNAPSHOT_SECONDS
+        )
+    else:
+        content = render_latest()
+    return Response(content=content, media_type=CONTENT_TYPE_LATEST)
+
+
 def start_server():
     """Start the uvicorn server."""
     uvicorn.run(
@@ -60,5 +182,52 @@ def start_server():
     )
 
 
+def default_worker_count() -> int:
+    """Worker processes for production: WEB_CONCURRENCY, else one per CPU."""
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    return os.cpu_count() or 1
+
+
+def start_production_server(workers: int | None = None):
+    """Start uvicorn with multiple worker processes and no reloader.
+
+    uvloop and httptools are used when installed (`uvicorn[standard]`). On
+    SIGTERM each worker stops accepting connections and waits up to
+    SHUTDOWN_DRAIN_SECONDS for in-flight requests, such as AI resolves, to finish.
+    """
+    workers = workers or default_worker_count()
+    metrics_dir = None
+    if workers > 1 and not settings.METRICS_DIR:
+        # Workers inherit the environment, so they all share this directory
+        metrics_dir = tempfile.mkdtemp(prefix="settleit-metrics-")
+        os.environ["METRICS_DIR"] = settings.METRICS_DIR = metrics_dir
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    try:
+        uvicorn.run(
+            "main:app",
+            app_dir=str(Path(__file__).parent),
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            workers=workers,
+            loop=loop,
+            http=http,
+            access_log=False,
+            timeout_graceful_shutdown=settings.SHUTDOWN_DRAIN_SECONDS,
+        )
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
 if __name__ == "__main__":
-    start_server()
+    parser = argparse.ArgumentParser(description="Run the SettleIt backend server.")
+    parser.add_argument("--prod", action="store_true", help="multi-worker production mode")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    if args.prod:
+        start_production_server(args.workers)
+    else:
+        start_server()
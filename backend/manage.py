@@ -0,0 +1,78 @@
+"""
+Maintenance commands for the SettleIt database.
+Run with: python manage.py rebuild-stats | archive | vacuum | import FILE
+"""
+import argparse
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+import database as db
+from api.imports import FORMATS, run_import
+from services import Archiver
+
+
+async def rebuild_stats() -> int:
+    await db.init_db()
+    drift = await db.rebuild_dispute_stats()
+    for group in drift:
+        print(json.dumps(group))
+    print(f"dispute_stats rebuilt; {len(drift)} group(s) differed from the incremental totals")
+    return 1 if drift else 0
+
+
+async def archive() -> int:
+    await db.init_db()
+    archived = await Archiver().run_once()
+    print(f"Archived {archived} disputes")
+    return 0
+
+
+async def vacuum() -> int:
+    await db.init_db()
+    await db.vacuum()
+    print("Database rebuilt with auto_vacuum=INCREMENTAL")
+    return 0
+
+
+async def import_file(path: str, fmt: Optional[str], batch_size: Optional[int]) -> int:
+    async def lines() -> AsyncIterator[str]:
+        with open(path, encoding="utf-8", newline="") as f:
+            for line in f:
+                yield line.rstrip("\r\n")
+
+    await db.init_db()
+    report = await run_import(lines(), fmt or ("csv" if path.endswith(".csv") else "ndjson"), batch_size)
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SettleIt database maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "rebuild-stats",
+        help="recompute dispute_stats from the disputes table and report any drift (exit status 1 if any)",
+    )
+    commands.add_parser("archive", help="archive resolved disputes past ARCHIVE_AFTER_DAYS now")
+    commands.add_parser(
+        "vacuum",
+        help="rebuild the database file with incremental auto-vacuum (needs exclusive access)",
+    )
+    import_parser = commands.add_parser(
+        "import",
+        help="bulk-import disputes from an NDJSON or CSV file (exit status 1 if any row failed)",
+    )
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    import_parser.add_argument("--batch-size", type=int, help="disputes per transaction (default: IMPORT_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    if args.command == "rebuild-stats":
+        raise SystemExit(asyncio.run(rebuild_stats()))
+    if args.command == "archive":
+        raise SystemExit(asyncio.run(archive()))
+    if args.command == "vacuum":
+        raise SystemExit(asyncio.run(vacuum()))
+    if args.command == "import":
+        raise SystemExit(asyncio.run(import_file(args.path, args.format, args.batch_size)))
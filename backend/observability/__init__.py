@@ -0,0 +1,15 @@
+"""Instrumentation for the SettleIt backend (metrics, tracing)."""
+from .metrics import CONTENT_TYPE_LATEST, REGISTRY, render_latest
+from .middleware import MetricsMiddleware
+from .multiprocess import SnapshotWriter, render_workers
+from .profiling import ProfilingMiddleware
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "REGISTRY",
+    "render_latest",
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "SnapshotWriter",
+    "render_workers",
+]
@@ -0,0 +1,310 @@
+"""Minimal Prometheus-compatible metrics registry.
+
+Instruments are plain in-process objects so recording a sample costs a dict
+lookup and a couple of additions. The registry renders everything in the
+Prometheus text exposition format (version 0.0.4) for the `/metrics` endpoint,
+with a `worker` label (the process id) on every sample so the output of
+several worker processes can be merged (see `observability.multiprocess`).
+"""
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets (seconds) covering fast DB statements up to slow LLM calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(label for label in extra if label)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def worker_label() -> str:
+    """The `worker` label identifying this process's samples."""
+    return f'worker="{os.getpid()}"'
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    """Base class for a labelled metric family."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for the given label values, creating it on first use."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self, extra: str = "") -> List[str]:
+        raise NotImplementedError
+
+    def render(self, extra: str = "") -> List[str]:
+        """HELP/TYPE lines and samples, with `extra` (e.g. `worker_label()`) on each sample."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples(extra))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self, extra: str = "") -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, extra)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down (e.g. in-flight requests)."""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != float("inf")))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self, extra: str = "") -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, extra, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key, extra)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every registered metric in Prometheus text format, labelled with this worker."""
+        extra = worker_label()
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render(extra))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP
+HTTP_REQUESTS = REGISTRY.counter(
+    "settleit_http_requests_total",
+    "Total HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "settleit_http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "settleit_http_requests_in_flight",
+    "HTTP requests currently being served.",
+    ("method",),
+)
+
+# Database
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "settleit_db_query_duration_seconds",
+    "Latency of database.py operations.",
+    ("operation",),
+)
+DB_QUERY_ERRORS = REGISTRY.counter(
+    "settleit_db_query_errors_total",
+    "Database operations that raised an exception.",
+    ("operation",),
+)
+DB_GROUP_COMMIT_SIZE = REGISTRY.histogram(
+    "settleit_db_group_commit_writes",
+    "Writes coalesced into one group commit.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+DB_GROUP_COMMIT_WAIT = REGISTRY.histogram(
+    "settleit_db_group_commit_wait_seconds",
+    "Time from queueing a write to its group commit completing.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+# LLM
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    "settleit_llm_request_duration_seconds",
+    "Latency of LLM calls made by the dispute agent.",
+    ("provider", "model", "outcome"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "settleit_llm_tokens_total",
+    "LLM tokens consumed, split into prompt and completion.",
+    ("provider", "model", "kind"),
+)
+LLM_ERRORS = REGISTRY.counter(
+    "settleit_llm_errors_total",
+    "LLM calls that failed, by provider and exception type.",
+    ("provider", "error"),
+)
+LLM_COST = REGISTRY.counter(
+    "settleit_llm_cost_usd_total",
+    "Estimated LLM spend in USD from token usage and LLM_PRICES.",
+    ("provider", "model"),
+)
+LLM_BUDGET = REGISTRY.counter(
+    "settleit_llm_budget_exceeded_total",
+    "Analyses over an LLM budget, by budget (dispute, day) and action (downgraded, rejected).",
+    ("budget", "action"),
+)
+LLM_CASCADE = REGISTRY.counter(
+    "settleit_llm_cascade_total",
+    "Model cascade steps by tier and outcome (accepted, escalated, error, skipped_stake).",
+    ("tier", "outcome"),
+)
+
+
+def render_latest() -> str:
+    """Render the default registry."""
+    return REGISTRY.render()
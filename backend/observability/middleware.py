@@ -0,0 +1,50 @@
+"""ASGI middleware recording per-route request metrics."""
+import time
+
+from .metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """Return the route template (e.g. `/api/disputes/{dispute_id}`) for a handled request."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; avoids the per-request overhead of BaseHTTPMiddleware.
+
+    The route label uses the matched route template rather than the raw path so
+    dispute ids do not explode the label cardinality.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
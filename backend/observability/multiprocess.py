@@ -0,0 +1,97 @@
+"""Metrics across worker processes.
+
+Each `--prod` worker has its own registry, and a scrape of the shared port
+reaches whichever worker accepts the connection. With a metrics directory
+(`METRICS_DIR`), every worker writes its rendered metrics to `<pid>.prom` there
+every few seconds, and `/metrics` merges its own live samples with the other
+workers' snapshots. Samples carry a `worker` label, so one scrape returns every
+worker's series and `sum by (...)` aggregates them. A snapshot that has not
+been refreshed for three intervals belongs to a worker that exited and is left
+out.
+"""
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+def merge_expositions(texts: Iterable[str]) -> str:
+    """Merge Prometheus text outputs into one, grouping each family's samples together."""
+    families: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    for text in texts:
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                name = line.split(" ", 3)[2]
+                # HELP/TYPE are kept from the first output that has the family
+                if name not in families:
+                    families[name] = [line]
+                elif line.startswith("# TYPE ") and len(families[name]) == 1:
+                    families[name].append(line)
+                current = families[name]
+            elif line and current is not None:
+                current.append(line)
+    return "\n".join(line for lines in families.values() for line in lines) + "\n"
+
+
+def render_workers(directory: str, max_age: float) -> str:
+    """This worker's live metrics merged with the other workers' recent snapshots."""
+    texts = [REGISTRY.render()]
+    own = f"{os.getpid()}.prom"
+    cutoff = time.time() - max_age
+    for path in Path(directory).glob("*.prom"):
+        if path.name == own:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                continue
+            texts.append(path.read_text())
+        except FileNotFoundError:
+            # The worker removed it on shutdown
+            continue
+    return merge_expositions(texts)
+
+
+class SnapshotWriter:
+    """Periodically writes this worker's metrics to `<directory>/<pid>.prom`."""
+
+    def __init__(self, directory: str, interval_seconds: float) -> None:
+        self.directory = Path(directory)
+        self.interval_seconds = interval_seconds
+        self.path = self.directory / f"{os.getpid()}.prom"
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.write_once()
+        self._task = asyncio.create_task(self._run(), name="metrics-snapshot")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.path.unlink(missing_ok=True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                self.write_once()
+            except OSError:
+                logger.exception("Writing the metrics snapshot failed")
+
+    def write_once(self) -> None:
+        """Replace the snapshot atomically, so readers never see a partial file."""
+        partial = self.path.with_suffix(".tmp")
+        partial.write_text(REGISTRY.render())
+        os.replace(partial, self.path)
@@ -0,0 +1,125 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when it carries the `X-Profile` header with the
+configured token, or when it falls into the sampled fraction of traffic.
+Profiling uses a wall-clock sampling profiler: a background thread snapshots
+the event-loop thread's stack at a fixed interval and the result is written
+as collapsed stacks (`frame;frame;frame count`), which flamegraph.pl and
+speedscope both read directly.
+
+Since the handler shares its event loop with other requests, samples taken
+while it is awaiting may include frames of concurrent requests.
+"""
+import asyncio
+import hmac
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from .middleware import route_template
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_") or "root"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests.
+
+    Only installed when `PROFILING_ENABLED` is set, so it costs nothing when off.
+    """
+
+    def __init__(
+        self,
+        app,
+        output_dir: str,
+        token: str = "",
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+    ) -> None:
+        self.app = app
+        self.output_dir = Path(output_dir)
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.interval = interval
+
+    def _should_profile(self, scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        started_at = time.time()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stacks = sampler.stop()
+            dispute_id: Optional[str] = scope.get("path_params", {}).get("dispute_id")
+            await asyncio.to_thread(
+                self._write, stacks, scope["method"], route_template(scope), dispute_id, started_at
+            )
+
+    def _write(
+        self,
+        stacks: Counter,
+        method: str,
+        route: str,
+        dispute_id: Optional[str],
+        started_at: float,
+    ) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(started_at))
+        name = f"{stamp}_{int(started_at * 1000) % 1000:03d}_{method}_{_slug(route)}"
+        if dispute_id:
+            name += f"_{_slug(dispute_id)}"
+        path = self.output_dir / f"{name}.collapsed"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+        logger.info("Wrote request profile %s (%d samples)", path, sum(stacks.values()))
@@ -0,0 +1,14 @@
+"""Background services for the SettleIt backend."""
+from .archive import Archiver
+from .changes import ChangeTail
+from .deadlines import DeadlineScheduler
+from .escrow import EscrowWatcher
+from .payouts import PayoutBatcher
+from .precedents import PrecedentIndex, precedent_index
+from .proofs import ProofUploader
+from .resolution import ResolutionQueue, resolution_queue
+
+__all__ = [
+    "Archiver", "ChangeTail", "DeadlineScheduler", "EscrowWatcher", "PayoutBatcher", "PrecedentIndex", "ProofUploader",
+    "ResolutionQueue", "precedent_index", "resolution_queue",
+]
@@ -0,0 +1,92 @@
+"""Archival of long-resolved disputes.
+
+Resolved disputes are only ever read by id, yet they stay in `disputes` and
+`evidence` and make every scan and index over the active ones larger.
+`Archiver` moves disputes resolved more than `ARCHIVE_AFTER_DAYS` ago, with
+their evidence, to `disputes_archive` and `evidence_archive` in batches of
+`ARCHIVE_BATCH_SIZE`. Each batch is its own short write transaction, so other
+writers get in between. When NeoFS proofs or oracle payouts are enabled, a
+dispute is only archived once its proof is uploaded and its payout confirmed. `get_dispute_by_id` and `get_evidence_by_dispute`
+fall back to the archive, so archived disputes stay reachable by id.
+
+After each pass, up to `ARCHIVE_VACUUM_PAGES` freed pages are returned to the
+filesystem with `PRAGMA incremental_vacuum`.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+import database as db
+from config import settings
+from observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_DISPUTES = REGISTRY.counter(
+    "settleit_archived_disputes_total",
+    "Resolved disputes moved to the archive tables.",
+)
+VACUUMED_PAGES = REGISTRY.counter(
+    "settleit_vacuumed_pages_total",
+    "Free database pages returned to the filesystem by incremental vacuum.",
+)
+
+
+class Archiver:
+    """Periodically moves disputes resolved long ago to the archive tables."""
+
+    def __init__(
+        self,
+        after_days: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        interval_seconds: Optional[float] = None,
+    ) -> None:
+        self.after_days = after_days if after_days is not None else settings.ARCHIVE_AFTER_DAYS
+        self.batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        self.interval_seconds = interval_seconds or settings.ARCHIVE_INTERVAL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="archiver")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Archive pass failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self) -> int:
+        """Archive every eligible dispute, batch by batch, then vacuum; returns disputes moved."""
+        cutoff = (datetime.now() - timedelta(days=self.after_days)).isoformat()
+        archived = 0
+        while True:
+            moved = await db.archive_resolved_disputes(
+                cutoff,
+                self.batch_size,
+                wait_for_proofs=bool(settings.NEOFS_GATEWAY_URL and settings.NEOFS_CONTAINER_ID),
+                wait_for_payouts=settings.PAYOUT_BATCHER_ENABLED,
+            )
+            archived += moved
+            ARCHIVED_DISPUTES.inc(moved)
+            if moved < self.batch_size:
+                break
+            await asyncio.sleep(settings.ARCHIVE_BATCH_PAUSE_SECONDS)
+        if settings.ARCHIVE_VACUUM_PAGES > 0:
+            VACUUMED_PAGES.inc(await db.incremental_vacuum(settings.ARCHIVE_VACUUM_PAGES))
+        if archived:
+            logger.info("Archived %d disputes resolved before %s", archived, cutoff)
+        return archived
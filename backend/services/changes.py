@@ -0,0 +1,91 @@
+"""Change tail: carries writes made by other worker processes into this one.
+
+The event hub (`events.hub`) only hears writes made in its own process. With
+several server workers, `ChangeTail` polls the shared change sequence
+(`row_version`, the same one behind `GET /api/disputes/changes`) every
+`EVENT_TAIL_SECONDS` and publishes every change this process did not make
+itself: a `dispute.updated` event with the dispute's current status and
+deadline, or `dispute.deleted`. Those events carry `remote: true` and no
+`changed` list, so clients refetch the dispute. A deletion only reaches
+subscribers following that dispute id (a tombstone does not record the
+participants). Writes from other processes, such as `manage.py import`, are
+picked up the same way.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+import database as db
+import events
+from config import settings
+from observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CHANGE_TAIL_EVENTS = REGISTRY.counter(
+    "settleit_change_tail_events_total",
+    "Changes made by other processes and published to this worker's event hub.",
+)
+
+
+class ChangeTail:
+    """Publishes other processes' dispute changes to this process's event hub."""
+
+    def __init__(self, poll_seconds: Optional[float] = None, batch_size: int = 500) -> None:
+        self.poll_seconds = poll_seconds or settings.EVENT_TAIL_SECONDS
+        self.batch_size = batch_size
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start following the change sequence from its current value."""
+        # Track before reading the cursor, so no write of ours falls in between
+        db.track_local_versions()
+        self._cursor = await db.get_sync_version()
+        self._task = asyncio.create_task(self._run(), name="change-tail")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change tail pass failed")
+            await asyncio.sleep(self.poll_seconds)
+
+    async def run_once(self) -> int:
+        """Publish changes since the last pass that other processes made; returns how many."""
+        published = 0
+        while True:
+            changes, has_more = await db.get_change_log_since(self._cursor, self.batch_size)
+            if not changes:
+                return published
+            self._cursor = changes[-1][0]
+            local = db.pop_local_versions(self._cursor)
+            remote = [(version, change) for version, change in changes if version not in local]
+            for version, change in remote:
+                if isinstance(change, str):
+                    events.hub.publish(events.DISPUTE_DELETED, change, remote=True)
+                else:
+                    events.hub.publish(
+                        events.DISPUTE_UPDATED,
+                        change['id'],
+                        participants=(change['creator_id'], change['opponent_id'], change['validator_id']),
+                        status=change['status'],
+                        deadline=change['deadline'],
+                        remote=True,
+                    )
+            published += len(remote)
+            CHANGE_TAIL_EVENTS.inc(len(remote))
+            if not has_more:
+                return published
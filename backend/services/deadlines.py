@@ -0,0 +1,137 @@
+"""Deadline scheduler for Promise disputes.
+
+Pending deadlines live in a min-heap ordered by due time. A single task
+sleeps until the earliest one and fires it; new or changed deadlines arrive
+through the event hub as `database.py` commits them. On startup the heap is
+rebuilt from one indexed query (`database.get_open_deadlines`).
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import database as db
+import events
+from observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEADLINES_SCHEDULED = REGISTRY.gauge(
+    "settleit_deadlines_scheduled",
+    "Dispute deadlines currently held by the scheduler.",
+)
+DEADLINES_FIRED = REGISTRY.counter(
+    "settleit_deadlines_fired_total",
+    "Dispute deadlines that fired, by outcome.",
+    ("outcome",),
+)
+DEADLINE_LAG = REGISTRY.histogram(
+    "settleit_deadline_fire_lag_seconds",
+    "Delay between a deadline and its handler starting.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 60.0, 3600.0),
+)
+
+
+def parse_deadline(value: Optional[str]) -> Optional[float]:
+    """Parse an ISO deadline to a Unix timestamp (naive values are local time)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        logger.warning("Ignoring unparseable deadline %r", value)
+        return None
+
+
+class DeadlineScheduler:
+    """Fires `on_due(dispute_id)` when a dispute's deadline passes."""
+
+    def __init__(self, on_due: Callable[[str], Awaitable[Any]]) -> None:
+        self.on_due = on_due
+        self._heap: List[Tuple[float, str]] = []
+        # dispute id -> currently scheduled due time; heap entries that no
+        # longer match are stale and skipped when popped
+        self._due: Dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, dispute_id: str, deadline: Optional[str]) -> None:
+        """Schedule (or reschedule) a dispute; a missing deadline cancels it."""
+        due = parse_deadline(deadline)
+        if due is None:
+            self.cancel(dispute_id)
+            return
+        if self._due.get(dispute_id) == due:
+            return
+        self._due[dispute_id] = due
+        heapq.heappush(self._heap, (due, dispute_id))
+        DEADLINES_SCHEDULED.set(len(self._due))
+        if self._heap[0] == (due, dispute_id):
+            self._wakeup.set()
+
+    def cancel(self, dispute_id: str) -> None:
+        if self._due.pop(dispute_id, None) is not None:
+            DEADLINES_SCHEDULED.set(len(self._due))
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        dispute_id = event["dispute_id"]
+        if event["type"] == events.DISPUTE_DELETED:
+            self.cancel(dispute_id)
+        elif event["type"] in (events.DISPUTE_CREATED, events.DISPUTE_UPDATED, events.DISPUTE_RESOLVED):
+            if event.get("status") in db.DEADLINE_OPEN_STATUSES:
+                self.schedule(dispute_id, event.get("deadline"))
+            else:
+                self.cancel(dispute_id)
+
+    async def start(self) -> None:
+        """Recover pending deadlines and start the timer task."""
+        events.hub.add_listener(self._on_event)
+        for row in await db.get_open_deadlines():
+            self.schedule(row["id"], row["deadline"])
+        logger.info("Deadline scheduler started with %d pending deadlines", len(self))
+        self._task = asyncio.create_task(self._run(), name="deadline-scheduler")
+
+    async def stop(self) -> None:
+        events.hub.remove_listener(self._on_event)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, dispute_id = heapq.heappop(self._heap)
+                if self._due.get(dispute_id) != due:
+                    continue  # rescheduled or cancelled
+                del self._due[dispute_id]
+                DEADLINES_SCHEDULED.set(len(self._due))
+                DEADLINE_LAG.observe(now - due)
+                task = asyncio.create_task(self._fire(dispute_id))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, dispute_id: str) -> None:
+        try:
+            fired = await self.on_due(dispute_id)
+            DEADLINES_FIRED.labels("transitioned" if fired else "skipped").inc()
+        except Exception:
+            DEADLINES_FIRED.labels("error").inc()
+            logger.exception("Deadline handler failed for dispute %s", dispute_id)
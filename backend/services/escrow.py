@@ -0,0 +1,177 @@
+"""Escrow confirmation watcher.
+
+Follows new Neo blocks and records `funded_at` for disputes whose
+`escrow_tx_id` was confirmed by the escrow contract. Pending escrow
+transactions are held in an in-memory index (tx hash -> dispute id), so a
+block only costs application-log lookups for the transactions we are waiting
+for. The index is kept current from the change sequence (`row_version`), which
+also picks up escrow ids written by other workers.
+
+Each tick applies every confirmed escrow and the new last-processed block in
+one transaction, so a restart resumes from the checkpoint without missing or
+repeating work. Transactions confirmed before their escrow_tx_id reached the
+database are caught by checking new index entries directly.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+import database as db
+from chain import NeoRpcClient, get_neo_client, normalize_hash
+from config import settings
+from observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = "escrow_watcher"
+
+ESCROW_PENDING = REGISTRY.gauge(
+    "settleit_escrow_pending",
+    "Escrow transactions the watcher is waiting to see confirmed.",
+)
+ESCROW_FUNDED = REGISTRY.counter(
+    "settleit_escrow_funded_total",
+    "Disputes marked funded by the escrow watcher.",
+)
+ESCROW_LAST_BLOCK = REGISTRY.gauge(
+    "settleit_escrow_last_block",
+    "Last block index fully processed by the escrow watcher.",
+)
+ESCROW_TICK_DURATION = REGISTRY.histogram(
+    "settleit_escrow_tick_seconds",
+    "Time taken by one escrow watcher pass.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class EscrowWatcher:
+    """Marks disputes funded when their escrow transaction is confirmed on chain."""
+
+    def __init__(
+        self,
+        client: Optional[NeoRpcClient] = None,
+        contract_hash: Optional[str] = None,
+        poll_seconds: Optional[float] = None,
+        max_blocks: Optional[int] = None,
+    ) -> None:
+        self.client = client or get_neo_client()
+        self.contract_hash = contract_hash or settings.NEO_ESCROW_CONTRACT_HASH
+        self.poll_seconds = poll_seconds or settings.ESCROW_POLL_SECONDS
+        self.max_blocks = max_blocks or settings.ESCROW_MAX_BLOCKS_PER_TICK
+        # normalized escrow tx hash -> (dispute id, escrow_tx_id as stored)
+        self._pending: Dict[str, Tuple[str, str]] = {}
+        self._by_dispute: Dict[str, str] = {}
+        self._unchecked: Set[str] = set()
+        self._version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="escrow-watcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                caught_up = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Escrow watcher pass failed")
+                caught_up = True
+            if caught_up:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _refresh_index(self) -> None:
+        """Load pending escrows once, then apply changes since the last pass."""
+        if self._version is None:
+            # Read the sequence first so writes racing the load show up next pass
+            self._version = await db.get_sync_version()
+            for row in await db.get_pending_escrows():
+                self._add(row["id"], row["escrow_tx_id"])
+        else:
+            for row in await db.get_escrow_changes(self._version):
+                self._version = max(self._version, row["row_version"])
+                self._discard(row["id"])
+                if row["escrow_tx_id"] and not row["funded_at"]:
+                    self._add(row["id"], row["escrow_tx_id"])
+        ESCROW_PENDING.set(len(self._pending))
+
+    def _add(self, dispute_id: str, escrow_tx_id: str) -> None:
+        key = normalize_hash(escrow_tx_id)
+        self._pending[key] = (dispute_id, escrow_tx_id)
+        self._by_dispute[dispute_id] = key
+        self._unchecked.add(key)
+
+    def _discard(self, dispute_id: str) -> None:
+        key = self._by_dispute.pop(dispute_id, None)
+        if key is not None:
+            self._pending.pop(key, None)
+            self._unchecked.discard(key)
+
+    async def run_once(self) -> bool:
+        """Process up to `max_blocks` new blocks; returns True when caught up."""
+        start = time.perf_counter()
+        await self._refresh_index()
+
+        height = await self.client.get_block_count() - 1
+        last = await db.get_chain_checkpoint(CHECKPOINT)
+        if last is None:
+            # First run: new index entries are checked directly, so there is
+            # no need to replay history
+            last = height - 1
+        end = min(height, last + self.max_blocks)
+
+        candidates = set(self._unchecked)
+        if end > last and self._pending:
+            blocks = await self.client.get_blocks(range(last + 1, end + 1))
+            for block in blocks.values():
+                for tx in (block or {}).get("tx", []):
+                    key = normalize_hash(tx.get("hash"))
+                    if key in self._pending:
+                        candidates.add(key)
+
+        fundings = []
+        if candidates:
+            txids = {key: self._pending[key][1] for key in candidates if key in self._pending}
+            statuses = await self.client.verify_escrows(txids.values(), self.contract_hash)
+            for key, escrow_tx_id in txids.items():
+                status = statuses.get(escrow_tx_id)
+                if status and status["confirmed"]:
+                    fundings.append({
+                        "dispute_id": self._pending[key][0],
+                        "escrow_tx_id": escrow_tx_id,
+                        "funded_at": _block_time(status.get("blocktime")),
+                    })
+
+        if fundings or end > last:
+            funded = await db.mark_escrows_funded(fundings, checkpoint=CHECKPOINT, block_index=max(end, last))
+            ESCROW_FUNDED.inc(len(funded))
+            for funding in fundings:
+                self._discard(funding["dispute_id"])
+            if funded:
+                logger.info("Escrow watcher marked %d disputes funded", len(funded))
+        self._unchecked.clear()
+
+        ESCROW_PENDING.set(len(self._pending))
+        ESCROW_LAST_BLOCK.set(max(end, last))
+        ESCROW_TICK_DURATION.observe(time.perf_counter() - start)
+        return end >= height
+
+
+def _block_time(blocktime_ms: Optional[int]) -> str:
+    if not blocktime_ms:
+        return datetime.now().isoformat()
+    return datetime.fromtimestamp(blocktime_ms / 1000).isoformat()
@@ -0,0 +1,233 @@
+"""Batched oracle payouts for resolved disputes.
+
+Resolved disputes with an on-chain bet (`escrow_tx_id`) and a winner are
+settled by calling the escrow contract's `resolveBet(dispute_id, winner,
+proof)` as the oracle account (`NEO_ORACLE_WIF`). Instead of one transaction
+per dispute, `PayoutBatcher` puts up to `PAYOUT_BATCH_SIZE` calls in a
+single transaction every `PAYOUT_FLUSH_SECONDS`, and splits a batch in
+half when it would exceed `PAYOUT_MAX_TX_SIZE` or `PAYOUT_MAX_FEE`, or when
+a test run faults.
+
+Bookkeeping is write-ahead. A batch is stored with its signed transaction
+before it is sent. Its disputes get `payout_tx_id` in one transaction only once
+the transaction is confirmed. A crash at any point leaves either a pending batch,
+which is re-sent and checked on the next pass, or nothing at all. Batches that
+fault or pass their `validUntilBlock` release their disputes for a new batch.
+
+Every server worker runs a batcher. A batch is recorded only if none of its
+disputes was paid or batched in the meantime (checked in the same
+transaction), and a transaction whose batch was refused is never sent, so
+two workers can never pay out the same dispute.
+"""
+import asyncio
+import base64
+import logging
+import random
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import database as db
+import events
+from chain import NeoRpcClient, get_neo_client
+from chain.tx import WITNESS_SCOPE_CALLED_BY_ENTRY, Account, ScriptBuilder, Transaction
+from config import settings
+from observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+GAS_DECIMALS = 10 ** 8
+
+PAYOUT_BATCHES = REGISTRY.counter(
+    "settleit_payout_batches_total",
+    "Payout transactions by outcome (submitted, confirmed, failed, expired).",
+    ("outcome",),
+)
+PAYOUT_BATCH_SIZE = REGISTRY.histogram(
+    "settleit_payout_batch_disputes",
+    "Disputes per submitted payout transaction.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+PAYOUT_DISPUTES = REGISTRY.counter(
+    "settleit_payout_disputes_total",
+    "Disputes whose payout transaction was confirmed.",
+)
+PAYOUT_FEES = REGISTRY.counter(
+    "settleit_payout_fees_gas_total",
+    "GAS spent on submitted payout transactions, by fee kind.",
+    ("kind",),
+)
+
+
+class PayoutBatcher:
+    """Collects payable disputes into signed multi-invocation transactions."""
+
+    def __init__(
+        self,
+        client: Optional[NeoRpcClient] = None,
+        account: Optional[Account] = None,
+        contract_hash: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+    ) -> None:
+        self.client = client or get_neo_client()
+        self.account = account or Account(settings.NEO_ORACLE_WIF)
+        self.contract_hash = contract_hash or settings.NEO_ESCROW_CONTRACT_HASH
+        self.batch_size = batch_size or settings.PAYOUT_BATCH_SIZE
+        self.flush_seconds = flush_seconds or settings.PAYOUT_FLUSH_SECONDS
+        self.max_tx_size = settings.PAYOUT_MAX_TX_SIZE
+        self.max_fee = int(settings.PAYOUT_MAX_FEE * GAS_DECIMALS)
+        self._signers = [{"account": self.account.script_hash_string, "scopes": "CalledByEntry"}]
+        # Disputes whose payout faults on its own; retried after a restart
+        self._skipped: Set[str] = set()
+        # Pending batches relayed by this process (others are re-sent once)
+        self._relayed: Set[int] = set()
+        self._resolved_since_flush = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        if event["type"] == events.DISPUTE_RESOLVED:
+            self._resolved_since_flush += 1
+            if self._resolved_since_flush >= self.batch_size:
+                self._wakeup.set()
+
+    async def start(self) -> None:
+        events.hub.add_listener(self._on_event)
+        self._task = asyncio.create_task(self._run(), name="payout-batcher")
+
+    async def stop(self) -> None:
+        events.hub.remove_listener(self._on_event)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Payout pass failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """Settle pending batches, then submit new ones; returns disputes submitted."""
+        await self.reconcile()
+        self._resolved_since_flush = 0
+        submitted = 0
+        while True:
+            candidates = [
+                row for row in await db.get_payout_candidates(self.batch_size + len(self._skipped))
+                if row['id'] not in self._skipped
+            ][:self.batch_size]
+            if not candidates:
+                return submitted
+            submitted += await self._submit(candidates)
+
+    async def reconcile(self) -> None:
+        """Confirm, fail, expire or re-send pending batches."""
+        batches = await db.get_pending_payout_batches()
+        if not batches:
+            return
+        # Height before logs: a log missing afterwards means the transaction is
+        # in no block up to that height. Read after, the height could count a
+        # block that included the transaction after the lookup, expiring a paid batch
+        height = await self.client.get_block_count()
+        logs = await self.client.get_application_logs(batch['tx_hash'] for batch in batches)
+        for batch in batches:
+            log = logs.get(batch['tx_hash'])
+            if log is not None:
+                if all(execution.get("vmstate") == "HALT" for execution in log.get("executions", [])):
+                    paid = await db.confirm_payout_batch(batch['id'])
+                    PAYOUT_BATCHES.labels("confirmed").inc()
+                    PAYOUT_DISPUTES.inc(len(paid))
+                else:
+                    await db.close_payout_batch(batch['id'], 'failed', "transaction faulted")
+                    PAYOUT_BATCHES.labels("failed").inc()
+                    logger.warning("Payout transaction %s faulted", batch['tx_hash'])
+            elif height > batch['valid_until_block']:
+                await db.close_payout_batch(batch['id'], 'expired', "not included before validUntilBlock")
+                PAYOUT_BATCHES.labels("expired").inc()
+            elif batch['id'] not in self._relayed:
+                await self._relay(batch['id'], Transaction.from_bytes(base64.b64decode(batch['raw_tx'])))
+
+    def _build_script(self, disputes: Sequence[Dict[str, Any]]) -> bytes:
+        builder = ScriptBuilder()
+        for dispute in disputes:
+            builder.emit_contract_call(
+                self.contract_hash,
+                settings.PAYOUT_CONTRACT_METHOD,
+                [dispute['id'], dispute['decision_winner'], dispute['neofs_object_id'] or ''],
+            )
+        return builder.to_bytes()
+
+    async def _submit(self, disputes: List[Dict[str, Any]]) -> int:
+        """Sign, record and send one batch, halving it when it breaks a limit."""
+        script = self._build_script(disputes)
+        if len(script) > self.max_tx_size and len(disputes) > 1:
+            return await self._split(disputes)
+
+        test_run = await self.client.invoke_script(script, self._signers)
+        if test_run.get("state") != "HALT":
+            if len(disputes) > 1:
+                return await self._split(disputes)
+            self._skip(disputes[0], f"test run faulted: {test_run.get('exception')}")
+            return 0
+
+        tx = Transaction(
+            script=script,
+            signers=[(self.account.script_hash, WITNESS_SCOPE_CALLED_BY_ENTRY)],
+            nonce=random.getrandbits(32),
+            valid_until_block=await self.client.get_block_count() + settings.PAYOUT_VALID_BLOCKS,
+            system_fee=int(test_run["gasconsumed"]),
+        )
+        tx.witnesses = [(b"", self.account.verification_script)]
+        tx.network_fee = await self.client.calculate_network_fee(tx.to_bytes())
+        tx.sign(self.account, settings.NEO_NETWORK_MAGIC)
+
+        if len(tx.to_bytes()) > self.max_tx_size or tx.system_fee + tx.network_fee > self.max_fee:
+            if len(disputes) > 1:
+                return await self._split(disputes)
+            self._skip(disputes[0], "payout exceeds PAYOUT_MAX_TX_SIZE or PAYOUT_MAX_FEE on its own")
+            return 0
+
+        batch_id = await db.create_payout_batch(
+            tx.hash, tx.to_base64(), tx.valid_until_block, tx.system_fee, tx.network_fee,
+            [dispute['id'] for dispute in disputes],
+        )
+        if batch_id is None:
+            # Another worker batched some of these disputes first; the next pass skips them
+            logger.info("Dropped payout transaction %s: its disputes were batched by another worker", tx.hash)
+            return 0
+        PAYOUT_BATCHES.labels("submitted").inc()
+        PAYOUT_BATCH_SIZE.observe(len(disputes))
+        PAYOUT_FEES.labels("system").inc(tx.system_fee / GAS_DECIMALS)
+        PAYOUT_FEES.labels("network").inc(tx.network_fee / GAS_DECIMALS)
+        await self._relay(batch_id, tx)
+        logger.info("Submitted payout transaction %s for %d disputes", tx.hash, len(disputes))
+        return len(disputes)
+
+    async def _split(self, disputes: List[Dict[str, Any]]) -> int:
+        middle = len(disputes) // 2
+        return await self._submit(disputes[:middle]) + await self._submit(disputes[middle:])
+
+    async def _relay(self, batch_id: int, tx: Transaction) -> None:
+        try:
+            await self.client.send_raw_transaction(tx.to_bytes())
+            self._relayed.add(batch_id)
+        except Exception as exc:
+            # The batch stays pending: it is re-sent next pass or expires
+            logger.warning("Relaying payout transaction %s failed: %s", tx.hash, exc)
+
+    def _skip(self, dispute: Dict[str, Any], reason: str) -> None:
+        self._skipped.add(dispute['id'])
+        logger.error("Skipping payout for dispute %s: %s", dispute['id'], reason)
+
@@ -0,0 +1,262 @@
+"""Precedent index: find resolved Bets similar to a new one.
+
+Many Bets ask near-identical questions (the same match result, the same
+price threshold). The index keeps a MinHash signature of every AI-resolved
+Bet's title, description and positions in one NumPy array, so a lookup
+compares a new dispute against all of them in a single vectorized pass.
+
+- Signatures are `PRECEDENT_NUM_PERM` 16-bit MinHash values (256 bytes per
+  dispute at the default 128). Half cover the question (title and
+  description) and half cover the positions. The share of equal values in
+  each half estimates the Jaccard similarity of those word shingles.
+- A dispute's similarity is the lower of the two. Position shingles are
+  tagged with their side, so a Bet with the creator's and opponent's
+  positions swapped does not match the original.
+- The index is filled from the database on first use. After that it follows
+  the change sequence (`row_version`), so disputes resolved by other
+  workers are picked up incrementally. `_resolve_dispute` also adds its own
+  result right away.
+
+`find_precedents()` offers the closest matches with their verdicts. With
+`PRECEDENT_REUSE_ENABLED`, an AI Bet whose best match reaches
+`PRECEDENT_REUSE_THRESHOLD` reuses that verdict instead of calling the LLM.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import database as db
+from config import settings
+from observability.metrics import REGISTRY
+
+# NumPy is only imported once the index is used, to keep startup fast
+if TYPE_CHECKING:
+    import numpy as np
+
+PRECEDENT_INDEX_SIZE = REGISTRY.gauge(
+    "settleit_precedent_index_disputes",
+    "Resolved Bets in this worker's precedent index.",
+)
+PRECEDENT_LOOKUPS = REGISTRY.counter(
+    "settleit_precedent_lookups_total",
+    "Precedent lookups by outcome (hit: a match above the threshold, miss).",
+    ("outcome",),
+)
+PRECEDENT_LOOKUP_DURATION = REGISTRY.histogram(
+    "settleit_precedent_lookup_seconds",
+    "Time to search the precedent index (excluding the refresh).",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+LLM_CALLS_AVOIDED = REGISTRY.counter(
+    "settleit_llm_calls_avoided_total",
+    "AI resolutions that reused a precedent verdict instead of calling the LLM.",
+)
+
+# Verdicts reused from a precedent start with this line and are not indexed again
+REUSED_MARKER = "_Verdict reused from similar dispute"
+# Older versions stored a failed analysis as the verdict; those are never precedents
+ERROR_MARKER = "AI analysis error:"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+_SEED = 20240601
+_REFRESH_BATCH = 1000
+
+
+def shingles(dispute: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """Word unigrams and bigrams of a Bet's question and, field-tagged, of its positions."""
+    def grams(tag: str, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        return [f"{tag}:{token}" for token in tokens] + [f"{tag}:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    question = grams("q", f"{dispute.get('title') or ''} {dispute.get('description') or ''}")
+    positions = grams("c", dispute.get('creator_position') or '') + grams("o", dispute.get('opponent_position') or '')
+    return question, positions
+
+
+class PrecedentIndex:
+    """MinHash signatures of resolved Bets in a growable NumPy array."""
+
+    def __init__(self, num_perm: Optional[int] = None) -> None:
+        self.num_perm = num_perm or settings.PRECEDENT_NUM_PERM
+        self._signatures: Optional["np.ndarray"] = None
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._cursor = 0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._a: Optional["np.ndarray"] = None
+        self._b: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _ensure_arrays(self) -> None:
+        if self._signatures is not None:
+            return
+        import numpy as np
+
+        rng = np.random.default_rng(_SEED)
+        self._a = rng.integers(1, 1 << 32, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=self.num_perm, dtype=np.uint64)
+        self._signatures = np.zeros((64, self.num_perm), dtype=np.uint16)
+
+    def _minhash(self, items: set, a: "np.ndarray", b: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+
+        if not items:
+            return np.full(len(a), 0xFFFF, dtype=np.uint16)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(item.encode(), digest_size=4).digest(), "little") for item in items),
+            dtype=np.uint64,
+            count=len(items),
+        )
+        permuted = (hashes[:, None] * a + b) % np.uint64(_MERSENNE_PRIME)
+        return (permuted.min(axis=0) & np.uint64(0xFFFF)).astype(np.uint16)
+
+    def signature(self, dispute: Dict[str, Any]) -> Optional["np.ndarray"]:
+        """Question half then positions half of a dispute's signature; None if it has no text."""
+        import numpy as np
+
+        self._ensure_arrays()
+        question, positions = (set(part) for part in shingles(dispute))
+        if not question and not positions:
+            return None
+        half = self.num_perm // 2
+        return np.concatenate([
+            self._minhash(question, self._a[:half], self._b[:half]),
+            self._minhash(positions, self._a[half:], self._b[half:]),
+        ])
+
+    def add(self, dispute: Dict[str, Any]) -> bool:
+        """Insert a resolved Bet; False if it is already indexed, has no usable text or no real verdict."""
+        import numpy as np
+
+        if dispute['id'] in self._positions:
+            return False
+        if (dispute.get('decision_reason') or '').startswith((REUSED_MARKER, ERROR_MARKER)):
+            return False
+        signature = self.signature(dispute)
+        if signature is None:
+            return False
+        count = len(self._ids)
+        if count == len(self._signatures):
+            grown = np.zeros((count * 2, self.num_perm), dtype=np.uint16)
+            grown[:count] = self._signatures
+            self._signatures = grown
+        self._signatures[count] = signature
+        self._positions[dispute['id']] = count
+        self._ids.append(dispute['id'])
+        PRECEDENT_INDEX_SIZE.set(len(self._ids))
+        return True
+
+    def search(self, dispute: Dict[str, Any], k: int, min_similarity: float) -> List[Tuple[str, float]]:
+        """Top-k indexed disputes with estimated similarity >= `min_similarity`."""
+        import numpy as np
+
+        signature = self.signature(dispute)
+        if signature is None or not self._ids:
+            return []
+        start = time.perf_counter()
+        count = len(self._ids)
+        # A precedent must match on the question and on who holds which position
+        equal = self._signatures[:count] == signature
+        half = self.num_perm // 2
+        similarities = np.minimum(equal[:, :half].mean(axis=1), equal[:, half:].mean(axis=1))
+        own = self._positions.get(dispute.get('id'))
+        if own is not None:
+            similarities[own] = -1.0
+        if count > k:
+            candidates = np.argpartition(similarities, count - k)[count - k:]
+        else:
+            candidates = np.arange(count)
+        ranked = candidates[np.argsort(-similarities[candidates], kind="stable")]
+        PRECEDENT_LOOKUP_DURATION.observe(time.perf_counter() - start)
+        return [
+            (self._ids[i], round(float(similarities[i]), 4))
+            for i in ranked if similarities[i] >= min_similarity
+        ]
+
+    async def refresh(self) -> int:
+        """Index AI-resolved Bets changed since the last refresh; returns how many were added."""
+        async with self._lock:
+            added = 0
+            while True:
+                rows = await db.get_resolved_ai_bets_since(self._cursor, _REFRESH_BATCH)
+                for row in rows:
+                    added += self.add(row)
+                    self._cursor = max(self._cursor, row['row_version'])
+                if len(rows) < _REFRESH_BATCH:
+                    break
+            self._loaded = True
+            return added
+
+    async def find_precedents(
+        self,
+        dispute: Dict[str, Any],
+        k: Optional[int] = None,
+        min_similarity: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Closest resolved Bets with their verdicts, most similar first."""
+        await self.refresh()
+        matches = self.search(
+            dispute,
+            k or settings.PRECEDENT_TOP_K,
+            settings.PRECEDENT_MIN_SIMILARITY if min_similarity is None else min_similarity,
+        )
+        PRECEDENT_LOOKUPS.labels("hit" if matches else "miss").inc()
+        precedents = []
+        for dispute_id, similarity in matches:
+            # Another worker may have deleted it since it was indexed
+            precedent = await db.get_dispute_by_id(dispute_id)
+            if precedent is None or precedent['status'] != 'Resolved':
+                continue
+            precedents.append({
+                "dispute_id": dispute_id,
+                "title": precedent['title'],
+                "similarity": similarity,
+                "decision": {
+                    "winner": precedent['decision_winner'],
+                    "reason": precedent['decision_reason'],
+                    "decided_at": precedent['decision_decided_at'],
+                    "decided_by": precedent['decision_decided_by'],
+                },
+            })
+        return precedents
+
+    async def reuse_verdict(self, dispute: Dict[str, Any]) -> Optional[str]:
+        """Verdict text to reuse for an AI Bet, or None to ask the LLM.
+
+        Returns the best precedent's reason, prefixed with where it came
+        from, when reuse is enabled and the similarity reaches
+        `PRECEDENT_REUSE_THRESHOLD`.
+        """
+        if not (settings.PRECEDENT_INDEX_ENABLED and settings.PRECEDENT_REUSE_ENABLED):
+            return None
+        precedents = await self.find_precedents(dispute, k=1, min_similarity=settings.PRECEDENT_REUSE_THRESHOLD)
+        if not precedents:
+            return None
+        LLM_CALLS_AVOIDED.inc()
+        best = precedents[0]
+        await db.record_llm_call({
+            "dispute_id": dispute.get('id'), "dispute_type": dispute.get('type'), "tier": "precedent",
+            "provider": "precedent", "model": best['dispute_id'], "cache_hit": 1, "outcome": "success",
+        })
+        return (
+            f"{REUSED_MARKER} {best['dispute_id']} (similarity {best['similarity']:.0%})._\n\n"
+            f"{best['decision']['reason']}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._loaded,
+            "disputes": len(self._ids),
+            "num_perm": self.num_perm,
+            "bytes": len(self._ids) * self.num_perm * 2,
+            "cursor": self._cursor,
+        }
+
+
+precedent_index = PrecedentIndex()
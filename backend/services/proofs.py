@@ -0,0 +1,188 @@
+"""NeoFS proof uploads for resolved disputes.
+
+Resolving a dispute adds a row to `proof_outbox` in the same transaction
+(`database.update_dispute`), so a proof is never lost to a crash and the
+resolve request never waits on the gateway. `ProofUploader` claims due rows,
+builds a canonical proof bundle for each, uploads the bundles concurrently and
+stores the returned object id in `neofs_object_id`. Failed uploads are retried
+with exponential backoff and full jitter until `PROOF_UPLOAD_MAX_ATTEMPTS`.
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+import database as db
+import events
+from chain.neofs import NeoFSError, NeoFSGateway
+from config import settings
+from observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PROOF_BUNDLE_VERSION = 1
+
+PROOF_UPLOADS = REGISTRY.counter(
+    "settleit_proof_uploads_total",
+    "NeoFS proof upload attempts by outcome (uploaded, retry, failed).",
+    ("outcome",),
+)
+PROOF_UPLOAD_DURATION = REGISTRY.histogram(
+    "settleit_proof_upload_seconds",
+    "Time to build and upload one proof bundle.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+PROOF_OUTBOX = REGISTRY.gauge(
+    "settleit_proof_outbox",
+    "Proof outbox entries by status.",
+    ("status",),
+)
+
+# Dispute fields that go into a proof bundle, in addition to the decision
+BUNDLE_FIELDS = (
+    'id', 'title', 'type', 'description', 'creator_id', 'opponent_id',
+    'creator_position', 'opponent_position', 'validator_type', 'validator_id',
+    'resolution_method', 'stake_amount', 'opponent_stake_amount', 'token',
+    'creator_wallet', 'opponent_wallet', 'escrow_tx_id', 'deadline',
+    'created_at', 'funded_at', 'in_review_at', 'resolved_at',
+)
+
+
+def build_proof_bundle(dispute: Dict[str, Any], evidence: List[Dict[str, Any]]) -> bytes:
+    """Serialize a resolved dispute as canonical JSON (sorted keys, no whitespace).
+
+    Evidence is represented by its SHA-256 so the bundle stays small and does
+    not publish evidence content; the same dispute always yields the same bytes.
+    """
+    bundle = {
+        "version": PROOF_BUNDLE_VERSION,
+        "dispute": {field: dispute.get(field) for field in BUNDLE_FIELDS},
+        "evidence": [
+            {
+                "id": item['id'],
+                "type": item['type'],
+                "submitted_by": item['submitted_by'],
+                "timestamp": item['timestamp'],
+                "sha256": hashlib.sha256((item.get('content') or '').encode()).hexdigest(),
+            }
+            for item in sorted(evidence, key=lambda e: (e['timestamp'], e['id']))
+        ],
+        "decision": {
+            "winner": dispute.get('decision_winner'),
+            "reason": dispute.get('decision_reason'),
+            "decided_at": dispute.get('decision_decided_at'),
+            "decided_by": dispute.get('decision_decided_by'),
+        },
+    }
+    return orjson.dumps(bundle, option=orjson.OPT_SORT_KEYS)
+
+
+def retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (1-based) attempt."""
+    ceiling = min(settings.PROOF_UPLOAD_RETRY_MAX_SECONDS, settings.PROOF_UPLOAD_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+class ProofUploader:
+    """Drains the proof outbox into NeoFS."""
+
+    def __init__(
+        self,
+        gateway: Optional[NeoFSGateway] = None,
+        batch_size: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+    ) -> None:
+        self.gateway = gateway or NeoFSGateway()
+        self.batch_size = batch_size or settings.PROOF_UPLOAD_BATCH_SIZE
+        self.poll_seconds = poll_seconds or settings.PROOF_UPLOAD_POLL_SECONDS
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        if event["type"] == events.DISPUTE_RESOLVED:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Queue proofs missing for already-resolved disputes and start uploading."""
+        queued = await db.enqueue_missing_proofs()
+        if queued:
+            logger.info("Queued %d missing NeoFS proofs", queued)
+        events.hub.add_listener(self._on_event)
+        self._task = asyncio.create_task(self._run(), name="proof-uploader")
+
+    async def stop(self) -> None:
+        events.hub.remove_listener(self._on_event)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.gateway.close()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Proof upload pass failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """Upload one batch of due proofs; returns how many were claimed."""
+        # The lease must outlast a full batch going through the semaphore
+        lease = settings.PROOF_UPLOAD_TIMEOUT * (self.batch_size // self.gateway.concurrency + 2)
+        jobs = await db.claim_proof_uploads(self.batch_size, lease)
+        if jobs:
+            await asyncio.gather(*(self._upload(job["dispute_id"], job["attempts"]) for job in jobs))
+        for status, count in (await db.get_proof_outbox_counts()).items():
+            PROOF_OUTBOX.labels(status).set(count)
+        return len(jobs)
+
+    async def _upload(self, dispute_id: str, attempts: int) -> None:
+        start = time.perf_counter()
+        try:
+            dispute = await db.get_dispute_by_id(dispute_id)
+            if dispute is None:
+                await db.fail_proof_upload(dispute_id, "dispute deleted", None)
+                PROOF_UPLOADS.labels("failed").inc()
+                return
+            bundle = build_proof_bundle(dispute, await db.get_evidence_by_dispute(dispute_id))
+            object_id = await self.gateway.upload(
+                bundle,
+                filename=f"{dispute_id}.proof.json",
+                attributes={
+                    "DisputeId": dispute_id,
+                    "ProofVersion": str(PROOF_BUNDLE_VERSION),
+                    "SHA256": hashlib.sha256(bundle).hexdigest(),
+                },
+            )
+        except Exception as exc:
+            attempt = attempts + 1
+            retryable = not isinstance(exc, NeoFSError) or exc.retryable
+            if retryable and attempt < settings.PROOF_UPLOAD_MAX_ATTEMPTS:
+                await db.fail_proof_upload(dispute_id, str(exc), time.time() + retry_delay(attempt))
+                PROOF_UPLOADS.labels("retry").inc()
+            else:
+                await db.fail_proof_upload(dispute_id, str(exc), None)
+                PROOF_UPLOADS.labels("failed").inc()
+                logger.error("Giving up on NeoFS proof for %s after %d attempts: %s", dispute_id, attempt, exc)
+            return
+        finally:
+            PROOF_UPLOAD_DURATION.observe(time.perf_counter() - start)
+
+        await db.complete_proof_upload(dispute_id, object_id)
+        PROOF_UPLOADS.labels("uploaded").inc()
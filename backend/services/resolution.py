@@ -0,0 +1,187 @@
+"""Background queue for AI resolutions.
+
+AI Bets are resolved after `POST /api/disputes/` has returned, and AI-validated
+Promises after their deadline fires. Jobs wait in a bounded queue and a fixed
+number of worker tasks run them, so a burst of creates cannot start an
+unbounded number of LLM calls. The job itself claims the dispute with a
+conditional status update, which makes duplicate submissions (another worker,
+a retry, recovery) harmless.
+
+A claim leases the dispute for AUTO_RESOLVE_LEASE_SECONDS. On startup and then
+every AUTO_RESOLVE_RECOVERY_SECONDS, each worker re-queues AI Bets still in
+Draft and AI disputes whose lease ran out. A job whose process crashed, was
+killed or shut down mid-call, or that failed, is therefore picked up again.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import database as db
+from config import settings
+from observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RESOLUTION_QUEUE_DEPTH = REGISTRY.gauge(
+    "settleit_resolution_queue_depth",
+    "AI resolutions waiting for a worker.",
+)
+RESOLUTION_QUEUE_WAIT = REGISTRY.histogram(
+    "settleit_resolution_queue_wait_seconds",
+    "Time an AI resolution spent queued before a worker picked it up.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0),
+)
+RESOLUTION_DURATION = REGISTRY.histogram(
+    "settleit_resolution_duration_seconds",
+    "Time spent running an AI resolution job.",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+RESOLUTION_JOBS = REGISTRY.counter(
+    "settleit_resolution_jobs_total",
+    "AI resolution jobs by outcome (resolved, skipped, error, rejected).",
+    ("outcome",),
+)
+
+
+class ResolutionQueue:
+    """Bounded queue of dispute ids drained by a fixed pool of worker tasks."""
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[str] = set()
+        self._enqueued_at: Dict[str, float] = {}
+        self._workers: List[asyncio.Task] = []
+        self._active: Dict[str, float] = {}
+        self._busy: Set[asyncio.Task] = set()
+        self._handler: Optional[Callable[[str], Awaitable[Any]]] = None
+        self._recovery: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight jobs and the age of the oldest queued job."""
+        now = time.time()
+        oldest = min(self._enqueued_at.values(), default=None)
+        return {
+            "running": self.running,
+            "workers": len(self._workers),
+            "capacity": self._queue.maxsize if self._queue is not None else 0,
+            "depth": len(self._queued),
+            "in_flight": len(self._active),
+            "oldest_wait_seconds": round(now - oldest, 3) if oldest is not None else None,
+        }
+
+    def submit(self, dispute_id: str) -> bool:
+        """Queue a dispute for resolution; False if stopped or the queue is full."""
+        if self._queue is None:
+            return False
+        if dispute_id in self._queued:
+            return True
+        try:
+            self._queue.put_nowait(dispute_id)
+        except asyncio.QueueFull:
+            RESOLUTION_JOBS.labels("rejected").inc()
+            logger.warning("Resolution queue full, not queueing dispute %s", dispute_id)
+            return False
+        self._queued.add(dispute_id)
+        self._enqueued_at[dispute_id] = time.time()
+        RESOLUTION_QUEUE_DEPTH.set(len(self._queued))
+        return True
+
+    async def start(
+        self,
+        handler: Callable[[str], Awaitable[Any]],
+        workers: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
+        """Start the workers and the recovery sweep (which runs once straight away).
+
+        `handler(dispute_id)` returns truthy if it resolved the dispute and
+        falsy if there was nothing to do (already claimed or resolved).
+        """
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=max_size or settings.AUTO_RESOLVE_QUEUE_SIZE)
+        count = workers or settings.AUTO_RESOLVE_WORKERS
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"resolution-worker-{i}")
+            for i in range(count)
+        ]
+        recovered = await self.recover()
+        self._recovery = asyncio.create_task(self._recover_periodically(), name="resolution-recovery")
+        logger.info("Resolution queue started with %d workers, %d recovered jobs", count, recovered)
+
+    async def recover(self) -> int:
+        """Queue AI disputes that have no running job; returns how many were found."""
+        pending = await db.get_pending_auto_resolutions()
+        for dispute_id in pending:
+            self.submit(dispute_id)
+        return len(pending)
+
+    async def _recover_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.AUTO_RESOLVE_RECOVERY_SECONDS)
+            try:
+                recovered = await self.recover()
+            except Exception:
+                logger.exception("Resolution recovery sweep failed")
+                continue
+            if recovered:
+                logger.info("Resolution recovery sweep found %d jobs", recovered)
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop taking jobs and give in-flight ones up to `timeout` seconds.
+
+        Queued jobs are dropped; their disputes were not claimed yet and are
+        picked up again by the next recovery sweep. Jobs cancelled mid-call
+        keep their lease and are picked up once it runs out.
+        """
+        if self._queue is None:
+            return
+        self._queue = None
+        recovery, self._recovery = self._recovery, None
+        if recovery is not None:
+            recovery.cancel()
+        busy = list(self._busy)
+        for task in self._workers:
+            if task not in self._busy:
+                task.cancel()
+        if busy:
+            _, still_running = await asyncio.wait(
+                busy, timeout=settings.SHUTDOWN_DRAIN_SECONDS if timeout is None else timeout
+            )
+            for task in still_running:
+                task.cancel()
+        await asyncio.gather(*self._workers, *([recovery] if recovery else []), return_exceptions=True)
+        self._workers = []
+        self._queued.clear()
+        self._enqueued_at.clear()
+        RESOLUTION_QUEUE_DEPTH.set(0)
+
+    async def _worker(self) -> None:
+        task = asyncio.current_task()
+        queue = self._queue
+        while self._queue is queue:
+            dispute_id = await queue.get()
+            self._queued.discard(dispute_id)
+            RESOLUTION_QUEUE_DEPTH.set(len(self._queued))
+            started = time.time()
+            RESOLUTION_QUEUE_WAIT.observe(started - self._enqueued_at.pop(dispute_id, started))
+
+            self._busy.add(task)
+            self._active[dispute_id] = started
+            try:
+                resolved = await self._handler(dispute_id)
+                RESOLUTION_JOBS.labels("resolved" if resolved else "skipped").inc()
+            except Exception:
+                RESOLUTION_JOBS.labels("error").inc()
+                logger.exception("AI resolution failed for dispute %s", dispute_id)
+            finally:
+                RESOLUTION_DURATION.observe(time.time() - started)
+                self._active.pop(dispute_id, None)
+                self._busy.discard(task)
+
+
+resolution_queue = ResolutionQueue()
@@ -174,30 +174,12 @@ export const CreateDispute: React.FC = () => {
         }
       }
 
-      // If Bet with AI resolution, immediately resolve
+      // AI Bets are resolved by the backend in the background
       if (formData.type === 'Bet' && formData.resolutionMethod === 'ai') {
-        try {
-          const resolveResponse = await fetch(`http://localhost:8000/api/disputes/${createdDispute.id}/resolve`, {
-            method: 'POST',
-            headers: {
-              'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-              method: 'ai',
-            }),
-          });
-
-          if (resolveResponse.ok) {
-            await resolveResponse.json();
-            addToast('Bet resolved instantly with AI!', 'success');
-            // Refresh disputes
-            await fetchDisputes();
-            navigate(`/dispute/${createdDispute.id}`);
-            return;
-          }
-        } catch (error) {
-          console.error('Failed to auto-resolve bet:', error);
-        }
+        addToast('Bet created! The AI is resolving it now.', 'success');
+        await fetchDisputes();
+        navigate(`/dispute/${createdDispute.id}`);
+        return;
       }
 
       addToast('Dispute created successfully!', 'success');
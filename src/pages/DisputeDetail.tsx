@@ -21,6 +21,11 @@ import {
   Sparkles,
 } from 'lucide-react';
 
+const EVENTS_URL = 'http://localhost:8000/api/events/stream';
+// Every event the change feed sends for one dispute (resync: events were dropped)
+const DISPUTE_EVENT_TYPES = ['dispute.updated', 'dispute.resolved', 'dispute.deleted', 'evidence.added', 'resync'];
+const POLL_INTERVAL_MS = 3000;
+
 export const DisputeDetail: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
@@ -60,6 +65,48 @@ export const DisputeDetail: React.FC = () => {
     }
   }, [id, dispute, fetchDispute, navigate, addToast]);
 
+  const awaitingAiResolution =
+    dispute?.type === 'Bet' && dispute.resolutionMethod === 'ai' &&
+    dispute.status !== 'Resolved' && dispute.status !== 'Cancelled';
+
+  useEffect(() => {
+    // AI Bets are resolved in the background after creation. Refetch on each
+    // change-feed event, and poll only while the feed is not connected
+    if (!id || !awaitingAiResolution) return;
+    let timer: ReturnType<typeof setInterval> | undefined;
+    const startPolling = () => {
+      if (!timer) {
+        timer = setInterval(() => fetchDispute(id), POLL_INTERVAL_MS);
+      }
+    };
+    const stopPolling = () => {
+      clearInterval(timer);
+      timer = undefined;
+    };
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return stopPolling;
+    }
+
+    const source = new EventSource(`${EVENTS_URL}?dispute_id=${encodeURIComponent(id)}`);
+    const refetch = () => {
+      fetchDispute(id);
+    };
+    DISPUTE_EVENT_TYPES.forEach((type) => source.addEventListener(type, refetch));
+    source.onopen = () => {
+      stopPolling();
+      // Catch up on anything that changed before (re)connecting
+      refetch();
+    };
+    // EventSource reconnects by itself; poll until it does (or for good if it gave up)
+    source.onerror = startPolling;
+    startPolling();
+    return () => {
+      source.close();
+      stopPolling();
+    };
+  }, [id, awaitingAiResolution, fetchDispute]);
+
   useEffect(() => {
     // Check agent status on mount
     const checkStatus = async () => {